@@ -1,8 +1,25 @@
 import re
+import json
+import asyncio
+import inspect
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 from utils import extract_config_from_response, read_plan_from_disk, extract_files_to_modify
 import os
 from output_schema import ArchitectOutput, TesterOutput, DeveloperOutput, ReviewerOutput
+import survey as survey_module
+import impact_analysis as impact_analysis_module
+import sharding as sharding_module
+import pytest_daemon as pytest_daemon_module
+import pytest_results as pytest_results_module
+import review_digest
+import context_budget as context_budget_module
+import speculative as speculative_module
+import snapshots as snapshots_module
+from utils import mirror_workspace
+from llm_cache import structured_invoke, astructured_invoke
+from autopilot import CONTINUE_INSTRUCTION
 
 
 import os
@@ -10,41 +27,15 @@ from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 from output_schema import ArchitectOutput
 from utils import read_plan_from_disk
 
-def architect_node(state, llm, system_prompt, tools, logger=None):
-    stage = state["current_stage"]
-    
-    if logger:
-        logger.agent_start("architect")
-    
-    # 1. ADVANCED SITE SURVEY
-    # We don't just want names; we want to see the logic in 'src' and any existing 'configs'
-    discovery_script = """
-import os
-def get_structure(path):
-    if not os.path.exists(path): return []
-    return [os.path.join(dp, f) for dp, dn, filenames in os.walk(path) for f in filenames]
-
-def read_contents(files):
-    contents = {}
-    for f in files:
-        if f.endswith('.py') or f.endswith('.yaml') or f.endswith('.yml'):
-            try:
-                with open(f, 'r') as file:
-                    contents[f] = file.read()
-            except: pass
-    return contents
-
-src_files = get_structure('src')
-cfg_files = get_structure('configs')
-print("STRUCTURE_START")
-print(f"FILES: {src_files}")
-print(f"CONFIGS: {cfg_files}")
-print("CONTENTS_START")
-print(read_contents(src_files + cfg_files))
-"""
-    
-    discovery_raw = tools["exec_python"].invoke({"code": discovery_script})
+def _architect_survey_script(stage, survey_budget):
+    # No hash cache in the sandbox: it lives with the local survey (main.py)
+    return (
+        inspect.getsource(survey_module)
+        + f"\nprint(survey_codebase({{'src': 'src', 'configs': 'configs'}}, {stage!r}, "
+        + f"None, {survey_budget!r}))\n"
+    )
 
+def _architect_messages(stage, discovery_raw, system_prompt):
     # 2. READ RESEARCH PLAN
     plan_content = read_plan_from_disk(stage)
 
@@ -54,7 +45,8 @@ print(read_contents(src_files + cfg_files))
         f"--- SANDBOX ENVIRONMENT SURVEY ---\n{discovery_raw}\n\n"
         f"--- NEW SPRINT GOAL: {stage.upper()} ---\n{plan_content}\n\n"
         "INSTRUCTIONS:\n"
-        "1. Examine the 'CONTENTS' above. If a required configuration file from a previous stage "
+        "1. Examine the 'CONTENTS' (full files) and 'OUTLINES' (signatures and config keys "
+        "of files not shown in full) above. If a required configuration file from a previous stage "
         "(like data.yaml) is missing from the 'configs' folder but the code exists in 'src', "
         "REVERSE ENGINEER the missing config based on the source code.\n"
         "2. Propose a NEW development plan and config for the current stage that integrates "
@@ -62,20 +54,20 @@ print(read_contents(src_files + cfg_files))
         "3. Do not overwrite existing files unless necessary for the current stage."
     )
 
-    messages = [
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=full_human_message)
     ]
 
-    # 4. INVOKE STRUCTURED LLM
-    structured_llm = llm.with_structured_output(ArchitectOutput)
-    output = structured_llm.invoke(messages)
-
-    # 5. PERSIST THE CONFIG (This creates the YAML in the sandbox)
-    tools["write_files"].invoke({
-        "files": [{"path": f"configs/{stage}.yaml", "content": output.config_yaml}]
-    })
+def _architect_cache_messages(stage, discovery_raw, system_prompt):
+    # The survey text varies between runs over the same tree (full bodies once,
+    # outlines after); the response cache keys on the tree fingerprint instead
+    fingerprint = survey_module.survey_fingerprint(discovery_raw)
+    if fingerprint is None:
+        return None
+    return _architect_messages(stage, f"FINGERPRINT: {fingerprint}", system_prompt)
 
+def _architect_result(stage, output, logger):
     # 6. Log reasoning
     if logger:
         logger.reasoning("architect", output.reasoning)
@@ -88,22 +80,61 @@ print(read_contents(src_files + cfg_files))
         "active_config": output.config_yaml
     }
 
-def tester_node(state, llm, system_prompt, tools, logger=None):
+def architect_node(state, llm, system_prompt, tools, logger=None, survey=None,
+                   survey_budget=survey_module.DEFAULT_TOKEN_BUDGET, cache=None):
     stage = state["current_stage"]
     
     if logger:
-        logger.agent_start("tester")
-    
-    # We now get the config directly from state instead of reading from disk!
-    config_text = state.get("active_config", "")
+        logger.agent_start("architect")
     
-    if not config_text:
-        return {"messages": [HumanMessage(content="Stop: No config found in state.")]}
+    # 1. ADVANCED SITE SURVEY
+    # Full bodies for new/changed or stage-relevant files (within the token budget),
+    # AST outlines for the rest. main.py passes a local `survey` callable, which
+    # keeps the hash cache next to the orchestrator and never waits for the
+    # sandbox; without one the survey runs in the sandbox, uncached.
+    if survey is not None:
+        discovery_raw = survey()
+    else:
+        discovery_raw = tools["exec_python"].invoke({"code": _architect_survey_script(stage, survey_budget)})
 
-    # 1. Bind the structured output
-    structured_llm = llm.with_structured_output(TesterOutput)
+    # 2-3. Plan + survey -> prompt
+    messages = _architect_messages(stage, discovery_raw, system_prompt)
 
-    messages = [
+    # 4. INVOKE STRUCTURED LLM (served from the response cache on identical prompts)
+    output = structured_invoke(llm, ArchitectOutput, messages, cache, logger, "architect",
+                               _architect_cache_messages(stage, discovery_raw, system_prompt))
+
+    # 5. PERSIST THE CONFIG (This creates the YAML in the sandbox)
+    tools["write_files"].invoke({
+        "files": [{"path": f"configs/{stage}.yaml", "content": output.config_yaml}]
+    })
+
+    return _architect_result(stage, output, logger)
+
+async def aarchitect_node(state, llm, system_prompt, tools, logger=None, survey=None,
+                          survey_budget=survey_module.DEFAULT_TOKEN_BUDGET, cache=None):
+    """Async architect_node: `tools` from create_async_tools, the LLM via ainvoke."""
+    stage = state["current_stage"]
+
+    if logger:
+        logger.agent_start("architect")
+
+    if survey is not None:
+        discovery_raw = await asyncio.to_thread(survey)
+    else:
+        discovery_raw = await tools["exec_python"].ainvoke({"code": _architect_survey_script(stage, survey_budget)})
+
+    messages = _architect_messages(stage, discovery_raw, system_prompt)
+    output = await astructured_invoke(llm, ArchitectOutput, messages, cache, logger, "architect",
+                                      _architect_cache_messages(stage, discovery_raw, system_prompt))
+    await tools["write_files"].ainvoke({
+        "files": [{"path": f"configs/{stage}.yaml", "content": output.config_yaml}]
+    })
+
+    return _architect_result(stage, output, logger)
+
+def _tester_messages(stage, config_text, system_prompt):
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=(
             f"Generate tests for stage '{stage}' using this config:\n{config_text}\n\n"
@@ -112,17 +143,14 @@ def tester_node(state, llm, system_prompt, tools, logger=None):
         ))
     ]
 
-    # 2. Invoke
-    output = structured_llm.invoke(messages)
-
-    # 3. Write files to sandbox (Keeping your existing tool logic)
-    files_to_write = [
+def _tester_files(stage, output):
+    return [
         {"path": f"tester_outputs/{stage}_mock_data.csv", "content": output.mock_data},
         {"path": f"tester_outputs/{stage}_tests.py", "content": output.skipped_tests},
         {"path": f"tester_outputs/{stage}_requirements.txt", "content": output.testing_requirements}
     ]
-    tools["write_files"].invoke({"files": files_to_write})
 
+def _tester_result(output, logger):
     # 4. Log
     if logger:
         logger.agent_end("tester", "mock data & tests generated")
@@ -135,7 +163,48 @@ def tester_node(state, llm, system_prompt, tools, logger=None):
         "active_requirements": output.testing_requirements
     }
 
-def developer_node(state, llm, system_prompt, tools, logger=None):
+def tester_node(state, llm, system_prompt, tools, logger=None, cache=None):
+    stage = state["current_stage"]
+    
+    if logger:
+        logger.agent_start("tester")
+    
+    # We now get the config directly from state instead of reading from disk!
+    config_text = state.get("active_config", "")
+    
+    if not config_text:
+        return {"messages": [HumanMessage(content="Stop: No config found in state.")]}
+
+    # 1. Build the request
+    messages = _tester_messages(stage, config_text, system_prompt)
+
+    # 2. Invoke (served from the response cache on identical prompts)
+    output = structured_invoke(llm, TesterOutput, messages, cache, logger, "tester")
+
+    # 3. Write files to sandbox (Keeping your existing tool logic)
+    tools["write_files"].invoke({"files": _tester_files(stage, output)})
+
+    return _tester_result(output, logger)
+
+async def atester_node(state, llm, system_prompt, tools, logger=None, cache=None):
+    """Async tester_node."""
+    stage = state["current_stage"]
+
+    if logger:
+        logger.agent_start("tester")
+
+    config_text = state.get("active_config", "")
+    if not config_text:
+        return {"messages": [HumanMessage(content="Stop: No config found in state.")]}
+
+    messages = _tester_messages(stage, config_text, system_prompt)
+    output = await astructured_invoke(llm, TesterOutput, messages, cache, logger, "tester")
+    await tools["write_files"].ainvoke({"files": _tester_files(stage, output)})
+
+    return _tester_result(output, logger)
+
+def _developer_request(state, system_prompt, context_budget, logger):
+    """Returns (messages for the LLM, messages to store before the response, loop count)."""
     print('\n--- DEVELOPER START ---')
     stage = state["current_stage"]
     loop_count = state.get("tool_loop_count", 0) + 1
@@ -149,6 +218,7 @@ def developer_node(state, llm, system_prompt, tools, logger=None):
     mock_data = state.get("active_mock_data", "")
     test_templates = state.get("active_tests", "")
     failures_list = state.get("active_failures", [])
+    history = state.get("messages", [])
     
     # 2. Retrieve Human Intervention
     human_advice = state.get("human_instruction", "No specific human instructions provided.")
@@ -160,9 +230,19 @@ def developer_node(state, llm, system_prompt, tools, logger=None):
         for i, failure in enumerate(failures_list, 1):
             error_context += f"{i}. {failure.get('failure_type')} in {failure.get('file_path')}: {failure.get('actionable_fix')}\n"
 
-    # 4. Build the Prompt with ALL context
-    prompt = f"""
-Current Stage: {stage}
+    # 4. Latest test digest (older test reports are compacted out of the history)
+    test_results = state.get("test_results") or {}
+    if not test_results:
+        test_digest = "No test run yet."
+    elif review_digest.is_green(test_results):
+        test_digest = "All selected tests passed."
+    else:
+        test_digest = review_digest.format_digest(test_results, review_digest.digest_failures(test_results))
+
+    # 5. The static blueprints are sent once per sprint and pinned in the history
+    new_messages = []
+    if not any(context_budget_module.is_blueprint(m) for m in history):
+        blueprint = HumanMessage(content=f"""{context_budget_module.BLUEPRINT_HEADER}
 
 ### 1. ARCHITECT_PLAN & CONFIG
 Plan:
@@ -177,11 +257,23 @@ Mock Data Context:
 
 Test Scaffolding (Implementation Reference):
 {test_templates}
+""")
+        new_messages.append(blueprint)
+        history = list(history) + [blueprint]
+
+    # 6. Build the per-call request (transient, not stored in the history)
+    prompt = f"""
+Current Stage: {stage}
+
+The ARCHITECT_PLAN, CONFIG, MOCK_DATA and TEST_TEMPLATES are in the SPRINT BLUEPRINT message above.
 
 ### 3. STRUCTURED_BUG_CHECKLIST
 {error_context if error_context else "No structured failures yet."}
 
-### 4. AD HOC HUMAN INSTRUCTION (CRITICAL PRIORITY)
+### 4. LATEST TEST DIGEST
+{test_digest}
+
+### 5. AD HOC HUMAN INSTRUCTION (CRITICAL PRIORITY)
 The user has provided these specific directions. 
 FOLLOW THESE EVEN IF THEY CONTRADICT YOUR OWN OPINION:
 "{human_advice}"
@@ -194,18 +286,21 @@ Your Task:
     
     if loop_count > 3:
         prompt += f"\nWARNING: You have used {loop_count} attempts. If you cannot fix it this time, explain why and stop."
-    llm_with_tools = llm.bind_tools(list(tools.values()))
-    # 5. Invoke & Write
-    #structured_llm = llm.with_structured_output(DeveloperOutput)
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=prompt)
-    ]
-    history = state.get("messages", [])
+
+    # 7. Compact the history into what is left of the token budget
+    system_message = SystemMessage(content=system_prompt)
     current_request = HumanMessage(content=prompt)
-    
-    response = llm_with_tools.invoke(history + [current_request])
-    
+    history_budget = context_budget - context_budget_module.estimate_tokens([system_message, current_request])
+    compacted, stats = context_budget_module.compact_history(history, history_budget)
+    print(f"[DEVELOPER] Context: {stats['tokens']} tokens "
+          f"(from {stats['original_tokens']}, {stats['dropped']} messages dropped)")
+    if logger:
+        logger.info(f"Developer context: {stats['tokens']}/{context_budget} tokens, "
+                    f"{stats['messages']} messages ({stats['dropped']} dropped)")
+
+    return [system_message] + compacted + [current_request], new_messages, loop_count
+
+def _developer_result(response, new_messages, loop_count, logger):
     # Log developer work
     if logger:
         # Extract reasoning from response text if available
@@ -214,36 +309,35 @@ Your Task:
         logger.agent_end("developer", f"Iteration {loop_count}")
         
     return {
-        "messages": [response], 
+        "messages": new_messages + [response], 
         "human_instruction": "", 
         "tool_loop_count": loop_count
     }
+
+def developer_node(state, llm, system_prompt, tools, logger=None,
+                   context_budget=context_budget_module.DEFAULT_CONTEXT_BUDGET):
+    messages, new_messages, loop_count = _developer_request(state, system_prompt, context_budget, logger)
+    llm_with_tools = llm.bind_tools(list(tools.values()))
+
+    # 8. Invoke & Write
+    response = llm_with_tools.invoke(messages)
+    return _developer_result(response, new_messages, loop_count, logger)
+
+async def adeveloper_node(state, llm, system_prompt, tools, logger=None,
+                          context_budget=context_budget_module.DEFAULT_CONTEXT_BUDGET):
+    """Async developer_node."""
+    messages, new_messages, loop_count = _developer_request(state, system_prompt, context_budget, logger)
+    llm_with_tools = llm.bind_tools(list(tools.values()))
+    response = await llm_with_tools.ainvoke(messages)
+    return _developer_result(response, new_messages, loop_count, logger)
     
 from langchain_core.messages import AIMessage, HumanMessage
 import os
 
-def test_runner_node(state, llm, system_prompt, tools, logger=None):
-    """
-    The 'Gatekeeper' node. Executes pytest in the E2B sandbox and 
-    reports results back to the Reviewer and Human Instructor.
-    """
-    print('\n--- 🔍 TEST RUNNER START ---')
-    
-    if logger:
-        logger.agent_start("test_runner")
-    
-    # 1. Retrieve the sandbox execution tool
-    test_tool = tools.get('exec_python')
-    
-    if not test_tool:
-        error_msg = "Error: exec_python tool not found in toolset."
-        return {"messages": [HumanMessage(content=error_msg)]}
-
-    # 2. The Robust Pytest Script
-    # This script handles the 'src' layout and reports the exit code clearly.
-    pytest_script = """
+PYTEST_PREAMBLE = """
 import sys
 import os
+import json
 import pytest
 
 # A. Setup Absolute Paths
@@ -255,32 +349,233 @@ tests_path = os.path.join(base_dir, 'tests')
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 os.environ["PYTHONPATH"] = f"{src_path}{os.pathsep}{os.environ.get('PYTHONPATH', '')}"
+"""
+
+PYTEST_RUN_TEMPLATE = """
+# C. Select the tests to run
+targets = [tests_path]
+__SELECT__
 
-# C. Run Pytest
+# One structured record per test (outcome, duration, truncated traceback)
+_recorder = ResultRecorder()
+exit_code = 3
+
+# D. Run Pytest
 # --import-mode=importlib: Best for 'src' layouts
 # -vv: Maximum verbosity for the Reviewer
 try:
-    exit_code = pytest.main([
-        '-vv', 
-        '--import-mode=importlib', 
-        tests_path,
-        '-p', 'no:cacheprovider'
-    ])
+    if targets:
+__RUN__
+    else:
+        print("SELECTION: no tests affected by the latest changes.")
+        exit_code = 0
 finally:
+    __RECORD__
     print(f"\\nPYTEST_EXIT_CODE: {exit_code}")
     if exit_code == 5:
         print("🚩 ALERT: No tests were collected. The Developer likely missed the naming convention or path.")
+    print(format_results(exit_code, _recorder.results))
 """
 
-    # 3. Invoke the Sandbox
-    raw_result = test_tool.invoke({"code": pytest_script})
+PYTEST_PLAIN_RUN = """
+        exit_code = pytest.main([
+            '-vv', 
+            '--import-mode=importlib', 
+            *targets,
+            '-p', 'no:cacheprovider'
+        ], plugins=[_recorder])
+"""
+
+PYTEST_SHARDED_RUN = """
+        _merged = run_sharded(targets, __WORKERS__, _RESULTS_SOURCE)
+        if _merged is None:
+            # Collection failed: run unsharded so the errors are reported
+            exit_code = pytest.main(['-vv', '--import-mode=importlib', *targets, '-p', 'no:cacheprovider'], plugins=[_recorder])
+        else:
+            exit_code = _merged['exit_code']
+            _recorder.merge(_merged['results'])
+"""
+
+PYTEST_DAEMON_RUN = """
+        _reply = run_in_daemon(['-vv', '--import-mode=importlib', *targets, '-p', 'no:cacheprovider'], _DAEMON_SOURCE)
+        if _reply is None:
+            # Daemon unavailable: run in-process as usual
+            exit_code = pytest.main(['-vv', '--import-mode=importlib', *targets, '-p', 'no:cacheprovider'], plugins=[_recorder])
+        else:
+            print(_reply['output'])
+            print(f"DAEMON: warm run, {len(_reply.get('reloaded', []))} changed src modules reloaded")
+            exit_code = _reply['exit_code']
+            _recorder.merge(_reply['results'])
+"""
+
+def _extract_json(raw, tag):
+    match = re.search(rf"{tag}_START(.*?){tag}_END", raw, re.DOTALL)
+    return json.loads(match.group(1)) if match else None
+
+def _shard_plan_script(header, select_code, total):
+    return header + (
+        "targets = [tests_path]\n"
+        f"{select_code}\n"
+        "_nodeids = collect_nodeids(targets) if targets else []\n"
+        f"_groups = split_shards(_nodeids, load_durations(), {total}) if _nodeids is not None else None\n"
+        "print('SHARD_PLAN_START' + json.dumps({'plan': globals().get('_plan'), 'groups': _groups}) + 'SHARD_PLAN_END')\n"
+    )
 
+def _shard_group_script(header, group, workers):
+    return header + (
+        f"_merged = run_sharded([], {workers}, _RESULTS_SOURCE, nodeids={group!r}, record=False)\n"
+        "print('SHARD_RESULT_START' + json.dumps({'exit_code': _merged['exit_code'], "
+        "'results': _merged['results']}) + 'SHARD_RESULT_END')\n"
+    )
+
+def _merge_shard_reports(raws, groups, header, impact_analysis, planned):
+    """Returns (merged runner output, script recording durations and the selection outcome)."""
+    sections, codes, results = [], [], {}
+    for i, raw in enumerate(raws):
+        shard = _extract_json(raw, "SHARD_RESULT") or {"exit_code": 3, "results": {}}
+        codes.append(shard["exit_code"])
+        results.update(shard["results"])
+        body = re.sub(r"SHARD_RESULT_START.*?SHARD_RESULT_END", "", raw, flags=re.DOTALL)
+        sections.append(f"##### SANDBOX {i + 1}/{len(groups)} ({len(groups[i])} tests)\n{body}")
+    failed = [n for n, r in results.items() if r["outcome"] in ("failed", "error")]
+    exit_code = sharding_module.merge_exit_codes(codes)
+
+    record_script = header + f"update_durations({results!r})\n"
+    if impact_analysis and planned.get("plan"):
+        record_script += f"record_outcome(json.loads({json.dumps(planned['plan'])!r}), {failed!r}, '.test_selection.json')\n"
+
+    merged = (
+        "\n".join(sections)
+        + f"\nPYTEST_EXIT_CODE: {exit_code}\n"
+        + pytest_results_module.format_results(exit_code, results)
+    )
+    return merged, record_script
+
+def _run_across_sandboxes(test_tool, shard_sandboxes, header, select_code, impact_analysis, workers, fallback_script):
+    """
+    Collects in the primary sandbox, splits the tests by duration across the
+    primary plus the leased shard sandboxes, runs every group concurrently
+    and merges the reports into one output with a single exit code.
+    """
+    total = len(shard_sandboxes) + 1
+
+    # 1. Plan in the primary: selection + collection + duration split
+    planned = _extract_json(test_tool.invoke({"code": _shard_plan_script(header, select_code, total)}), "SHARD_PLAN")
+    if not planned or planned["groups"] is None:
+        # Collection errors (or no plan): a plain run reports them properly
+        return test_tool.invoke({"code": fallback_script})
+    groups = planned["groups"]
+    if not groups:
+        return "SELECTION: no tests to run.\nPYTEST_EXIT_CODE: 0"
+
+    # 2. Bring the shard sandboxes up to date with the primary
+    shard_sandboxes.sync()
+
+    # 3. Run each group (with in-sandbox workers) concurrently
+    def _run_group(index):
+        code = _shard_group_script(header, groups[index], workers)
+        if index == 0:
+            return test_tool.invoke({"code": code})
+        return shard_sandboxes.run(index - 1, code)
+
+    # Workers run in a copy of this context so their spans stay under this node
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _run_group, i) for i in range(len(groups))]
+        raws = [f.result() for f in futures]
+
+    # 4. Merge, then 5. record durations (and the impact-analysis outcome) in the primary
+    merged, record_script = _merge_shard_reports(raws, groups, header, impact_analysis, planned)
+    test_tool.invoke({"code": record_script})
+    return merged
+
+async def _arun_across_sandboxes(test_tool, shard_sandboxes, header, select_code, impact_analysis, workers, fallback_script):
+    """Async _run_across_sandboxes. The leased shard sandboxes are sync clients, run off the loop."""
+    total = len(shard_sandboxes) + 1
+
+    planned = _extract_json(await test_tool.ainvoke({"code": _shard_plan_script(header, select_code, total)}), "SHARD_PLAN")
+    if not planned or planned["groups"] is None:
+        return await test_tool.ainvoke({"code": fallback_script})
+    groups = planned["groups"]
+    if not groups:
+        return "SELECTION: no tests to run.\nPYTEST_EXIT_CODE: 0"
+
+    await asyncio.to_thread(shard_sandboxes.sync)
+
+    async def _run_group(index):
+        code = _shard_group_script(header, groups[index], workers)
+        if index == 0:
+            return await test_tool.ainvoke({"code": code})
+        return await asyncio.to_thread(shard_sandboxes.run, index - 1, code)
+
+    raws = await asyncio.gather(*(_run_group(i) for i in range(len(groups))))
+
+    merged, record_script = _merge_shard_reports(raws, groups, header, impact_analysis, planned)
+    await test_tool.ainvoke({"code": record_script})
+    return merged
+
+def _test_runner_scripts(impact_analysis, full_run_every, shard_workers, shard_sandboxes, use_daemon):
+    """Returns (helpers + preamble, selection code, full pytest script)."""
+    # 2. The Robust Pytest Script
+    # This script handles the 'src' layout and reports the exit code clearly.
+    # In impact-analysis mode it only runs the tests affected by changed src modules
+    # (plus previously failing ones), with a periodic full run as a safeguard.
+    # With shard_workers > 1 the selected tests are split by historical duration
+    # across that many pytest processes inside the sandbox. Otherwise, use_daemon
+    # hands the run to a long-lived worker that keeps the heavy imports warm.
+    results_source = inspect.getsource(pytest_results_module)
+    helpers = results_source + f"\n_RESULTS_SOURCE = {results_source!r}\n"
+    select_code = ""
+    record_code = "pass"
+    if impact_analysis:
+        helpers += inspect.getsource(impact_analysis_module)
+        select_code = (
+            f"_plan = plan_selection('src', 'tests', '.test_selection.json', full_every={full_run_every!r})\n"
+            "targets = _plan['targets']\n"
+            "print(f\"SELECTION: {_plan['mode']} run ({_plan['reason']}), {len(targets)} targets\")"
+        )
+        record_code = "record_outcome(_plan, _recorder.failed, '.test_selection.json')"
+    if shard_workers > 1 or shard_sandboxes:
+        helpers += inspect.getsource(sharding_module)
+
+    run_code = PYTEST_PLAIN_RUN
+    if shard_workers > 1:
+        run_code = PYTEST_SHARDED_RUN.replace("__WORKERS__", repr(shard_workers))
+    elif use_daemon:
+        # The warm daemon needs the import-graph helpers too
+        daemon_source = (
+            inspect.getsource(impact_analysis_module)
+            + results_source
+            + inspect.getsource(pytest_daemon_module)
+        )
+        helpers += daemon_source + f"\n_DAEMON_SOURCE = {daemon_source!r}\n"
+        run_code = PYTEST_DAEMON_RUN
+
+    pytest_script = helpers + PYTEST_PREAMBLE + (
+        PYTEST_RUN_TEMPLATE
+        .replace("__SELECT__", select_code)
+        .replace("__RUN__", run_code)
+        .replace("__RECORD__", record_code)
+    )
+    return helpers + PYTEST_PREAMBLE, select_code, pytest_script
+
+def _test_runner_result(raw_result, logger):
     # 4. Determine Status for Logging and Logic
     # 0 = Success, 1 = Tests Failed, 2 = Interrupted, 5 = No Tests Found
-    if "PYTEST_EXIT_CODE: 0" in raw_result:
+    # The runner emits one structured record per test; the exit code and counts
+    # come from there. String matching is only a fallback if the script crashed.
+    test_results = pytest_results_module.parse_results(raw_result)
+    raw_result = pytest_results_module.strip_results(raw_result)
+    if test_results is not None:
+        exit_code = test_results["exit_code"]
+    else:
+        match = re.search(r"PYTEST_EXIT_CODE: (\d+)", raw_result)
+        exit_code = int(match.group(1)) if match else 3
+        test_results = {"exit_code": exit_code, "summary": pytest_results_module.summarise([]), "tests": []}
+
+    if exit_code == 0:
         status = "SUCCESS"
         status_emoji = "✅"
-    elif "PYTEST_EXIT_CODE: 5" in raw_result:
+    elif exit_code == 5:
         status = "EMPTY (GHOST RUN)"
         status_emoji = "👻"
     else:
@@ -294,20 +589,217 @@ finally:
     print('--- 🔍 TEST RUNNER END ---\n')
     
     if logger:
-        # Simple parsing for the summary log
-        passed = raw_result.count(" PASSED")
-        failed = raw_result.count(" FAILED")
-        summary = f"{passed} passed, {failed} failed"
+        counts = test_results["summary"]
+        summary = f"{counts['passed']} passed, {counts['failed']} failed, {counts['error']} errors"
         logger.tool_execution("pytest", status, summary)
+        logger.test_results(test_results)
         logger.agent_end("test_runner", f"Finished with status: {status}")
     
-    # We store last_test_output in the state so the Human can debug directly
+    # We store last_test_output in the state so the Human can debug directly,
+    # and the structured records so downstream nodes don't have to parse text
     return {
         "messages": [AIMessage(content=formatted_content)],
-        "last_test_output": raw_result
+        "last_test_output": raw_result,
+        "test_results": test_results
+    }
+
+def _snapshot_script(state, test_results):
+    tests = test_results.get("tests", [])
+    meta = {
+        "iteration": state.get("iteration_count", 0) + 1,
+        **{k: test_results.get("summary", {}).get(k, 0) for k in ("passed", "failed", "error")},
+        "passed_ids": sorted(t["nodeid"] for t in tests if t.get("outcome") == "passed"),
     }
+    return (inspect.getsource(snapshots_module)
+            + f"\nprint('SNAPSHOT_START' + json.dumps(take_snapshot({meta!r})) + 'SNAPSHOT_END')\n")
+
+def _restore_script(snapshot_id):
+    return (inspect.getsource(snapshots_module)
+            + f"\nprint('SNAPSHOT_START' + json.dumps(restore_snapshot({snapshot_id!r})) + 'SNAPSHOT_END')\n")
+
+def _parse_snapshot(raw):
+    return _extract_json(raw, "SNAPSHOT")
+
+def _rollback_target(state, test_results, auto_rollback):
+    """(best earlier snapshot, tests it passed that now fail) when this run regressed, else (None, [])."""
+    best = snapshots_module.best_snapshot(state.get("snapshots") or [])
+    if not auto_rollback or best is None:
+        return None, []
+    broken = snapshots_module.regressions(best, test_results)
+    return (best, broken) if broken else (None, [])
+
+def _snapshot_result(state, result, record, best, broken, restored, logger):
+    result["snapshots"] = list(state.get("snapshots") or []) + ([record] if record else [])
+    if record:
+        print(f"[SNAPSHOT] #{record['id']}: {record['changed']} files changed, {record['new_objects']} new objects")
+    if restored:
+        note = (f"\n\n⏪ AUTO-ROLLBACK: {len(broken)} tests that passed in snapshot #{best['id']} now fail "
+                f"({', '.join(broken[:5])}). The workspace was restored to snapshot #{best['id']} "
+                f"({best['passed']} passed); the failures above are from the discarded attempt.")
+        result["messages"][-1].content += note
+        result["last_test_output"] = result.get("last_test_output", "") + note
+        print(f"[SNAPSHOT] Rolled back to #{best['id']} ({restored['restored']} files restored, {restored['removed']} removed)")
+        if logger:
+            logger.info(f"Auto-rollback to snapshot #{best['id']}: {len(broken)} regressions")
+    return result
+
+def _record_snapshot(state, result, test_tool, auto_rollback, logger):
+    """Snapshots the tested workspace and rolls a regression back to the best snapshot."""
+    test_results = result.get("test_results") or {}
+    record = _parse_snapshot(test_tool.invoke({"code": _snapshot_script(state, test_results)}))
+    best, broken = _rollback_target(state, test_results, auto_rollback)
+    restored = _parse_snapshot(test_tool.invoke({"code": _restore_script(best["id"])})) if best else None
+    return _snapshot_result(state, result, record, best, broken, restored, logger)
+
+async def _arecord_snapshot(state, result, test_tool, auto_rollback, logger):
+    test_results = result.get("test_results") or {}
+    record = _parse_snapshot(await test_tool.ainvoke({"code": _snapshot_script(state, test_results)}))
+    best, broken = _rollback_target(state, test_results, auto_rollback)
+    restored = _parse_snapshot(await test_tool.ainvoke({"code": _restore_script(best["id"])})) if best else None
+    return _snapshot_result(state, result, record, best, broken, restored, logger)
+
+def test_runner_node(state, llm, system_prompt, tools, logger=None,
+                     impact_analysis=False, full_run_every=impact_analysis_module.FULL_RUN_EVERY,
+                     shard_workers=1, shard_sandboxes=None, use_daemon=False,
+                     snapshots=False, auto_rollback=False):
+    """
+    The 'Gatekeeper' node. Executes pytest in the E2B sandbox and 
+    reports results back to the Reviewer and Human Instructor.
+    """
+    print('\n--- 🔍 TEST RUNNER START ---')
+    
+    if logger:
+        logger.agent_start("test_runner")
+    
+    # 1. Retrieve the sandbox execution tool
+    test_tool = tools.get('exec_python')
+    
+    if not test_tool:
+        error_msg = "Error: exec_python tool not found in toolset."
+        return {"messages": [HumanMessage(content=error_msg)]}
+
+    # 2. The Robust Pytest Script
+    header, select_code, pytest_script = _test_runner_scripts(
+        impact_analysis, full_run_every, shard_workers, shard_sandboxes, use_daemon
+    )
+
+    # 3. Invoke the Sandbox(es)
+    if shard_sandboxes:
+        raw_result = _run_across_sandboxes(
+            test_tool, shard_sandboxes, header, select_code,
+            impact_analysis, max(1, shard_workers), pytest_script
+        )
+    else:
+        raw_result = test_tool.invoke({"code": pytest_script})
 
-def reviewer_node(state, llm, system_prompt, tools, logger=None):
+    result = _test_runner_result(raw_result, logger)
+    if snapshots:
+        result = _record_snapshot(state, result, test_tool, auto_rollback, logger)
+    return result
+
+async def atest_runner_node(state, llm, system_prompt, tools, logger=None,
+                            impact_analysis=False, full_run_every=impact_analysis_module.FULL_RUN_EVERY,
+                            shard_workers=1, shard_sandboxes=None, use_daemon=False,
+                            snapshots=False, auto_rollback=False):
+    """
+    Async test_runner_node. pytest runs remotely behind an awaited run_code,
+    so the event loop keeps serving other sprints while the tests run.
+    """
+    print('\n--- 🔍 TEST RUNNER START ---')
+
+    if logger:
+        logger.agent_start("test_runner")
+
+    test_tool = tools.get('exec_python')
+    if not test_tool:
+        return {"messages": [HumanMessage(content="Error: exec_python tool not found in toolset.")]}
+
+    header, select_code, pytest_script = _test_runner_scripts(
+        impact_analysis, full_run_every, shard_workers, shard_sandboxes, use_daemon
+    )
+    if shard_sandboxes:
+        raw_result = await _arun_across_sandboxes(
+            test_tool, shard_sandboxes, header, select_code,
+            impact_analysis, max(1, shard_workers), pytest_script
+        )
+    else:
+        raw_result = await test_tool.ainvoke({"code": pytest_script})
+
+    result = _test_runner_result(raw_result, logger)
+    if snapshots:
+        result = await _arecord_snapshot(state, result, test_tool, auto_rollback, logger)
+    return result
+
+def speculative_developer_node(state, llm, system_prompt, tools, logger=None,
+                               context_budget=context_budget_module.DEFAULT_CONTEXT_BUDGET,
+                               spares=None, make_tools=None, impact_analysis=False,
+                               tool_concurrency=speculative_module.DEFAULT_TOOL_CONCURRENCY,
+                               snapshots=False, auto_rollback=False):
+    """
+    Best-of-N Developer iteration (see speculative.py). Candidate 0 works in
+    the primary sandbox with `tools`; candidate i works in `spares.sandboxes[i-1]`
+    with `make_tools(sandbox)`. Each candidate is tested where it was written,
+    the winner's workspace is mirrored into the primary sandbox and its test
+    report is returned too, so the graph goes straight to the Reviewer.
+    """
+    messages, new_messages, loop_count = _developer_request(state, system_prompt, context_budget, logger)
+    spares.sync()
+    toolsets = [tools] + [make_tools(sandbox) for sandbox in spares.sandboxes]
+    print(f"[SPECULATIVE] Developing {len(toolsets)} candidates in parallel")
+
+    def attempt(index):
+        try:
+            transcript = speculative_module.develop_candidate(
+                speculative_module.diversify(llm, index), messages, toolsets[index],
+                tool_concurrency=tool_concurrency
+            )
+            report = test_runner_node(state, llm, "", toolsets[index], None, impact_analysis)
+        except Exception as e:
+            print(f"[SPECULATIVE] Candidate {index + 1} failed: {e}")
+            return None
+        return {"transcript": transcript, "report": report, "test_results": report.get("test_results")}
+
+    # Each candidate runs in a copy of this context, so its LLM tokens count for this node
+    with ThreadPoolExecutor(max_workers=len(toolsets)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, attempt, i) for i in range(len(toolsets))]
+        candidates = [f.result() for f in futures]
+
+    for i, candidate in enumerate(candidates):
+        summary = (candidate["test_results"] or {}).get("summary", {}) if candidate else {}
+        line = (f"Candidate {i + 1} (temperature {speculative_module.candidate_temperature(i):.1f}): "
+                + (f"{summary.get('passed', 0)} passed, {summary.get('failed', 0)} failed "
+                   f"in {summary.get('duration', 0.0):.2f}s" if candidate else "crashed"))
+        print(f"[SPECULATIVE] {line}")
+        if logger:
+            logger.info(line)
+
+    winner = speculative_module.pick_best(candidates)
+    if winner is None:
+        raise RuntimeError("Every speculative Developer candidate crashed.")
+    if winner > 0:
+        # Promote: the primary sandbox takes over the winning workspace
+        mirror_workspace(spares.sandboxes[winner - 1], [spares.primary])
+
+    chosen = candidates[winner]
+    transcript, report = chosen["transcript"], chosen["report"]
+    report_message = report["messages"][-1]
+    report_message.content += f"\n\n🏆 Speculative candidate {winner + 1}/{len(candidates)} promoted."
+    if logger:
+        logger.test_results(chosen["test_results"])
+
+    update = _developer_result(transcript[-1], new_messages + transcript[:-1], loop_count, logger)
+    update["messages"] = update["messages"] + [report_message]
+    update["last_test_output"] = report.get("last_test_output", "")
+    update["test_results"] = chosen["test_results"]
+    if snapshots:
+        # The promoted workspace is now in the primary sandbox
+        update = _record_snapshot(state, update, tools["exec_python"], auto_rollback, logger)
+    return update
+
+REVIEW_FALLBACK_CHARS = 6000
+
+def _review_request(state, system_prompt, logger):
+    """Returns (messages, iteration_count, green_update); green runs need no LLM, only green_update."""
     print("--- REVIEWER START ---")
     
     if logger:
@@ -316,23 +808,44 @@ def reviewer_node(state, llm, system_prompt, tools, logger=None):
     # 1. Extract context
     pytest_output = state["messages"][-1].content
     iteration_count = state.get("iteration_count", 0) + 1
-    
-    # 2. Bind structured output
-    structured_llm = llm.with_structured_output(ReviewerOutput)
+    test_results = state.get("test_results") or {}
+
+    # 2. Deterministic pre-analysis: a green run needs no LLM review
+    if review_digest.is_green(test_results):
+        total = test_results.get("summary", {}).get("total", 0)
+        summary = f"All {total} selected tests passed. No review needed."
+        print("Reviewer: green run, LLM review skipped.")
+        print("--- REVIEWER ENDS ---")
+        if logger:
+            logger.reviewer_feedback(summary, [], "")
+            logger.agent_end("reviewer", "green run, LLM skipped")
+        return None, iteration_count, {
+            "messages": [AIMessage(content=f"REVIEWER SUMMARY: {summary}")],
+            "iteration_count": iteration_count,
+            "active_failures": [],
+            "tool_loop_count": 0
+        }
 
+    # Identical failures are collapsed by exception and location; the LLM only
+    # sees the digest. Without structured records, fall back to the log tail.
+    groups = review_digest.digest_failures(test_results)
+    if groups:
+        review_input = review_digest.format_digest(test_results, groups)
+    else:
+        review_input = pytest_output[-REVIEW_FALLBACK_CHARS:]
+    
     # 3. Build messages
     messages = [
         SystemMessage(content=system_prompt),
         HumanMessage(content=(
             f"Iteration Number: {iteration_count}\n"
-            f"Analyze this pytest output and provide structured feedback:\n\n"
-            f"{pytest_output}"
+            f"Analyze this pytest failure digest and provide structured feedback:\n\n"
+            f"{review_input}"
         ))
     ]
+    return messages, iteration_count, None
 
-    # 4. Invoke
-    response_data = structured_llm.invoke(messages)
-
+def _review_result(response_data, iteration_count, logger):
     # 5. Format a clean message for the Developer's chat history
     # We create a string version for the 'messages' list, but the 
     # Developer can also access the raw data if we save it to state.
@@ -360,9 +873,67 @@ def reviewer_node(state, llm, system_prompt, tools, logger=None):
         "tool_loop_count": 0
     }
 
+def reviewer_node(state, llm, system_prompt, tools, logger=None, cache=None):
+    messages, iteration_count, green_update = _review_request(state, system_prompt, logger)
+    if green_update:
+        return green_update
+
+    # 4. Invoke (served from the response cache on identical prompts)
+    response_data = structured_invoke(llm, ReviewerOutput, messages, cache, logger, "reviewer")
+    return _review_result(response_data, iteration_count, logger)
+
+async def areviewer_node(state, llm, system_prompt, tools, logger=None, cache=None):
+    """Async reviewer_node."""
+    messages, iteration_count, green_update = _review_request(state, system_prompt, logger)
+    if green_update:
+        return green_update
+    response_data = await astructured_invoke(llm, ReviewerOutput, messages, cache, logger, "reviewer")
+    return _review_result(response_data, iteration_count, logger)
+
 from langchain_core.messages import HumanMessage
 
-def human_node(state, logger=None):
+def _human_rollback(user_input, snapshots, tools, logger):
+    """Handles 'ROLLBACK [id]'; returns the state update, or None if it could not be applied."""
+    args = user_input.split()[1:]
+    best = snapshots_module.best_snapshot(snapshots)
+    try:
+        target = int(args[0].lstrip("#")) if args else best["id"]
+    except ValueError:
+        print(f"❌ Not a snapshot id: {args[0]}")
+        return None
+    record = next((r for r in snapshots if r["id"] == target), None)
+    if record is None or tools is None:
+        print(f"❌ No snapshot #{target} to roll back to.")
+        return None
+    restored = _parse_snapshot(tools["exec_python"].invoke({"code": _restore_script(target)}))
+    if restored is None:
+        print(f"❌ Rollback to snapshot #{target} failed.")
+        return None
+
+    instruction = (f"The workspace was rolled back to snapshot #{target} (iteration {record['iteration']}, "
+                   f"{record['passed']} passed). Continue from that code.")
+    print(f"⏪ {instruction}")
+    if logger:
+        logger.human_instruction(f"ROLLBACK #{target}")
+        logger.agent_end("human_instructor", f"Rolled back to snapshot #{target}")
+    return {
+        "messages": [HumanMessage(content=instruction)],
+        "human_instruction": instruction,
+        "active_failures": []
+    }
+
+def _human_input(state, autopilot, logger):
+    """The terminal prompt, or the autopilot's decision when running headless."""
+    if autopilot is None:
+        # Enter on its own continues, never as an empty message to the LLM
+        return input(">> ").strip() or CONTINUE_INSTRUCTION
+    text, reason = autopilot.decide(state)
+    print(f"🤖 AUTOPILOT: {text} ({reason})")
+    if logger:
+        logger.info(f"Autopilot: {text} ({reason})")
+    return text.strip() or CONTINUE_INSTRUCTION
+
+def human_node(state, logger=None, tools=None, autopilot=None):
     if logger:
         logger.agent_start("human_instructor")
     
@@ -401,13 +972,30 @@ def human_node(state, logger=None):
         print("\n📝 REVIEWER'S ASSESSMENT:")
         print(last_msg.content)
 
+    # 4. Workspace snapshots taken after each test run
+    snapshots = state.get("snapshots") or []
+    if snapshots:
+        best = snapshots_module.best_snapshot(snapshots)
+        print("\n📸 SNAPSHOTS:")
+        for record in snapshots[-10:]:
+            marker = " ⭐ best" if record is best else ""
+            print(f" #{record['id']} (iteration {record['iteration']}): {record['passed']} passed, "
+                  f"{record['failed'] + record['error']} failing{marker}")
+
     print("\n" + "-"*60)
     print("CONTROLS:")
     print(" - Type specific instructions for the Developer (e.g., 'Fix the import on line 10').")
     print(" - Type 'EXIT' to end the sprint and download all files to your local machine.")
+    if snapshots:
+        print(" - Type 'ROLLBACK' (best snapshot) or 'ROLLBACK <id>' to restore the sandbox workspace.")
     print("-"*60)
     
-    user_input = input(">> ").strip()
+    user_input = _human_input(state, autopilot, logger)
+    while snapshots and user_input.upper().startswith("ROLLBACK"):
+        update = _human_rollback(user_input, snapshots, tools, logger)
+        if update is not None:
+            return update
+        user_input = _human_input(state, autopilot, logger)
     
     if user_input.upper() == "EXIT":
         if logger:
@@ -428,4 +1016,4 @@ def human_node(state, logger=None):
         "messages": [HumanMessage(content=user_input)],
         "human_instruction": user_input,
         "active_failures": [] 
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,321 @@
+"""
+Cross-sprint analytics over the logs directory.
+
+Every SprintLogger run leaves a timestamped text log (and, with telemetry, a
+JSONL events stream), possibly split into rotated segments (`.log.1`,
+`.log.2026-01-01_10`, ...). `ingest` parses them into a local SQLite store,
+incrementally: a sprint is only re-parsed, from all of its segments, when the
+size or mtime of one of them changed.
+`report` answers the questions the individual logs cannot:
+time-to-green per stage, iterations per sprint, reviewer failure types by
+frequency and regressions between consecutive test runs of a stage.
+
+    python analytics.py ingest
+    python analytics.py report --stage features
+"""
+import os
+import re
+import json
+import sqlite3
+import argparse
+import statistics
+from datetime import datetime
+from pathlib import Path
+import review_digest
+
+LOG_DIR = Path(__file__).parent.parent / "logs"
+ANALYTICS_DB = "sprint_analytics.sqlite"
+
+LINE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (.*)$")
+NAME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_(.+)_sprint\.log$")
+# "<base>.1" (size rotation) or "<base>.2026-01-01_10" (time rotation)
+SEGMENT_RE = re.compile(r"^(?P<base>.+_sprint\.(?:log|events\.jsonl))(?:\.(?P<suffix>[^.]+))?$")
+TESTS_RE = re.compile(r"🧪 TESTS: (\d+) passed, (\d+) failed, (\d+) errors, (\d+) skipped "
+                      r"in ([\d.]+)s \(exit code (-?\d+|None)\)")
+FAILED_TEST_RE = re.compile(r"├─ \[(FAILED|ERROR)\] (\S+)")
+REVIEW_FAILURE_RE = re.compile(r"├─ \[([^\]]+)\] ([^:]+): ")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL);
+CREATE TABLE IF NOT EXISTS sprints (
+    id TEXT PRIMARY KEY, stage TEXT, started TEXT, ended TEXT, status TEXT,
+    duration_s REAL, iterations INTEGER, time_to_green_s REAL);
+CREATE TABLE IF NOT EXISTS test_runs (
+    sprint_id TEXT, seq INTEGER, ts TEXT, passed INTEGER, failed INTEGER,
+    errors INTEGER, skipped INTEGER, duration_s REAL, exit_code INTEGER);
+CREATE TABLE IF NOT EXISTS failing_tests (sprint_id TEXT, seq INTEGER, nodeid TEXT, outcome TEXT);
+CREATE TABLE IF NOT EXISTS review_failures (sprint_id TEXT, seq INTEGER, failure_type TEXT, file_path TEXT);
+CREATE TABLE IF NOT EXISTS spans (sprint_id TEXT, kind TEXT, name TEXT, duration_ms REAL, status TEXT);
+"""
+
+
+def _ts(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+
+def _segment_order(path):
+    # Rotated segments are older than the live file: ".5" before ".1",
+    # earlier dates before later ones
+    suffix = SEGMENT_RE.match(path.name).group("suffix")
+    if suffix is None:
+        return (1,)
+    return (0, -int(suffix), "") if suffix.isdigit() else (0, 0, suffix)
+
+
+def segments(log_dir):
+    """{base file name: [segment paths, oldest first]} for every sprint log and events file."""
+    found = {}
+    for path in Path(log_dir).iterdir():
+        match = SEGMENT_RE.match(path.name)
+        if match and path.is_file():
+            found.setdefault(match.group("base"), []).append(path)
+    return {base: sorted(paths, key=_segment_order) for base, paths in sorted(found.items())}
+
+
+def _lines(paths):
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+
+
+def parse_log(path, older=()):
+    """
+    One sprint log -> {"sprint": row, "test_runs", "failing_tests", "review_failures"}.
+    `older` are its rotated segments, oldest first; they are read before `path`.
+    """
+    segment = SEGMENT_RE.match(os.path.basename(path))
+    name = segment.group("base") if segment else os.path.basename(path)
+    match = NAME_RE.match(name)
+    sprint = {"id": name[:-len(".log")], "stage": match.group(1) if match else "unknown",
+              "started": None, "ended": None, "status": None}
+    test_runs, failing, reviews = [], [], []
+    in_review = False
+    first_ts = last_ts = None
+
+    for line in _lines(list(older) + [path]):
+        m = LINE_RE.match(line.rstrip("\n"))
+        if not m:
+            continue
+        ts, message = m.groups()
+        first_ts = first_ts or ts
+        last_ts = ts
+        if message.startswith("🚀 SPRINT START"):
+            sprint["started"] = ts
+        elif message.startswith("✅ SPRINT END:"):
+            sprint["ended"] = ts
+            sprint["status"] = message.split(":", 1)[1].strip()
+        elif (t := TESTS_RE.search(message)):
+            exit_code = None if t.group(6) == "None" else int(t.group(6))
+            test_runs.append({"seq": len(test_runs) + 1, "ts": ts, "passed": int(t.group(1)),
+                              "failed": int(t.group(2)), "errors": int(t.group(3)),
+                              "skipped": int(t.group(4)), "duration_s": float(t.group(5)),
+                              "exit_code": exit_code})
+            in_review = False
+            continue
+        elif message.startswith("❌ REVIEWER FEEDBACK"):
+            in_review = True
+            continue
+        elif test_runs and (ft := FAILED_TEST_RE.match(message)) and not in_review:
+            failing.append({"seq": len(test_runs), "nodeid": ft.group(2), "outcome": ft.group(1).lower()})
+            continue
+        elif in_review and (rf := REVIEW_FAILURE_RE.match(message)):
+            reviews.append({"seq": len(test_runs), "failure_type": rf.group(1), "file_path": rf.group(2)})
+            continue
+        if not message.startswith(("├─", "│", "└─")):
+            in_review = False
+
+    start = sprint["started"] or first_ts
+    end = sprint["ended"] or last_ts
+    sprint["started"] = start
+    sprint["duration_s"] = (_ts(end) - _ts(start)).total_seconds() if start and end else None
+    sprint["iterations"] = len(test_runs)
+    green = next((r for r in test_runs if _green(r)), None)
+    sprint["time_to_green_s"] = (_ts(green["ts"]) - _ts(start)).total_seconds() if green and start else None
+    return {"sprint": sprint, "test_runs": test_runs, "failing_tests": failing, "review_failures": reviews}
+
+
+def _green(run):
+    """Same rule as the live loop: exit code 0, something passed, nothing failed."""
+    return review_digest.is_green({"exit_code": run["exit_code"], "summary": {
+        "passed": run["passed"], "failed": run["failed"], "error": run["errors"]}})
+
+
+def parse_events(path, older=()):
+    """Span events from a telemetry JSONL file and its rotated segments (oldest first)."""
+    spans = []
+    for line in _lines(list(older) + [path]):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get("event") == "span":
+            spans.append({"kind": event.get("kind"), "name": event.get("name"),
+                          "duration_ms": event.get("duration_ms"), "status": event.get("status")})
+    return spans
+
+
+def connect(db_path):
+    db = sqlite3.connect(db_path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def ingest(log_dir=LOG_DIR, db_path=None):
+    """
+    Parses new or changed logs into the store. Returns the number of logs
+    (a sprint log or events file with all its rotated segments) (re)ingested.
+    """
+    log_dir = Path(log_dir)
+    db = connect(db_path or log_dir / ANALYTICS_DB)
+    count = 0
+    try:
+        with db:
+            # Sprint logs first, so spans always find their sprint
+            for base, paths in sorted(segments(log_dir).items(), key=lambda item: item[0].endswith(".jsonl")):
+                stats = {path: path.stat() for path in paths}
+                if all(db.execute("SELECT size, mtime FROM files WHERE path = ?", (str(path),)).fetchone()
+                       == (stat.st_size, stat.st_mtime) for path, stat in stats.items()):
+                    continue
+                *older, path = paths
+                if base.endswith(".events.jsonl"):
+                    sprint_id = base[:-len(".events.jsonl")]
+                    db.execute("DELETE FROM spans WHERE sprint_id = ?", (sprint_id,))
+                    db.executemany("INSERT INTO spans VALUES (:sprint_id, :kind, :name, :duration_ms, :status)",
+                                   [dict(s, sprint_id=sprint_id) for s in parse_events(path, older)])
+                else:
+                    parsed = parse_log(path, older)
+                    sprint_id = parsed["sprint"]["id"]
+                    for table in ("sprints", "test_runs", "failing_tests", "review_failures"):
+                        db.execute(f"DELETE FROM {table} WHERE {'id' if table == 'sprints' else 'sprint_id'} = ?",
+                                   (sprint_id,))
+                    db.execute("INSERT INTO sprints VALUES (:id, :stage, :started, :ended, :status, "
+                               ":duration_s, :iterations, :time_to_green_s)", parsed["sprint"])
+                    db.executemany("INSERT INTO test_runs VALUES (:sprint_id, :seq, :ts, :passed, :failed, "
+                                   ":errors, :skipped, :duration_s, :exit_code)",
+                                   [dict(r, sprint_id=sprint_id) for r in parsed["test_runs"]])
+                    db.executemany("INSERT INTO failing_tests VALUES (:sprint_id, :seq, :nodeid, :outcome)",
+                                   [dict(r, sprint_id=sprint_id) for r in parsed["failing_tests"]])
+                    db.executemany("INSERT INTO review_failures VALUES (:sprint_id, :seq, :failure_type, :file_path)",
+                                   [dict(r, sprint_id=sprint_id) for r in parsed["review_failures"]])
+                db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                               [(str(path), stat.st_size, stat.st_mtime) for path, stat in stats.items()])
+                count += 1
+    finally:
+        db.close()
+    return count
+
+
+# --- Reports ---
+
+def time_to_green(db, stage=None):
+    """
+    Per stage: sprints, green sprints, median and best seconds to the first
+    green run (exit code 0 with at least one pass and no failures or errors).
+    """
+    rows = db.execute("SELECT stage, time_to_green_s FROM sprints WHERE (? IS NULL OR stage = ?) ORDER BY stage",
+                      (stage, stage)).fetchall()
+    report = {}
+    for row_stage, seconds in rows:
+        entry = report.setdefault(row_stage, {"sprints": 0, "green": []})
+        entry["sprints"] += 1
+        if seconds is not None:
+            entry["green"].append(seconds)
+    return {s: {"sprints": e["sprints"], "green": len(e["green"]),
+                "median_s": statistics.median(e["green"]) if e["green"] else None,
+                "best_s": min(e["green"]) if e["green"] else None}
+            for s, e in report.items()}
+
+
+def iterations(db, stage=None):
+    return db.execute("SELECT id, stage, iterations, status, duration_s FROM sprints "
+                      "WHERE (? IS NULL OR stage = ?) ORDER BY started, id", (stage, stage)).fetchall()
+
+
+def failure_types(db, stage=None):
+    return db.execute("SELECT f.failure_type, COUNT(*) AS n FROM review_failures f JOIN sprints s ON s.id = f.sprint_id "
+                      "WHERE (? IS NULL OR s.stage = ?) GROUP BY f.failure_type ORDER BY n DESC, f.failure_type",
+                      (stage, stage)).fetchall()
+
+
+def regressions(db, stage=None):
+    """
+    Consecutive test runs of a stage (across sprints, in time order) where a
+    test fails that did not fail in the previous run. Compared by failing node
+    ids rather than pass counts: an impact-selected run passes fewer tests
+    than a full run without anything having broken.
+    """
+    runs = db.execute("SELECT s.stage, r.sprint_id, r.seq, r.passed FROM test_runs r JOIN sprints s ON s.id = r.sprint_id "
+                      "WHERE (? IS NULL OR s.stage = ?) ORDER BY s.stage, s.started, s.id, r.seq", (stage, stage)).fetchall()
+    failing = {}
+    for sprint_id, seq, nodeid in db.execute("SELECT sprint_id, seq, nodeid FROM failing_tests"):
+        failing.setdefault((sprint_id, seq), set()).add(nodeid)
+
+    found = []
+    for previous, current in zip(runs, runs[1:]):
+        if previous[0] != current[0]:
+            continue
+        newly = sorted(failing.get((current[1], current[2]), set()) - failing.get((previous[1], previous[2]), set()))
+        if not newly:
+            continue
+        found.append({"stage": current[0], "from": f"{previous[1]}#{previous[2]}", "to": f"{current[1]}#{current[2]}",
+                      "passed_before": previous[3], "passed_after": current[3], "newly_failing": newly})
+    return found
+
+
+def node_time(db, stage=None):
+    return db.execute("SELECT s.stage, p.name, COUNT(*), SUM(p.duration_ms) / 1000.0 FROM spans p "
+                      "JOIN sprints s ON s.id = p.sprint_id WHERE p.kind = 'node' AND (? IS NULL OR s.stage = ?) "
+                      "GROUP BY s.stage, p.name ORDER BY s.stage, SUM(p.duration_ms) DESC", (stage, stage)).fetchall()
+
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.0f}s"
+
+
+def format_report(db, stage=None):
+    lines = ["=" * 60, "📊 TIME TO GREEN", "=" * 60]
+    for s, e in time_to_green(db, stage).items():
+        lines.append(f" {s:<12} {e['green']}/{e['sprints']} sprints green, "
+                     f"median {_seconds(e['median_s'])}, best {_seconds(e['best_s'])}")
+
+    lines += ["", "🔁 ITERATIONS PER SPRINT"]
+    for sprint_id, s, count, status, duration in iterations(db, stage):
+        lines.append(f" {sprint_id:<40} {s:<12} {count:>3} iterations  {status or 'UNFINISHED':<8} {_seconds(duration)}")
+
+    lines += ["", "❌ REVIEWER FAILURE TYPES"]
+    for failure_type, count in failure_types(db, stage):
+        lines.append(f" {count:>5}  {failure_type}")
+
+    lines += ["", "📉 REGRESSIONS"]
+    found = regressions(db, stage)
+    for r in found:
+        lines.append(f" [{r['stage']}] {r['from']} → {r['to']}: {r['passed_before']} → {r['passed_after']} passed")
+        for nodeid in r["newly_failing"][:10]:
+            lines.append(f"   └─ {nodeid}")
+    if not found:
+        lines.append(" none")
+
+    spans = node_time(db, stage)
+    if spans:
+        lines += ["", "⏱️ TIME PER NODE"]
+        for s, name, count, seconds in spans:
+            lines.append(f" {s:<12} {name:<18} {count:>4} runs {seconds:>9.1f}s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-sprint analytics over the logs directory")
+    parser.add_argument("command", choices=["ingest", "report"], help="report ingests new logs first")
+    parser.add_argument("--logs", type=str, default=str(LOG_DIR), help="Directory with the sprint logs")
+    parser.add_argument("--db", type=str, default=None, help=f"SQLite store (default: <logs>/{ANALYTICS_DB})")
+    parser.add_argument("--stage", type=str, default=None, help="Only report this stage")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(args.logs, ANALYTICS_DB)
+    print(f"📥 Ingested {ingest(args.logs, db_path)} new or changed files into {db_path}")
+    if args.command == "report":
+        db = connect(db_path)
+        try:
+            print(format_report(db, args.stage))
+        finally:
+            db.close()
@@ -0,0 +1,81 @@
+"""
+Headless answers for the human_instructor prompt.
+
+An Autopilot replaces `input(">> ")` so a sprint can run unattended. Each
+time the graph reaches the human node it decides, in this order:
+1. a pending operator instruction (from the instructions file or queue),
+2. EXIT when the last test run was green,
+3. EXIT when the iteration budget is spent,
+4. otherwise it waits up to `timeout` seconds for an instruction and then
+   takes the default action (CONTINUE: the Developer iterates on the
+   Reviewer's feedback; or EXIT).
+The instructions file is read incrementally: append a line while the
+sprint runs and the next decision picks it up. Blank lines and lines
+starting with '#' are ignored.
+"""
+import os
+import time
+import queue
+
+import review_digest
+
+DEFAULT_MAX_ITERATIONS = 5
+DEFAULT_ACTION = "CONTINUE"
+# What CONTINUE sends the Developer: an empty HumanMessage can be rejected by the model
+CONTINUE_INSTRUCTION = "Continue with the plan."
+POLL_SECONDS = 1.0
+
+
+class Autopilot:
+    """Policy engine standing in for the human at the terminal."""
+
+    def __init__(self, max_iterations: int = DEFAULT_MAX_ITERATIONS, instructions_file: str = None,
+                 instructions: queue.Queue = None, timeout: float = 0, default_action: str = DEFAULT_ACTION):
+        if default_action.upper() not in ("CONTINUE", "EXIT"):
+            raise ValueError(f"Unknown default action: {default_action}")
+        self.max_iterations = max_iterations
+        self.instructions_file = instructions_file
+        self.instructions = instructions
+        self.timeout = timeout
+        self.default_action = default_action.upper()
+        self._consumed = 0
+
+    def _next_instruction(self):
+        if self.instructions is not None:
+            try:
+                return self.instructions.get_nowait()
+            except queue.Empty:
+                pass
+        if self.instructions_file and os.path.exists(self.instructions_file):
+            with open(self.instructions_file, "r", encoding="utf-8") as f:
+                lines = [l.strip() for l in f if l.strip() and not l.lstrip().startswith("#")]
+            if len(lines) > self._consumed:
+                self._consumed += 1
+                return lines[self._consumed - 1]
+        return None
+
+    def _wait_for_instruction(self):
+        deadline = time.monotonic() + (self.timeout or 0)
+        while True:
+            instruction = self._next_instruction()
+            if instruction is not None or time.monotonic() >= deadline:
+                return instruction
+            time.sleep(min(POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+
+    def decide(self, state):
+        """Returns what the human would have typed, and why: (text, reason)."""
+        instruction = self._next_instruction()
+        if instruction is not None:
+            return instruction, "operator instruction"
+        if review_digest.is_green(state.get("test_results") or {}):
+            return "EXIT", "all selected tests passed"
+        iteration = state.get("iteration_count", 0)
+        if iteration >= self.max_iterations:
+            return "EXIT", f"iteration budget spent ({iteration}/{self.max_iterations})"
+
+        instruction = self._wait_for_instruction()
+        if instruction is not None:
+            return instruction, "operator instruction"
+        if self.default_action == "EXIT":
+            return "EXIT", "no instruction, default action"
+        return CONTINUE_INSTRUCTION, "no instruction, continuing on the Reviewer's feedback"
@@ -0,0 +1,94 @@
+"""
+Token-budgeted history compaction for the Developer.
+
+- Test-runner reports are removed from the history: the Developer gets the
+  latest test digest in its request instead.
+- Tool results older than the latest tool-calling turn are replaced by a
+  one-line stub (the tool_call_id is kept, so call/result pairs stay valid).
+- The sprint blueprint (plan, config, mock data, test templates) is sent once
+  as a pinned message and referenced afterwards.
+- If the history is still over budget, the oldest turns are dropped whole
+  (an AI tool-call message together with its tool results).
+"""
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+CHARS_PER_TOKEN = 4
+DEFAULT_CONTEXT_BUDGET = 60000
+TOOL_STUB_CHARS = 200
+BLUEPRINT_HEADER = "### SPRINT BLUEPRINT"
+TEST_REPORT_MARKER = "SANDBOX TEST RESULTS"
+
+
+def estimate_tokens(messages) -> int:
+    total = 0
+    for m in messages:
+        content = m.content if isinstance(m.content, str) else str(m.content)
+        total += len(content) // CHARS_PER_TOKEN + 1
+        for call in getattr(m, "tool_calls", None) or []:
+            total += len(str(call.get("args", ""))) // CHARS_PER_TOKEN
+    return total
+
+
+def is_blueprint(message) -> bool:
+    return isinstance(message, HumanMessage) and str(message.content).startswith(BLUEPRINT_HEADER)
+
+
+def is_test_report(message) -> bool:
+    return isinstance(message, AIMessage) and TEST_REPORT_MARKER in str(message.content)[:200]
+
+
+def stub_tool_message(message):
+    content = str(message.content)
+    if len(content) <= TOOL_STUB_CHARS:
+        return message
+    first_line = content.strip().splitlines()[0][:TOOL_STUB_CHARS] if content.strip() else ""
+    stub = f"[stale tool output elided: {len(content)} chars] {first_line}"
+    return message.model_copy(update={"content": stub})
+
+
+def _units(messages):
+    """Groups an AI tool-call message with the tool results that answer it."""
+    units = []
+    for m in messages:
+        if isinstance(m, ToolMessage) and units and units[-1][0].__class__ is AIMessage and units[-1][0].tool_calls:
+            units[-1].append(m)
+        else:
+            units.append([m])
+    return units
+
+
+def compact_history(messages, budget=DEFAULT_CONTEXT_BUDGET):
+    """
+    Returns (compacted messages, stats). `budget` is the token budget for the
+    history alone; the caller accounts for the system prompt and request.
+    """
+    original = estimate_tokens(messages)
+
+    # 1. The latest test digest travels in the request, not in the history
+    kept = [m for m in messages if not is_test_report(m)]
+
+    # 2. Only the most recent tool-calling turn keeps its full tool outputs
+    last_call = max((i for i, m in enumerate(kept) if isinstance(m, AIMessage) and m.tool_calls), default=-1)
+    kept = [stub_tool_message(m) if isinstance(m, ToolMessage) and i < last_call else m
+            for i, m in enumerate(kept)]
+
+    # 3. Drop whole turns, oldest first, never the blueprint or the last turn
+    units = _units(kept)
+    dropped = 0
+    while estimate_tokens([m for u in units for m in u]) > budget:
+        victim = next((i for i, u in enumerate(units[:-1]) if not is_blueprint(u[0])), None)
+        if victim is None:
+            break
+        dropped += len(units.pop(victim))
+    # A history must not start with orphaned tool results
+    while units and isinstance(units[0][0], ToolMessage):
+        dropped += len(units.pop(0))
+
+    compacted = [m for u in units for m in u]
+    stats = {
+        "original_tokens": original,
+        "tokens": estimate_tokens(compacted),
+        "messages": len(compacted),
+        "dropped": dropped,
+    }
+    return compacted, stats
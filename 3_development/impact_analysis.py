@@ -0,0 +1,220 @@
+"""
+Change-aware test selection for test_runner_node.
+
+Maps every test file to the `src` modules it imports (directly or through
+other src modules) and, between runs, re-selects only the tests affected by
+changed modules plus the tests that failed last time. A full run is forced
+periodically, on the first run, and whenever something global changes
+(conftest.py, configs, test data files, deleted modules).
+
+Stdlib-only: the source is shipped into the sandbox with the runner script.
+"""
+import os
+import ast
+import json
+import hashlib
+
+FULL_RUN_EVERY = 5
+
+
+def _hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _py_files(root):
+    found = []
+    if not os.path.isdir(root):
+        return found
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+        found.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(".py"))
+    return sorted(found)
+
+
+def module_name(path, src_root):
+    """src/quant_football/data/loader.py -> quant_football.data.loader"""
+    rel = os.path.relpath(path, src_root).replace(os.sep, "/")[:-3]
+    if rel.endswith("/__init__"):
+        rel = rel[: -len("/__init__")]
+    return rel.replace("/", ".")
+
+
+def _with_parents(name):
+    parts = name.split(".")
+    return {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+
+
+def imported_modules(path, known, package=""):
+    """Internal modules (and their parent packages) imported by a file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return set()
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                anchor = package.split(".")[: len(package.split(".")) - (node.level - 1)] if package else []
+                base = ".".join([p for p in anchor if p] + ([base] if base else []))
+            names.add(base)
+            names.update(f"{base}.{alias.name}" if base else alias.name for alias in node.names)
+
+    resolved = set()
+    for name in names:
+        # Tests sometimes import through the 'src.' prefix
+        if name.startswith("src."):
+            name = name[len("src."):]
+        resolved.update(n for n in _with_parents(name) if n in known)
+    return resolved
+
+
+def build_import_graph(src_root):
+    """Returns {module: set of internal modules it imports}."""
+    files = {module_name(p, src_root): p for p in _py_files(src_root)}
+    graph = {}
+    for name, path in files.items():
+        package = name if path.endswith("__init__.py") else name.rpartition(".")[0]
+        graph[name] = imported_modules(path, files, package) - {name}
+    return graph
+
+
+def affected_modules(changed, graph):
+    """Changed modules plus everything that transitively imports them."""
+    affected = set(changed)
+    frontier = set(changed)
+    while frontier:
+        frontier = {m for m, deps in graph.items() if deps & frontier and m not in affected}
+        affected |= frontier
+    return affected
+
+
+def snapshot(src_root, tests_root, extra_roots=()):
+    """Content hashes of src, tests and any extra folders (e.g. configs)."""
+    result = {}
+    for root in (src_root, tests_root) + tuple(extra_roots):
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+            for f in filenames:
+                if not f.endswith((".pyc", ".pyo")):
+                    full = os.path.join(dirpath, f)
+                    result[full.replace(os.sep, "/")] = _hash(full)
+    return result
+
+
+def load_state(state_path):
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def nodeid_exists(nodeid):
+    """
+    True if 'tests/test_x.py::TestA::test_b' still names a test. Parameters
+    ('test_b[1-2]') are ignored; a class with base classes is trusted to
+    provide any method, since it may inherit it.
+    """
+    path, _, rest = nodeid.partition("::")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            scope = ast.parse(f.read())
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return False
+    for name in [p.split("[")[0] for p in rest.split("::") if p]:
+        if isinstance(scope, ast.ClassDef) and scope.bases:
+            return True
+        scope = next((n for n in scope.body
+                      if isinstance(n, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+                      and n.name == name), None)
+        if scope is None:
+            return False
+    return True
+
+
+def plan_selection(src_root="src", tests_root="tests", state_path=".test_selection.json",
+                   full_every=FULL_RUN_EVERY, extra_roots=("configs",)):
+    """
+    Decides what to run. Returns {"mode": "full" | "impact", "targets": [...],
+    "reason": str, "snapshot": {...}}. In "full" mode targets is [tests_root].
+    """
+    state = load_state(state_path)
+    current = snapshot(src_root, tests_root, extra_roots)
+    plan = {"mode": "full", "targets": [tests_root], "snapshot": current}
+
+    previous = state.get("snapshot")
+    if not previous:
+        plan["reason"] = "no previous run"
+        return plan
+    if state.get("runs_since_full", 0) + 1 >= full_every:
+        plan["reason"] = f"periodic full run (every {full_every})"
+        return plan
+
+    changed = {p for p, h in current.items() if previous.get(p) != h}
+    deleted = set(previous) - set(current)
+    src_prefix = src_root.rstrip("/") + "/"
+    tests_prefix = tests_root.rstrip("/") + "/"
+
+    # Data files under tests/ can be read by any test, so they count as global
+    global_changes = [p for p in changed | deleted
+                      if not p.startswith((src_prefix, tests_prefix)) or p.endswith("conftest.py")
+                      or (p.startswith(tests_prefix) and not p.endswith(".py"))]
+    if global_changes:
+        plan["reason"] = f"global change: {global_changes[0]}"
+        return plan
+    if any(p.startswith(src_prefix) for p in deleted):
+        plan["reason"] = "src module deleted"
+        return plan
+
+    graph = build_import_graph(src_root)
+    changed_modules = {module_name(p, src_root) for p in changed if p.startswith(src_prefix) and p.endswith(".py")}
+    hit = affected_modules(changed_modules, graph)
+
+    targets = set()
+    for test_file in _py_files(tests_root):
+        key = test_file.replace(os.sep, "/")
+        if not os.path.basename(key).startswith("test"):
+            continue
+        if key in changed or imported_modules(test_file, graph) & hit:
+            targets.add(key)
+
+    # Previously failing tests always re-run, unless they were renamed or removed
+    # since: pytest exits with "not found" (code 4) on a stale node id
+    failing = [n for n in state.get("failing", []) if nodeid_exists(n)]
+    targets.update(n for n in failing if n.split("::")[0] not in targets)
+
+    plan.update({
+        "mode": "impact",
+        "targets": sorted(targets),
+        "reason": f"{len(changed_modules)} changed modules, {len(failing)} previously failing",
+    })
+    return plan
+
+
+def record_outcome(plan, failed_nodeids, state_path=".test_selection.json"):
+    """Stores the snapshot, failing tests and full-run counter for the next run."""
+    state = load_state(state_path)
+    if plan["mode"] == "full":
+        failing = set(failed_nodeids)
+    else:
+        ran = plan["targets"]
+        still_failing = [n for n in state.get("failing", [])
+                         if not any(n == t or n.startswith(t + "::") for t in ran)]
+        failing = set(still_failing) | set(failed_nodeids)
+    state.update({
+        "snapshot": plan["snapshot"],
+        "failing": sorted(failing),
+        "runs_since_full": 0 if plan["mode"] == "full" else state.get("runs_since_full", 0) + 1,
+    })
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
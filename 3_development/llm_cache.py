@@ -0,0 +1,144 @@
+"""
+Persistent, content-addressed cache for structured LLM responses.
+
+The Architect, Tester and Reviewer call `llm.with_structured_output(schema)`
+at temperature 0, so an identical prompt gives an identical answer. Responses
+are stored in a SQLite file keyed by sha256(model, temperature, schema, messages),
+where message contents are whitespace-normalised. Callers whose prompt embeds
+volatile text can pass `key_messages`, a stable stand-in for the prompt, to key
+on instead. The file is bounded in size; least recently used entries are
+evicted first.
+"""
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+
+LLM_CACHE_FILE = ".llm_cache.sqlite"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def _normalise(content):
+    if isinstance(content, str):
+        return "\n".join(line.rstrip() for line in content.strip().splitlines())
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def cache_key(llm, schema, messages):
+    model = getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+    payload = {
+        "model": str(model),
+        "temperature": getattr(llm, "temperature", None),
+        "schema": schema.__name__,
+        "schema_hash": hashlib.sha256(
+            json.dumps(schema.model_json_schema(), sort_keys=True).encode("utf-8")).hexdigest(),
+        "messages": [[m.type, _normalise(m.content)] for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache of serialised pydantic responses."""
+
+    def __init__(self, path=LLM_CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                       "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                       "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+
+    def _connect(self):
+        # One short-lived connection per operation keeps the cache usable from threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        db = self._connect()
+        try:
+            with db:
+                row = db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+        finally:
+            db.close()
+
+    def put(self, key, value):
+        db = self._connect()
+        try:
+            with db:
+                db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                           (key, value, len(value.encode("utf-8")), time.time()))
+                self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        db = self._connect()
+        try:
+            count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {"entries": count, "bytes": size}
+        finally:
+            db.close()
+
+
+def structured_invoke(llm, schema, messages, cache=None, logger=None, agent_name="llm", key_messages=None):
+    """
+    `llm.with_structured_output(schema).invoke(messages)`, served from `cache`
+    when an identical request was answered before. `cache=None` bypasses it.
+    `key_messages` (default: `messages`) are what the cache key is built from.
+    """
+    if cache is None:
+        return llm.with_structured_output(schema).invoke(messages)
+
+    key = cache_key(llm, schema, key_messages or messages)
+    cached = cache.get(key)
+    if cached is not None:
+        try:
+            output = schema.model_validate_json(cached)
+            if logger:
+                logger.cache_lookup(agent_name, hit=True)
+            return output
+        except ValueError:
+            pass  # Stale entry from an older schema version; refresh it
+
+    if logger:
+        logger.cache_lookup(agent_name, hit=False)
+    output = llm.with_structured_output(schema).invoke(messages)
+    cache.put(key, output.model_dump_json())
+    return output
+
+
+async def astructured_invoke(llm, schema, messages, cache=None, logger=None, agent_name="llm", key_messages=None):
+    """Async structured_invoke: the LLM via ainvoke, the SQLite lookups off the event loop."""
+    if cache is None:
+        return await llm.with_structured_output(schema).ainvoke(messages)
+
+    key = cache_key(llm, schema, key_messages or messages)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        try:
+            output = schema.model_validate_json(cached)
+            if logger:
+                logger.cache_lookup(agent_name, hit=True)
+            return output
+        except ValueError:
+            pass
+
+    if logger:
+        logger.cache_lookup(agent_name, hit=False)
+    output = await llm.with_structured_output(schema).ainvoke(messages)
+    await asyncio.to_thread(cache.put, key, output.model_dump_json())
+    return output
@@ -0,0 +1,407 @@
+"""
+A sandbox on this machine with the surface of the E2B Sandbox the
+orchestrator uses, backed by a private working directory and one
+subprocess per call.
+
+The sandbox contract (what tools.py, utils.py and sandbox_pool.py rely on):
+- `run_code(code)` returns an execution with `logs.stdout` / `logs.stderr`
+  (lists of strings) and `error` (None, or `.name` / `.value`);
+- `files.write(path, data)` and `files.read(path, format="text"|"bytes"|"stream")`;
+- `commands.run(cmd, timeout=None)`;
+- `sandbox_id`, `set_timeout(seconds)` and `kill()`.
+Backends (E2BBackend, LocalBackend) create, reattach to, keep alive and
+kill sandboxes for the SandboxPool.
+
+There is no kernel: every `run_code` starts a fresh interpreter in the
+working directory, so variables do not survive between calls. The
+orchestrator's own scripts are self-contained; only ad-hoc Developer code
+that relies on an earlier cell's variables behaves differently than in E2B.
+
+Each call runs in its own process group under resource limits (address
+space, CPU time, file size; POSIX only) with API keys and tokens removed
+from the environment.
+
+Syncing with the local package does not go through archives. The default,
+sync="copy", copies the folders in and the changed files back, so the
+workspace is isolated: the package only changes when the sprint downloads
+its work, and fan-in conflict detection holds. Two opt-in modes trade
+that isolation for speed, for single-stage development runs only:
+sync="link" hardlinks the files, so in-place edits (write_files, snapshot
+restores) reach the package at once, even when the sprint fails;
+sync="none" symlinks the folders, so syncing is a no-op.
+"""
+import os
+import sys
+import json
+import shutil
+import signal
+import filecmp
+import asyncio
+import tempfile
+import subprocess
+
+import manifest
+import pytest_daemon
+
+DEFAULT_RUN_TIMEOUT = 600
+DEFAULT_MEMORY_MB = 8192
+DEFAULT_MAX_FILE_MB = 1024
+READ_CHUNK_SIZE = 1024 * 1024
+SYNC_MODES = ("copy", "link", "none")
+LOCAL_SANDBOX_ROOT = ".local_sandboxes"
+# Environment variables the sandboxed code does not get to see
+SECRET_MARKERS = ("KEY", "TOKEN", "SECRET", "PASSWORD")
+
+# Every sandboxed process starts with this: it lowers its own resource limits
+# (sys.argv[1]: {"RLIMIT_AS": bytes, ...}) before running anything else.
+LIMITS_PRELUDE = """
+import sys, json
+try:
+    import resource
+    for _name, _value in json.loads(sys.argv[1]).items():
+        _which = getattr(resource, _name)
+        _hard = resource.getrlimit(_which)[1]
+        _value = _value if _hard == resource.RLIM_INFINITY else min(_value, _hard)
+        resource.setrlimit(_which, (_value, _value))
+except ImportError:
+    pass  # Not POSIX: no limits
+"""
+
+# Runs the code read from stdin and reports an uncaught exception the way the
+# E2B interpreter does (name, value, traceback) after the regular traceback.
+RUNNER = LIMITS_PRELUDE + """
+import traceback
+_code = sys.stdin.read()
+try:
+    exec(compile(_code, "<sandbox>", "exec"), {"__name__": "__main__"})
+except SystemExit:
+    raise
+except BaseException as _e:
+    _tb = traceback.format_exc()
+    sys.stderr.write(_tb)
+    sys.stderr.write("LOCAL_ERROR_START" + json.dumps(
+        {"name": type(_e).__name__, "value": str(_e), "traceback": _tb}) + "LOCAL_ERROR_END")
+    sys.exit(1)
+"""
+
+# Runs a shell command (sys.argv[2]) under the limits
+COMMAND_LAUNCHER = LIMITS_PRELUDE + """
+import os
+os.execv("/bin/sh", ["/bin/sh", "-c", sys.argv[2]])
+"""
+
+
+class Logs:
+    def __init__(self, stdout, stderr):
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class ExecutionError:
+    def __init__(self, name: str, value: str, traceback: str = ""):
+        self.name = name
+        self.value = value
+        self.traceback = traceback
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class Execution:
+    """Result of `run_code`: `logs.stdout` / `logs.stderr` lists and `error`."""
+
+    def __init__(self, stdout: str, stderr: str, error: ExecutionError = None):
+        self.logs = Logs([stdout] if stdout else [], [stderr] if stderr else [])
+        self.error = error
+
+
+class CommandResult:
+    def __init__(self, stdout: str, stderr: str, exit_code: int):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+
+
+def _split_error(stderr):
+    """Separates the runner's error record from the rest of stderr."""
+    start = stderr.find("LOCAL_ERROR_START")
+    end = stderr.find("LOCAL_ERROR_END")
+    if start < 0 or end < 0:
+        return stderr, None
+    record = json.loads(stderr[start + len("LOCAL_ERROR_START"):end])
+    return stderr[:start], ExecutionError(record["name"], record["value"], record["traceback"])
+
+
+def _sandbox_env():
+    return {k: v for k, v in os.environ.items() if not any(m in k.upper() for m in SECRET_MARKERS)}
+
+
+def _place(src, dest, link):
+    if os.path.lexists(dest):
+        os.remove(dest)
+    if link:
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass  # Other filesystem, or no hardlink support
+    shutil.copy2(src, dest)
+
+
+def _walk_files(folder):
+    """Relative paths of the synced files under `folder` (same filter as manifest.py)."""
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = [d for d in dirnames if d not in manifest.SKIP_DIRS]
+        for name in filenames:
+            if not name.endswith(manifest.SKIP_SUFFIXES):
+                yield os.path.relpath(os.path.join(dirpath, name), folder)
+
+
+def _same_file(a, b):
+    return os.path.exists(a) and os.path.exists(b) and os.path.samefile(a, b)
+
+
+def _in_sync(a, b):
+    # Same inode, or same content (size and mtime first, bytes if those differ)
+    return _same_file(a, b) or (os.path.exists(b) and filecmp.cmp(a, b, shallow=True))
+
+
+class _Files:
+    def __init__(self, sandbox):
+        self._sandbox = sandbox
+
+    def write(self, path: str, data):
+        target = self._sandbox.path(path)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        mode = "w" if isinstance(data, str) else "wb"
+        with open(target, mode, **({"encoding": "utf-8"} if mode == "w" else {})) as f:
+            f.write(data)
+
+    def read(self, path: str, format: str = "text"):
+        target = self._sandbox.path(path)
+        if format == "text":
+            with open(target, "r", encoding="utf-8") as f:
+                return f.read()
+        if format == "bytes":
+            with open(target, "rb") as f:
+                return bytearray(f.read())
+        if format == "stream":
+            return self._stream(target)
+        raise ValueError(f"Unknown read format: {format}")
+
+    @staticmethod
+    def _stream(target):
+        with open(target, "rb") as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+                yield chunk
+
+
+class _Commands:
+    def __init__(self, sandbox):
+        self._sandbox = sandbox
+
+    def run(self, cmd: str, timeout: float = None, **kwargs):
+        # timeout=0 means "no limit", as in the E2B SDK
+        if os.name == "posix":
+            args = [self._sandbox.python, "-c", COMMAND_LAUNCHER, self._sandbox.limits(), cmd]
+        else:
+            args = cmd
+        exit_code, stdout, stderr = self._sandbox.execute(args, shell=os.name != "posix", timeout=timeout or None)
+        if exit_code is None:
+            return CommandResult(stdout, f"Command timed out after {timeout}s", -1)
+        return CommandResult(stdout, stderr, exit_code)
+
+
+class LocalSandbox:
+    """A private working directory plus a resource-limited subprocess per call."""
+
+    def __init__(self, workdir: str = None, root: str = None, python: str = sys.executable,
+                 run_timeout: float = DEFAULT_RUN_TIMEOUT, memory_mb: int = DEFAULT_MEMORY_MB,
+                 cpu_seconds: int = None, max_file_mb: int = DEFAULT_MAX_FILE_MB, sync: str = "copy"):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"Unknown sync mode: {sync}")
+        if root:
+            os.makedirs(root, exist_ok=True)
+        self.workdir = os.path.abspath(workdir) if workdir else tempfile.mkdtemp(prefix="local-", dir=root)
+        os.makedirs(self.workdir, exist_ok=True)
+        self.sandbox_id = os.path.basename(self.workdir)
+        self.python = python
+        self.run_timeout = run_timeout
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.max_file_mb = max_file_mb
+        self.sync = sync
+        self.files = _Files(self)
+        self.commands = _Commands(self)
+
+    def path(self, path: str) -> str:
+        """Sandbox path (relative to the working directory) to a local path."""
+        return os.path.join(self.workdir, path)
+
+    def limits(self) -> str:
+        """The resource limits as the JSON argument of LIMITS_PRELUDE."""
+        limits = {}
+        if self.memory_mb:
+            limits["RLIMIT_AS"] = self.memory_mb * 1024 * 1024
+        if self.cpu_seconds:
+            limits["RLIMIT_CPU"] = self.cpu_seconds
+        if self.max_file_mb:
+            limits["RLIMIT_FSIZE"] = self.max_file_mb * 1024 * 1024
+        return json.dumps(limits)
+
+    def execute(self, args, stdin: str = None, timeout: float = None, shell: bool = False):
+        """
+        Runs one process in the working directory. Returns (exit_code, stdout,
+        stderr); exit_code is None when the process group was killed on timeout.
+        """
+        posix = os.name == "posix"
+        proc = subprocess.Popen(
+            args, shell=shell, cwd=self.workdir, env=_sandbox_env(),
+            stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace",
+            start_new_session=posix,
+        )
+        try:
+            stdout, stderr = proc.communicate(stdin, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Also kills whatever the code started (pytest workers, shells)
+            if posix:
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            stdout, stderr = proc.communicate()
+            return None, stdout, stderr
+        return proc.returncode, stdout, stderr
+
+    def run_code(self, code: str, timeout: float = None, **kwargs) -> Execution:
+        timeout = timeout or self.run_timeout
+        exit_code, stdout, stderr = self.execute([self.python, "-c", RUNNER, self.limits()], stdin=code, timeout=timeout)
+        if exit_code is None:
+            return Execution(stdout, stderr, ExecutionError("TimeoutError", f"Execution exceeded {timeout}s"))
+        stderr, error = _split_error(stderr)
+        if error is None and exit_code < 0:
+            # Killed by a signal, e.g. SIGXCPU once the CPU limit is spent
+            error = ExecutionError("Killed", f"Process terminated by signal {-exit_code}")
+        return Execution(stdout, stderr, error)
+
+    # --- Sync with the local package ---
+
+    def sync_in(self, roots):
+        """
+        Makes the sandbox folders match the local ones ({folder: local_dir}).
+        Returns (changed, deleted) as manifest keys ("src/x.py").
+        """
+        changed, deleted = [], []
+        for folder, local_dir in roots.items():
+            target = self.path(folder)
+            if self.sync == "none":
+                if not (os.path.islink(target) and _same_file(target, local_dir)):
+                    if os.path.islink(target) or os.path.isfile(target):
+                        os.remove(target)
+                    shutil.rmtree(target, ignore_errors=True)
+                    os.makedirs(local_dir, exist_ok=True)
+                    os.symlink(os.path.abspath(local_dir), target, target_is_directory=True)
+                continue
+
+            if os.path.islink(target):
+                os.remove(target)
+            wanted = set(_walk_files(local_dir)) if os.path.isdir(local_dir) else set()
+            for rel in sorted(wanted):
+                src, dest = os.path.join(local_dir, rel), os.path.join(target, rel)
+                if _in_sync(src, dest):
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                _place(src, dest, self.sync == "link")
+                changed.append(f"{folder}/{rel.replace(os.sep, '/')}")
+            for rel in sorted(set(_walk_files(target)) - wanted):
+                os.remove(os.path.join(target, rel))
+                deleted.append(f"{folder}/{rel.replace(os.sep, '/')}")
+        return changed, deleted
+
+    def sync_out(self, roots):
+        """Brings back every sandbox file that differs from the local one; returns their keys."""
+        copied = []
+        if self.sync == "none":
+            return copied
+        for folder, local_dir in roots.items():
+            source = self.path(folder)
+            for rel in sorted(_walk_files(source)):
+                src, dest = os.path.join(source, rel), os.path.join(local_dir, rel)
+                if _in_sync(src, dest):
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                _place(src, dest, self.sync == "link")
+                copied.append(f"{folder}/{rel.replace(os.sep, '/')}")
+        return copied
+
+    def set_timeout(self, timeout: int):
+        pass  # Nothing expires locally
+
+    def kill(self):
+        # The warm pytest worker runs in its own session, outside the call's process group
+        pytest_daemon.stop_daemon(self.path(pytest_daemon.DAEMON_PID))
+        # Symlinked folders (sync="none") point at the local package: unlink, never delete through them
+        for name in os.listdir(self.workdir) if os.path.isdir(self.workdir) else []:
+            path = self.path(name)
+            if os.path.islink(path):
+                os.remove(path)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class _AsyncNamespace:
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        method = getattr(self._target, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+
+class AsyncLocalSandbox:
+    """The AsyncSandbox surface over a LocalSandbox: every call runs on a worker thread."""
+
+    def __init__(self, sandbox: LocalSandbox):
+        self.sandbox = sandbox
+        self.sandbox_id = sandbox.sandbox_id
+        self.files = _AsyncNamespace(sandbox.files)
+        self.commands = _AsyncNamespace(sandbox.commands)
+
+    async def run_code(self, code: str, **kwargs):
+        return await asyncio.to_thread(self.sandbox.run_code, code, **kwargs)
+
+    def __getattr__(self, name):
+        # sync_in / sync_out, path, workdir...
+        return getattr(self.sandbox, name)
+
+
+class LocalBackend:
+    """Creates and reattaches to LocalSandboxes under `root` (drop-in for E2BBackend)."""
+
+    def __init__(self, root: str = LOCAL_SANDBOX_ROOT, **sandbox_options):
+        self.root = root
+        self.sandbox_options = sandbox_options
+
+    def create(self):
+        return LocalSandbox(root=self.root, **self.sandbox_options)
+
+    def connect(self, sandbox_id: str):
+        workdir = os.path.join(self.root, sandbox_id)
+        if not os.path.isdir(workdir):
+            raise ValueError(f"No local sandbox {sandbox_id} under {self.root}")
+        return LocalSandbox(workdir, **self.sandbox_options)
+
+    async def aconnect(self, sandbox_id: str):
+        return AsyncLocalSandbox(self.connect(sandbox_id))
+
+    def keep_alive(self, sandbox):
+        pass
+
+    def restart_kernel(self, sandbox) -> bool:
+        # Every run_code call is a fresh interpreter: there is no kernel to restart
+        return True
+
+    def kill(self, sandbox):
+        sandbox.kill()
@@ -1,7 +1,111 @@
 import logging
+import logging.handlers
 import os
+import json
+import queue
+import atexit
+import math
+import time
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from langchain_core.callbacks import BaseCallbackHandler
+
+# The node span a piece of work runs under, for attributing LLM tokens
+_CURRENT_NODE = contextvars.ContextVar("sprint_node", default=None)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+# --- Queued (non-blocking) writing ---
+DEFAULT_MAX_LOG_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+LOG_BATCH_SIZE = 256
+
+
+class _Truncated:
+    """Single-line, truncated text; only built if a handler formats the record."""
+
+    def __init__(self, text: str, limit: int):
+        self.text = text
+        self.limit = limit
+
+    def __str__(self):
+        summary = self.text[:self.limit].replace('\n', ' ').strip()
+        return summary + "..." if len(self.text) > self.limit else summary
+
+
+class _JsonLine:
+    def __init__(self, record: dict):
+        self.record = record
+
+    def __str__(self):
+        return json.dumps(self.record, default=str)
+
+
+class _DeferredFlush:
+    """File handler mixin: the writer thread flushes once per batch, not per record."""
+
+    def flush(self):
+        pass
+
+    def flush_now(self):
+        super().flush()
+
+
+class _SizeRotatingHandler(_DeferredFlush, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _TimeRotatingHandler(_DeferredFlush, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are; formatting happens on the writer thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class _BatchingListener(logging.handlers.QueueListener):
+    """Drains the queue in batches and flushes the files once per batch."""
+
+    def _monitor(self):
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.flush_now()
+            if stop:
+                return
+
+
+class _TelemetryFilter(logging.Filter):
+    def __init__(self, telemetry: bool):
+        super().__init__()
+        self.telemetry = telemetry
+
+    def filter(self, record):
+        return getattr(record, "telemetry", False) == self.telemetry
 
 class SprintLogger:
     """
@@ -9,7 +113,9 @@ class SprintLogger:
     Logs to both console and file with timestamps.
     """
     
-    def __init__(self, stage: str, log_dir: str = None):
+    def __init__(self, stage: str, log_dir: str = None, token_prices=None, queued: bool = False,
+                 max_bytes: int = DEFAULT_MAX_LOG_BYTES, rotate_when: str = None,
+                 backup_count: int = DEFAULT_BACKUP_COUNT):
         self.stage = stage
         # Use absolute path based on script location if log_dir not provided
         if log_dir is None:
@@ -21,6 +127,8 @@ class SprintLogger:
         # Create log file with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         self.log_file = self.log_dir / f"{timestamp}_{stage}_sprint.log"
+        # Structured telemetry next to the human-readable log (created on first event)
+        self.events_file = self.log_dir / f"{timestamp}_{stage}_sprint.events.jsonl"
         
         # Set up logger
         self.logger = logging.getLogger(f"sprint_{stage}")
@@ -28,16 +136,52 @@ class SprintLogger:
         
         # Clear existing handlers
         self.logger.handlers.clear()
-        
-        # File handler
-        fh = logging.FileHandler(self.log_file, encoding='utf-8')
-        fh.setLevel(logging.INFO)
+        # Queued: root handlers would format and write on the agent thread again
+        self.logger.propagate = not queued
         
         # Formatter with timestamp
         formatter = logging.Formatter('%(asctime)s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-        fh.setFormatter(formatter)
-        
-        self.logger.addHandler(fh)
+
+        self._listener = None
+        if queued:
+            # Agent threads only enqueue; a background thread formats, writes in
+            # batches and rotates (by size, or by time with rotate_when="H"/"midnight"/...).
+            # Telemetry events go through the same writer into the JSONL file.
+            if rotate_when:
+                fh = _TimeRotatingHandler(self.log_file, when=rotate_when, backupCount=backup_count, encoding='utf-8')
+                eh = _TimeRotatingHandler(self.events_file, when=rotate_when, backupCount=backup_count,
+                                          encoding='utf-8', delay=True)
+            else:
+                fh = _SizeRotatingHandler(self.log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+                eh = _SizeRotatingHandler(self.events_file, maxBytes=max_bytes, backupCount=backup_count,
+                                          encoding='utf-8', delay=True)
+            fh.setFormatter(formatter)
+            fh.addFilter(_TelemetryFilter(False))
+            eh.setFormatter(logging.Formatter('%(message)s'))
+            eh.addFilter(_TelemetryFilter(True))
+            log_queue = queue.SimpleQueue()
+            self._listener = _BatchingListener(log_queue, fh, eh)
+            self._listener.start()
+            self.logger.addHandler(_DeferredQueueHandler(log_queue))
+            # Shutdown flush hook: nothing queued is lost when the process exits
+            atexit.register(self.close)
+        else:
+            # File handler
+            fh = logging.FileHandler(self.log_file, encoding='utf-8')
+            fh.setLevel(logging.INFO)
+            fh.setFormatter(formatter)
+            self.logger.addHandler(fh)
+
+        # LLM response cache counters, reported at sprint end
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Telemetry: span durations (ms) by "kind:name", LLM tokens by node.
+        # token_prices = (USD per 1M input tokens, USD per 1M output tokens)
+        self.token_prices = token_prices
+        self.spans = {}
+        self.tokens = {}
+        self._events_lock = threading.Lock()
     
     def sprint_start(self):
         """Log sprint initialization"""
@@ -45,7 +189,102 @@ class SprintLogger:
     
     def sprint_end(self, status: str = "COMPLETE"):
         """Log sprint completion"""
+        if self.cache_hits or self.cache_misses:
+            self.logger.info(f"💾 LLM CACHE: {self.cache_hits} hits, {self.cache_misses} misses")
+        self.telemetry_summary()
+        self.event("sprint_end", status=status)
         self.logger.info(f"✅ SPRINT END: {status}")
+
+    # --- Telemetry ---
+
+    def event(self, event_type: str, **fields):
+        """Appends one JSON event to the events stream"""
+        if event_type == "sprint_end" and not (self.spans or self.tokens):
+            return  # No telemetry was recorded; keep the log dir tidy
+        record = {"ts": round(time.time(), 3), "stage": self.stage, "event": event_type, **fields}
+        if self._listener is not None:
+            self.logger.info("%s", _JsonLine(record), extra={"telemetry": True})
+            return
+        with self._events_lock:
+            with open(self.events_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def record_span(self, kind: str, name: str, duration_ms: float, status: str = "ok", **fields):
+        with self._events_lock:
+            self.spans.setdefault(f"{kind}:{name}", []).append(duration_ms)
+        self.event("span", kind=kind, name=name, duration_ms=round(duration_ms, 1), status=status, **fields)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "node", **fields):
+        """Times the enclosed block as one span; LLM calls inside a node span are attributed to it"""
+        token = _CURRENT_NODE.set(name) if kind == "node" else None
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if token is not None:
+                _CURRENT_NODE.reset(token)
+            self.record_span(kind, name, (time.perf_counter() - start) * 1000, status, **fields)
+
+    def traced(self, name: str, func, kind: str = "node"):
+        """`func` (sync or async) wrapped in a span"""
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def traced_async(*args, **kwargs):
+                with self.span(name, kind):
+                    return await func(*args, **kwargs)
+            return traced_async
+
+        @functools.wraps(func)
+        def traced_sync(*args, **kwargs):
+            with self.span(name, kind):
+                return func(*args, **kwargs)
+        return traced_sync
+
+    def llm_usage(self, input_tokens: int, output_tokens: int, duration_ms: float = None, node: str = None):
+        """Record the token usage (and latency) of one LLM call"""
+        node = node or _CURRENT_NODE.get() or "llm"
+        with self._events_lock:
+            totals = self.tokens.setdefault(node, [0, 0, 0])
+            totals[0] += input_tokens
+            totals[1] += output_tokens
+            totals[2] += 1
+        if duration_ms is not None:
+            self.record_span("llm", node, duration_ms, input_tokens=input_tokens, output_tokens=output_tokens)
+        else:
+            self.event("llm", name=node, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def callback(self):
+        """LangChain callback handler feeding llm_usage; pass via the chat model's `callbacks`"""
+        return TokenUsageCallback(self)
+
+    def telemetry_summary(self):
+        """Log p50/p95 per span and the token totals"""
+        if self.spans:
+            self.logger.info(f"⏱️ TELEMETRY {'span':<28} {'count':>5} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9}")
+            for key in sorted(self.spans, key=lambda k: -sum(self.spans[k])):
+                values = self.spans[key]
+                self.logger.info(f"├─ {key:<36} {len(values):>5} {percentile(values, 0.5):>10.1f} "
+                                 f"{percentile(values, 0.95):>10.1f} {sum(values) / 1000:>9.2f}")
+        if self.tokens:
+            total_in = sum(t[0] for t in self.tokens.values())
+            total_out = sum(t[1] for t in self.tokens.values())
+            for node, (tokens_in, tokens_out, calls) in sorted(self.tokens.items()):
+                self.logger.info(f"├─ 🔢 {node}: {calls} LLM calls, {tokens_in} in / {tokens_out} out tokens")
+            cost = ""
+            if self.token_prices:
+                usd = (total_in * self.token_prices[0] + total_out * self.token_prices[1]) / 1_000_000
+                cost = f" (≈ ${usd:.4f})"
+            self.logger.info(f"└─ 🔢 LLM TOKENS: {total_in} in / {total_out} out{cost}")
+        if self.spans or self.tokens:
+            self.event("summary", spans={k: {"count": len(v), "p50_ms": round(percentile(v, 0.5), 1),
+                                             "p95_ms": round(percentile(v, 0.95), 1)}
+                                         for k, v in self.spans.items()},
+                       tokens={k: {"input": v[0], "output": v[1], "calls": v[2]} for k, v in self.tokens.items()})
     
     def agent_start(self, agent_name: str):
         """Log agent starting"""
@@ -60,11 +299,8 @@ class SprintLogger:
     
     def reasoning(self, agent_name: str, reasoning_text: str):
         """Log agent's reasoning/strategy"""
-        # Take first 200 chars to keep it concise
-        summary = reasoning_text[:200].replace('\n', ' ').strip()
-        if len(reasoning_text) > 200:
-            summary += "..."
-        self.logger.info(f"💭 [{agent_name}] {summary}")
+        # Take first 200 chars to keep it concise (built only when written)
+        self.logger.info("💭 [%s] %s", agent_name, _Truncated(reasoning_text, 200))
     
     def iteration_summary(self, iteration: int, agent: str, files_modified: int, status: str):
         """Log iteration summary"""
@@ -74,28 +310,21 @@ class SprintLogger:
     
     def reviewer_feedback(self, summary: str, failures: list, priority_instructions: str):
         """Log structured reviewer feedback"""
-        self.logger.info(f"❌ REVIEWER FEEDBACK")
-        self.logger.info(f"├─ Summary: {summary}")
+        self.logger.info("❌ REVIEWER FEEDBACK")
+        self.logger.info("├─ Summary: %s", summary)
         
         if failures:
-            for i, failure in enumerate(failures, 1):
-                file_path = failure.get('file_path', 'Unknown')
-                failure_type = failure.get('failure_type', 'Unknown')
-                root_cause = failure.get('root_cause', 'Unknown')
-                actionable_fix = failure.get('actionable_fix', 'No fix provided')
-                
-                self.logger.info(f"├─ [{failure_type}] {file_path}: {root_cause}")
-                self.logger.info(f"│  └─ Fix: {actionable_fix}")
+            for failure in failures:
+                self.logger.info("├─ [%s] %s: %s", failure.get('failure_type', 'Unknown'),
+                                 failure.get('file_path', 'Unknown'), failure.get('root_cause', 'Unknown'))
+                self.logger.info("│  └─ Fix: %s", failure.get('actionable_fix', 'No fix provided'))
         
         if priority_instructions:
-            self.logger.info(f"└─ Priority: {priority_instructions}")
+            self.logger.info("└─ Priority: %s", priority_instructions)
     
     def human_instruction(self, instruction: str):
         """Log human intervention"""
-        summary = instruction[:150].replace('\n', ' ').strip()
-        if len(instruction) > 150:
-            summary += "..."
-        self.logger.info(f"🛠️  HUMAN INSTRUCTION: {summary}")
+        self.logger.info("🛠️  HUMAN INSTRUCTION: %s", _Truncated(instruction, 150))
     
     def tool_execution(self, tool_name: str, status: str, details: str = ""):
         """Log tool execution"""
@@ -104,6 +333,26 @@ class SprintLogger:
         else:
             self.logger.info(f"🔧 Tool: {tool_name} | Status: {status}")
     
+    def test_results(self, results: dict):
+        """Log structured pytest results (counts plus failing tests)"""
+        counts = results.get("summary", {})
+        self.logger.info(
+            f"🧪 TESTS: {counts.get('passed', 0)} passed, {counts.get('failed', 0)} failed, "
+            f"{counts.get('error', 0)} errors, {counts.get('skipped', 0)} skipped "
+            f"in {counts.get('duration', 0):.2f}s (exit code {results.get('exit_code')})"
+        )
+        for test in results.get("tests", []):
+            if test.get("outcome") in ("failed", "error"):
+                self.logger.info(f"├─ [{test['outcome'].upper()}] {test['nodeid']} ({test.get('duration', 0):.2f}s)")
+    
+    def cache_lookup(self, agent_name: str, hit: bool):
+        """Log an LLM response cache lookup"""
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        self.logger.info(f"💾 [{agent_name}] LLM cache {'HIT' if hit else 'MISS'}")
+    
     def error(self, message: str):
         """Log error"""
         self.logger.error(f"⚠️  ERROR: {message}")
@@ -112,6 +361,50 @@ class SprintLogger:
         """Log general info"""
         self.logger.info(message)
     
+    def close(self):
+        """Flush everything still queued and release the log files (safe to call twice)"""
+        if self._listener is not None:
+            atexit.unregister(self.close)
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+        for handler in list(self.logger.handlers):
+            handler.close()
+            self.logger.removeHandler(handler)
+
     def get_log_file(self) -> str:
         """Return the path to the log file"""
         return str(self.log_file)
+
+    def get_events_file(self) -> str:
+        """Return the path to the JSONL telemetry stream"""
+        return str(self.events_file)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Reports latency and token usage of every chat model call to a SprintLogger."""
+
+    def __init__(self, sprint_logger: SprintLogger):
+        self.sprint_logger = sprint_logger
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), _CURRENT_NODE.get())
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), _CURRENT_NODE.get())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start, node = self._starts.pop(run_id, (None, None))
+        tokens_in = tokens_out = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                tokens_in += usage.get("input_tokens", 0)
+                tokens_out += usage.get("output_tokens", 0)
+        duration = (time.perf_counter() - start) * 1000 if start is not None else None
+        self.sprint_logger.llm_usage(tokens_in, tokens_out, duration, node)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
@@ -1,19 +1,34 @@
 import os
+import asyncio
+import sqlite3
 import argparse
 import shutil
 from dotenv import load_dotenv
-from e2b_code_interpreter import Sandbox
+from langgraph.checkpoint.sqlite import SqliteSaver
 
 # Core Logic Imports
-from tools import create_tools
+from tools import create_tools, create_async_tools
 from agents import (
     architect_node, tester_node, developer_node, 
-    test_runner_node, reviewer_node, human_node
+    test_runner_node, reviewer_node, human_node,
+    aarchitect_node, atester_node, adeveloper_node,
+    atest_runner_node, areviewer_node, speculative_developer_node
 )
 from workflow import run_workflow
-from state import AgentState
-from utils import upload_package_to_sandbox, download_package_from_sandbox
+from state import new_sprint_state
+from utils import upload_package_to_sandbox, download_package_from_sandbox, download_changes_from_sandbox
 from logger import SprintLogger
+from sandbox_pool import SandboxPool, E2BBackend, LazySandbox, ShardSandboxes
+from local_sandbox import LocalBackend, LOCAL_SANDBOX_ROOT, DEFAULT_MEMORY_MB, SYNC_MODES
+from survey import survey_codebase, DEFAULT_TOKEN_BUDGET
+from context_budget import DEFAULT_CONTEXT_BUDGET
+from llm_cache import ResponseCache, LLM_CACHE_FILE
+from tool_executor import DEFAULT_TOOL_CONCURRENCY
+from speculative import DEFAULT_CANDIDATES
+from autopilot import Autopilot, DEFAULT_MAX_ITERATIONS
+from replay import Recorder, RecordingLLM, RecordingSandbox, RecordingHuman, RecordingSurvey, RECORDING_FORMAT
+from session import (CHECKPOINT_DB, load_session, save_session, clear_session,
+                     new_thread_id, rebuilt_state_update, retire_session, workspace_files)
 
 # Prompt Imports
 from prompts import SPRINT_PROMPTS 
@@ -23,82 +38,274 @@ load_dotenv()
 
 ORCHESTRATOR_ROOT = "." 
 PACKAGE_ROOT = "../football_quant_base"
+POOL_STATE_FILE = ".sandbox_pool.json"
+LOCAL_POOL_STATE_FILE = ".sandbox_pool.local.json"
+# One per stage: scheduled stages survey concurrently
+SURVEY_CACHE_FILE = ".survey_cache.{stage}.json"
 
-def main(stage: str):
+def create_pool(backend: str = "e2b", size: int = 1, logger=None, local_sync: str = "copy",
+                local_memory_mb: int = DEFAULT_MEMORY_MB, local_cpu_seconds: int = None):
+    """
+    The sandbox pool for `backend`: "e2b" (remote sandboxes with the
+    scientific stack installed) or "local" (processes on this machine, using
+    the local interpreter's packages; nothing to install or warm up).
+    """
+    if backend == "e2b":
+        return SandboxPool(E2BBackend(timeout=3600), size=size, state_path=POOL_STATE_FILE, logger=logger)
+    if backend == "local":
+        local = LocalBackend(os.path.join(ORCHESTRATOR_ROOT, LOCAL_SANDBOX_ROOT), sync=local_sync,
+                             memory_mb=local_memory_mb, cpu_seconds=local_cpu_seconds)
+        return SandboxPool(local, size=size, install_cmd=None, warmup_code=None,
+                           state_path=LOCAL_POOL_STATE_FILE, logger=logger)
+    raise ValueError(f"Unknown sandbox backend: {backend}")
+
+def main(stage: str, pool_size: int = 1, pipelined: bool = False,
+         survey_budget: int = DEFAULT_TOKEN_BUDGET, impact_tests: bool = False,
+         shard_workers: int = 1, shard_sandboxes: int = 0, test_daemon: bool = False,
+         context_budget: int = DEFAULT_CONTEXT_BUDGET, llm_cache: bool = True, resume: bool = False,
+         tool_concurrency: int = DEFAULT_TOOL_CONCURRENCY, async_graph: bool = False,
+         pool: SandboxPool = None, rate_limiter=None, console_lock=None, fan_in: bool = False,
+         candidates: int = DEFAULT_CANDIDATES, snapshots: bool = False, auto_rollback: bool = False,
+         autopilot: Autopilot = None, token_prices=None, queued_logs: bool = False,
+         record: str = None, backend: str = "e2b", local_sync: str = "copy",
+         local_memory_mb: int = DEFAULT_MEMORY_MB, local_cpu_seconds: int = None):
+    """
+    Runs one sprint stage end to end and returns True when it completed.
+
+    The scheduler (scheduler.py) runs several stages at once through the
+    last four arguments: a shared sandbox `pool`, one LLM `rate_limiter` for
+    every stage, a `console_lock` that serialises human prompts (and skips the
+    close prompt), and `fan_in`, which merges back only the files this stage
+    changed so concurrent stages do not overwrite each other's work.
+    With an `autopilot` the sprint runs headless: no prompt ever blocks.
+    With `record` every LLM call, primary-sandbox call and human decision is
+    written to that file for an offline replay (replay.py).
+    `backend="local"` runs the sandboxes as local processes (see create_pool).
+    """
     # 1. Validation & Prompt Loading
     if stage not in SPRINT_PROMPTS:
         print(f"❌ Error: Stage '{stage}' not found.")
-        return
+        return False
+
+    # 1.2 Checkpointing: the graph state is saved after every node
+    session = load_session(stage) if resume else None
+    if resume and not session:
+        print(f"❌ Error: No unfinished '{stage}' sprint to resume.")
+        return False
+    thread_id = session["thread_id"] if session else new_thread_id(stage)
+    config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 100}
+    conn = sqlite3.connect(os.path.join(ORCHESTRATOR_ROOT, CHECKPOINT_DB), check_same_thread=False)
+    memory = SqliteSaver(conn)
 
-    print(f"🚀 Initialising FRESH Sprint Stage: {stage.upper()}")
+    checkpoint = memory.get_tuple(config) if resume else None
+    if resume and not checkpoint:
+        print(f"❌ Error: No checkpoint found for thread '{thread_id}'.")
+        conn.close()
+        return False
+
+    if resume:
+        print(f"⏯️ Resuming Sprint Stage: {stage.upper()} (thread {thread_id})")
+    else:
+        print(f"🚀 Initialising FRESH Sprint Stage: {stage.upper()}")
     
     # 1.5 Initialize Logger
-    logger = SprintLogger(stage)
+    # Concurrent (scheduled) sprints write their logs from a background thread
+    logger = SprintLogger(stage, token_prices=token_prices, queued=queued_logs or console_lock is not None)
     logger.sprint_start()
 
     # 2. Infrastructure: Sandbox & LLM
-    sandbox = Sandbox.create(timeout=3600)
-    install_cmd = (
-        "pip install --quiet "
-        "numpy==1.26.4 "       # The most stable 'LTS' version of NumPy 1.x
-        "pandas>=2.2.0 "
-        "xarray>=2024.1.0 "
-        "pymc>=5.16.2 "
-        "arviz>=0.18.0 "
-        "pytensor>=2.22.1"
+    # Lease a sandbox with the scientific stack already installed and warmed
+    if pool is None:
+        pool = create_pool(backend, pool_size, logger, local_sync, local_memory_mb, local_cpu_seconds)
+    if not resume:
+        # A fresh run replaces any unfinished sprint; recycle the sandbox it kept for --resume
+        retired = retire_session(stage, pool)
+        if retired:
+            print(f"♻️ Discarded unfinished sprint; sandbox {retired} returned to the pool")
+    shards = None
+    spares = None
+    baseline = None
+
+    def lease_extras(sandbox):
+        nonlocal shards, spares
+        if shard_sandboxes > 0:
+            # Extra sandboxes for cross-sandbox test shards
+            shards = ShardSandboxes(pool, sandbox, shard_sandboxes).acquire()
+        if candidates > 1:
+            # One sandbox per speculative Developer candidate beyond the primary
+            spares = ShardSandboxes(pool, sandbox, candidates - 1).acquire()
+
+    def provision():
+        nonlocal baseline
+        sandbox = pool.acquire()
+        lease_extras(sandbox)
+        # --- SYNC UP ---
+        # Put your local 'src' and 'configs' into the sandbox
+        baseline = upload_package_to_sandbox(sandbox, PACKAGE_ROOT, ORCHESTRATOR_ROOT)["manifest"]
+        save_session(stage, thread_id=thread_id, sandbox_id=getattr(sandbox, "sandbox_id", None))
+        return sandbox
+
+    def reattach():
+        """The crashed sprint's sandbox if it is still alive, else None."""
+        try:
+            sandbox = pool.backend.connect(session["sandbox_id"])
+        except Exception:
+            return None
+        return sandbox if pool.health_check(sandbox) else None
+
+    # The Architect surveys the local tree, which is what gets uploaded anyway;
+    # the survey's hash cache therefore lives locally in every mode.
+    survey = lambda: survey_codebase(
+        {
+            "src": os.path.join(PACKAGE_ROOT, "src"),
+            "configs": os.path.join(ORCHESTRATOR_ROOT, "configs"),
+        },
+        stage=stage,
+        cache_path=os.path.join(ORCHESTRATOR_ROOT, SURVEY_CACHE_FILE.format(stage=stage)),
+        token_budget=survey_budget,
     )
-    sandbox.commands.run(install_cmd)
-    
-    # --- SYNC UP ---
-    # Put your local 'src' and 'configs' into the empty sandbox
-    upload_package_to_sandbox(sandbox, PACKAGE_ROOT, ORCHESTRATOR_ROOT)
+
+    rebuild = False
+    if resume:
+        sandbox = reattach()
+        if sandbox is not None:
+            print(f"♻️ Reattached to sandbox {session['sandbox_id']}")
+            lease_extras(sandbox)
+        else:
+            # Expired: start from a warm one and replay the checkpointed workspace
+            print("♻️ Sandbox expired; rebuilding it from the checkpoint...")
+            sandbox = provision()
+            rebuild = True
+    elif pipelined:
+        # Provision in the background; nodes block on first sandbox use
+        sandbox = LazySandbox(provision)
+    else:
+        sandbox = provision()
     
-    tools = create_tools(sandbox)
+    # Auto-rollback needs the snapshots it rolls back to
+    snapshots = snapshots or auto_rollback
+
+    recorder = Recorder(record) if record else None
+    if recorder:
+        recorder.record("sprint", format=RECORDING_FORMAT, stage=stage, package_root=PACKAGE_ROOT,
+                        orchestrator_root=ORCHESTRATOR_ROOT, candidates=candidates, options={
+                            "survey_budget": survey_budget, "context_budget": context_budget,
+                            "impact_tests": impact_tests, "shard_workers": shard_workers,
+                            "test_daemon": test_daemon, "tool_concurrency": tool_concurrency,
+                            "snapshots": snapshots, "auto_rollback": auto_rollback})
+        print(f"⏺️ Recording this sprint to {record}")
+        human_source = RecordingHuman(recorder, autopilot)
+        # Replay feeds the recorded text back to the Architect
+        survey = RecordingSurvey(survey, recorder)
+    else:
+        human_source = autopilot
+
+    tools = create_tools(RecordingSandbox(sandbox, recorder) if recorder else sandbox)
+
+    if rebuild:
+        files = workspace_files(checkpoint.checkpoint.get("channel_values", {}))
+        if files:
+            tools["write_files"].invoke({"files": files})
+        print(f"♻️ Replayed {len(files)} files from the checkpoint.")
 
     llm = ChatGoogleGenerativeAI(
         model="gemini-3-flash-preview", 
         google_api_key=os.getenv("GOOGLE_API_KEY"),
         temperature=0,
-        timeout=30
+        timeout=30,
+        rate_limiter=rate_limiter,
+        # Per-call latency and token counts for the telemetry stream
+        callbacks=[logger.callback()]
     )
+    if recorder:
+        llm = RecordingLLM(llm, recorder)
 
     stage_prompts = SPRINT_PROMPTS[stage]
 
+    # Identical structured requests (re-runs, resumed sprints) are answered from disk.
+    # A recording needs every response, so it bypasses the cache.
+    cache = ResponseCache(os.path.join(ORCHESTRATOR_ROOT, LLM_CACHE_FILE)) if llm_cache and not recorder else None
+
     # 3. Node Wrappers (pass logger to each agent)
-    architect_wrapper = lambda state: architect_node(state, llm, stage_prompts["ARCHITECT_SYSTEM_PROMPT"], tools, logger)
-    tester_wrapper = lambda state: tester_node(state, llm, stage_prompts["TESTER_SYSTEM_PROMPT"], tools, logger)
-    developer_wrapper = lambda state: developer_node(state, llm, stage_prompts["DEVELOPER_SYSTEM_PROMPT"], tools, logger)
-    test_runner_wrapper = lambda state: test_runner_node(state, llm,stage_prompts["TEST_RUNNER_SYSTEM_PROMPT"], tools, logger)
-    reviewer_wrapper = lambda state: reviewer_node(state, llm, stage_prompts["REVIEWER_SYSTEM_PROMPT"], tools, logger)
-    human_wrapper = lambda state: human_node(state, logger)
-
-    # 4. Compile Workflow (Notice: No checkpointer/memory passed here)
+    architect_wrapper = lambda state: architect_node(state, llm, stage_prompts["ARCHITECT_SYSTEM_PROMPT"], tools, logger, survey, survey_budget, cache)
+    tester_wrapper = lambda state: tester_node(state, llm, stage_prompts["TESTER_SYSTEM_PROMPT"], tools, logger, cache)
+    if candidates > 1:
+        developer_wrapper = lambda state: speculative_developer_node(state, llm, stage_prompts["DEVELOPER_SYSTEM_PROMPT"], tools, logger, context_budget,
+                                                                     spares=spares, make_tools=create_tools, impact_analysis=impact_tests,
+                                                                     tool_concurrency=tool_concurrency,
+                                                                     snapshots=snapshots, auto_rollback=auto_rollback)
+    else:
+        developer_wrapper = lambda state: developer_node(state, llm, stage_prompts["DEVELOPER_SYSTEM_PROMPT"], tools, logger, context_budget)
+    test_runner_wrapper = lambda state: test_runner_node(state, llm,stage_prompts["TEST_RUNNER_SYSTEM_PROMPT"], tools, logger, impact_tests,
+                                                         shard_workers=shard_workers, shard_sandboxes=shards,
+                                                         use_daemon=test_daemon, snapshots=snapshots,
+                                                         auto_rollback=auto_rollback)
+    reviewer_wrapper = lambda state: reviewer_node(state, llm, stage_prompts["REVIEWER_SYSTEM_PROMPT"], tools, logger, cache)
+
+    def human_wrapper(state):
+        if console_lock is None:
+            return human_node(state, logger, tools, human_source)
+        # Concurrent stages take turns at the terminal
+        with console_lock:
+            print(f"\n🧭 STAGE: {stage.upper()}")
+            return human_node(state, logger, tools, human_source)
+
+    # 4. Compile Workflow (checkpointed after every node, each node timed as a span)
+    node_names = ("architect", "tester", "developer", "test_runner", "reviewer", "human_instructor")
     app = run_workflow(
-        architect_wrapper, tester_wrapper, developer_wrapper,
-        test_runner_wrapper, reviewer_wrapper, human_wrapper, tools
+        *[logger.traced(name, node) for name, node in zip(node_names, (
+            architect_wrapper, tester_wrapper, developer_wrapper,
+            test_runner_wrapper, reviewer_wrapper, human_wrapper))],
+        tools, checkpointer=memory, tool_concurrency=tool_concurrency, logger=logger
     )
+    if rebuild:
+        # The checkpointed snapshot records belong to the expired sandbox
+        app.update_state(config, rebuilt_state_update())
     
     #app = workflow.compile() 
 
+    async def run_async(inputs):
+        """The same sprint on the event loop: async sandbox client and LLM calls."""
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        live = await asyncio.to_thread(sandbox.wait) if isinstance(sandbox, LazySandbox) else sandbox
+        asandbox = await pool.backend.aconnect(live.sandbox_id)
+        atools = create_async_tools(RecordingSandbox(asandbox, recorder) if recorder else asandbox)
+
+        async def architect(state):
+            return await aarchitect_node(state, llm, stage_prompts["ARCHITECT_SYSTEM_PROMPT"], atools, logger, survey, survey_budget, cache)
+        async def tester(state):
+            return await atester_node(state, llm, stage_prompts["TESTER_SYSTEM_PROMPT"], atools, logger, cache)
+        async def developer(state):
+            if candidates > 1:
+                # Candidates run on their own threads and sync sandboxes
+                return await asyncio.to_thread(developer_wrapper, state)
+            return await adeveloper_node(state, llm, stage_prompts["DEVELOPER_SYSTEM_PROMPT"], atools, logger, context_budget)
+        async def test_runner(state):
+            return await atest_runner_node(state, llm, stage_prompts["TEST_RUNNER_SYSTEM_PROMPT"], atools, logger, impact_tests,
+                                           shard_workers=shard_workers, shard_sandboxes=shards, use_daemon=test_daemon,
+                                           snapshots=snapshots, auto_rollback=auto_rollback)
+        async def reviewer(state):
+            return await areviewer_node(state, llm, stage_prompts["REVIEWER_SYSTEM_PROMPT"], atools, logger, cache)
+        async def human(state):
+            # The console prompt runs off the event loop
+            return await asyncio.to_thread(human_wrapper, state)
+
+        async with AsyncSqliteSaver.from_conn_string(os.path.join(ORCHESTRATOR_ROOT, CHECKPOINT_DB)) as amemory:
+            aapp = run_workflow(*[logger.traced(name, node) for name, node in zip(node_names, (
+                                    architect, tester, developer, test_runner, reviewer, human))],
+                                atools, checkpointer=amemory, tool_concurrency=tool_concurrency, logger=logger)
+            return await aapp.ainvoke(inputs, config)
+
     # 5. Initial State (The starting point for every fresh run)
-    initial_state = AgentState(
-        current_stage=stage,
-        messages=[],
-        iteration_count=0,
-        active_failures=[],
-        tool_loop_count=0,
-        active_plan="",
-        active_config="",
-        active_mock_data="",
-        active_tests="",
-        active_requirements="",
-        human_instruction=""
-    )
+    initial_state = new_sprint_state(stage)
 
     # 6. Execution
+    completed = False
     try:
-        # Standard invoke without config/thread_id because there is no persistence
-        result = app.invoke(initial_state, {"recursion_limit": 100})
+        # A resumed thread continues from the last completed node
+        inputs = None if resume else initial_state
+        result = asyncio.run(run_async(inputs)) if async_graph else app.invoke(inputs, config)
 
         # 7. Output Summary
         print("\n--- Session Complete ---")
@@ -108,10 +315,17 @@ def main(stage: str):
 
         logger.sprint_end("SUCCESS")
         print(f"\n📋 Log file: {logger.get_log_file()}")
+        print(f"📈 Telemetry: {logger.get_events_file()}")
 
         # --- SYNC DOWN ---
         # Persist the AI's coding work by bringing it back to your laptop
-        download_package_from_sandbox(sandbox, PACKAGE_ROOT, ORCHESTRATOR_ROOT)
+        if fan_in and baseline is not None:
+            merged = download_changes_from_sandbox(sandbox, PACKAGE_ROOT, ORCHESTRATOR_ROOT, baseline)
+            for path in merged["conflicts"]:
+                logger.error(f"Merge conflict on {path}: another stage changed it too (kept {stage}'s version)")
+        else:
+            download_package_from_sandbox(sandbox, PACKAGE_ROOT, ORCHESTRATOR_ROOT)
+        completed = True
 
     except Exception as e:
         print(f"❌ Execution Error: {e}")
@@ -120,12 +334,72 @@ def main(stage: str):
 
     finally:
         # 8. Cleanup
-        input("\nPress ENTER to close sandbox...")
-        sandbox.kill()
+        if console_lock is None and autopilot is None:
+            input("\nPress ENTER to close sandbox...")
+        if shards:
+            shards.release()
+        if spares:
+            spares.release()
+        conn.close()
+        if not completed:
+            # Keep the sandbox alive so --resume can reattach to it
+            print(f"⏸️ Sprint interrupted. Continue with: python main.py --stage {stage} --resume")
+        else:
+            clear_session(stage)
+            # Recycle into the warm pool instead of killing it
+            try:
+                pool.release(sandbox.wait() if isinstance(sandbox, LazySandbox) else sandbox)
+            except Exception as e:
+                print(f"ℹ️ Sandbox was never provisioned: {e}")
+            # Replace what could not be recycled, ready for the next sprint
+            pool.top_up()
+        # Flush whatever is still queued for the log files
+        logger.close()
+    return completed
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Football Quant Orchestrator")
     parser.add_argument("--stage", type=str, default="data", help="Sprints: data, features, modelling")
+    parser.add_argument("--sandbox", choices=["e2b", "local"], default="e2b", help="Where code runs: E2B, or local processes")
+    parser.add_argument("--local-sync", choices=SYNC_MODES, default="copy", help="Local sandbox sync: copies (isolated), hardlinks or none (symlinked folders); link/none edit the package in place")
+    parser.add_argument("--local-memory-mb", type=int, default=DEFAULT_MEMORY_MB, help="Address-space limit per local sandbox process")
+    parser.add_argument("--local-cpu-seconds", type=int, default=None, help="CPU-time limit per local sandbox process")
+    parser.add_argument("--pool-size", type=int, default=1, help="Warm sandboxes kept ready between sprints")
+    parser.add_argument("--pipelined", action="store_true", help="Provision the sandbox while the Architect's LLM call runs")
+    parser.add_argument("--survey-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Token budget for full file bodies in the Architect survey")
+    parser.add_argument("--impact-tests", action="store_true", help="Only re-run tests affected by changed src modules (periodic full runs)")
+    parser.add_argument("--shard-workers", type=int, default=1, help="Parallel pytest processes per sandbox")
+    parser.add_argument("--shard-sandboxes", type=int, default=0, help="Extra leased sandboxes that run test shards")
+    parser.add_argument("--test-daemon", action="store_true", help="Run pytest in a warm, pre-imported worker inside the sandbox")
+    parser.add_argument("--context-budget", type=int, default=DEFAULT_CONTEXT_BUDGET, help="Token budget per Developer LLM call (history is compacted to fit)")
+    parser.add_argument("--tool-concurrency", type=int, default=DEFAULT_TOOL_CONCURRENCY, help="Parallel tool calls per Developer turn")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES, help="Speculative Developer candidates per iteration, best one promoted")
+    parser.add_argument("--snapshots", action="store_true", help="Snapshot the sandbox workspace after every test run (enables ROLLBACK)")
+    parser.add_argument("--auto-rollback", action="store_true", help="Restore the best snapshot when a test run regresses (implies --snapshots)")
+    parser.add_argument("--autopilot", action="store_true", help="Run headless: auto-continue on failures, auto-exit on green or when the budget is spent")
+    parser.add_argument("--autopilot-budget", type=int, default=DEFAULT_MAX_ITERATIONS, help="Reviewer iterations before the autopilot exits")
+    parser.add_argument("--instructions", type=str, default=None, help="File the autopilot reads Developer instructions from, one per line")
+    parser.add_argument("--decision-timeout", type=float, default=0, help="Seconds the autopilot waits for an instruction before the default action")
+    parser.add_argument("--default-action", choices=["continue", "exit"], default="continue", help="Autopilot action when no instruction arrives")
+    parser.add_argument("--token-prices", type=float, nargs=2, metavar=("IN", "OUT"), default=None, help="USD per 1M input/output tokens, for the cost estimate at sprint end")
+    parser.add_argument("--queued-logs", action="store_true", help="Write logs from a background thread (batched, rotated)")
+    parser.add_argument("--record", type=str, default=None, metavar="PATH", help="Record LLM, sandbox and human traffic for replay.py")
+    parser.add_argument("--async-graph", action="store_true", help="Run the graph with ainvoke on async E2B/LLM clients")
+    parser.add_argument("--resume", action="store_true", help="Continue the last unfinished sprint of this stage from its checkpoint")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Bypass the on-disk cache of Architect/Tester/Reviewer responses")
     
     args = parser.parse_args()
-    main(stage=args.stage)
\ No newline at end of file
+    autopilot = None
+    if args.autopilot:
+        autopilot = Autopilot(max_iterations=args.autopilot_budget, instructions_file=args.instructions,
+                              timeout=args.decision_timeout, default_action=args.default_action)
+    main(stage=args.stage, pool_size=args.pool_size, pipelined=args.pipelined,
+         survey_budget=args.survey_budget, impact_tests=args.impact_tests,
+         shard_workers=args.shard_workers, shard_sandboxes=args.shard_sandboxes,
+         test_daemon=args.test_daemon, context_budget=args.context_budget,
+         llm_cache=not args.no_llm_cache, resume=args.resume,
+         tool_concurrency=args.tool_concurrency, async_graph=args.async_graph,
+         candidates=args.candidates, snapshots=args.snapshots, auto_rollback=args.auto_rollback,
+         autopilot=autopilot, token_prices=args.token_prices, queued_logs=args.queued_logs,
+         record=args.record, backend=args.sandbox, local_sync=args.local_sync,
+         local_memory_mb=args.local_memory_mb, local_cpu_seconds=args.local_cpu_seconds)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Content-hash manifests for the package folders we sync with the sandbox.
+
+This module is stdlib-only on purpose: its source is shipped into the
+sandbox so that both sides build their index with exactly the same code.
+"""
+import os
+import json
+import hashlib
+
+SKIP_DIRS = {"__pycache__", ".pytest_cache", ".ipynb_checkpoints"}
+SKIP_SUFFIXES = (".pyc", ".pyo")
+
+
+def hash_file(path, chunk_size=65536):
+    """Return the sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(roots, index_path=None):
+    """
+    Walks every folder in `roots` ({remote_prefix: local_dir}) and returns
+    {"<prefix>/<relative path>": sha256}.
+
+    When `index_path` is given, the previous (size, mtime, hash) entries are
+    re-used for files that have not been touched, so only new or modified
+    files are actually re-hashed. The refreshed index is written back.
+    """
+    previous = {}
+    if index_path and os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+
+    index = {}
+    for prefix, folder in roots.items():
+        if not os.path.isdir(folder):
+            continue
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for name in sorted(filenames):
+                if name.endswith(SKIP_SUFFIXES):
+                    continue
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, folder).replace(os.sep, "/")
+                key = f"{prefix}/{rel}"
+                stat = os.stat(full)
+                cached = previous.get(key)
+                if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                    index[key] = cached
+                else:
+                    index[key] = [stat.st_size, stat.st_mtime_ns, hash_file(full)]
+
+    if index_path:
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+
+    return {key: entry[2] for key, entry in index.items()}
+
+
+def diff_manifests(local, remote):
+    """
+    Compares two manifests and returns (changed, deleted):
+    - changed: keys that are new locally or whose hash differs remotely.
+    - deleted: keys that exist remotely but no longer exist locally.
+    """
+    changed = sorted(k for k, h in local.items() if remote.get(k) != h)
+    deleted = sorted(k for k in remote if k not in local)
+    return changed, deleted
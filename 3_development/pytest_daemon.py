@@ -0,0 +1,236 @@
+"""
+Long-lived pytest worker for the sandbox.
+
+The daemon imports the heavy scientific stack (and compiles a tiny PyTensor
+graph) once, pre-imports the `src` modules, then serves test runs over a unix
+socket. Every run happens in a forked child, so the parent stays clean. The
+child only drops the src modules whose files changed since the parent
+imported them (plus everything that imports them), so unchanged code is
+never re-imported. After each run the parent refreshes the changed modules.
+
+Stdlib-only. Shipped into the sandbox together with impact_analysis, whose
+import-graph helpers it uses (build_import_graph, affected_modules), and
+pytest_results (ResultRecorder).
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import tempfile
+import importlib
+import subprocess
+
+# Relative to the sandbox working directory: one daemon per workspace, so
+# sandboxes sharing a machine (local backend) never share imported src modules
+DAEMON_SOCKET = ".pytest_daemon.sock"
+DAEMON_SCRIPT = ".pytest_daemon.py"
+DAEMON_LOG = ".pytest_daemon.log"
+DAEMON_PID = ".pytest_daemon.pid"
+DAEMON_BOOT_TIMEOUT = 300
+HEAVY_MODULES = ("numpy", "pandas", "xarray", "arviz", "pymc", "pytensor", "pytest")
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+class _Daemon:
+    def __init__(self, src_root):
+        self.src_root = os.path.abspath(src_root)
+        self.stamps = {}
+
+    def warm(self):
+        for name in HEAVY_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+        try:
+            import numpy
+            import pytensor
+            import pytensor.tensor as pt
+            x = pt.dvector("x")
+            pytensor.function([x], (x ** 2).sum())(numpy.ones(3))
+        except Exception:
+            pass
+        if self.src_root not in sys.path:
+            sys.path.insert(0, self.src_root)
+        self.refresh(set(build_import_graph(self.src_root)))
+
+    def changed_modules(self):
+        """src modules whose file changed (or vanished) since the parent imported them."""
+        return {m for m, (path, stamp) in self.stamps.items() if _stamp(path) != stamp}
+
+    def stale_modules(self):
+        changed = self.changed_modules()
+        if not changed:
+            return set()
+        return affected_modules(changed, build_import_graph(self.src_root))
+
+    def refresh(self, modules):
+        """(Re-)imports src modules in the parent; broken modules are skipped."""
+        for name in sorted(modules):
+            sys.modules.pop(name, None)
+            self.stamps.pop(name, None)
+        for name in sorted(modules):
+            try:
+                module = importlib.import_module(name)
+            except Exception:
+                continue
+            path = getattr(module, "__file__", None)
+            if path and os.path.abspath(path).startswith(self.src_root):
+                self.stamps[name] = (path, _stamp(path))
+
+    def run(self, request):
+        stale = self.stale_modules()
+        out_fd, out_path = tempfile.mkstemp(prefix="pytest_run_", suffix=".log")
+        res_path = out_path + ".json"
+
+        pid = os.fork()
+        if pid == 0:
+            # Child: fresh copies of stale src modules, output to the log file
+            code = 3
+            try:
+                for name in stale:
+                    sys.modules.pop(name, None)
+                os.chdir(request.get("cwd", os.getcwd()))
+                os.environ.update(request.get("env", {}))
+                os.dup2(out_fd, 1)
+                os.dup2(out_fd, 2)
+                import pytest
+
+                recorder = ResultRecorder()
+                code = int(pytest.main(request["args"], plugins=[recorder]))
+                with open(res_path, "w") as f:
+                    json.dump({"exit_code": code, "results": recorder.results}, f)
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+
+        os.close(out_fd)
+        _, status = os.waitpid(pid, 0)
+        with open(out_path, "r", encoding="utf-8", errors="replace") as f:
+            output = f.read()
+        reply = {"exit_code": os.waitstatus_to_exitcode(status), "results": {}}
+        if os.path.exists(res_path):
+            with open(res_path, "r") as f:
+                reply.update(json.load(f))
+            os.remove(res_path)
+        os.remove(out_path)
+        reply["output"] = output
+        reply["reloaded"] = sorted(stale)
+
+        # Keep the parent warm for the next run
+        if stale:
+            self.refresh(stale)
+        return reply
+
+
+def serve(socket_path=DAEMON_SOCKET, src_root="src"):
+    """Daemon entry point: warm up, then answer one JSON request per connection."""
+    daemon = _Daemon(src_root)
+    daemon.warm()
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(4)
+    while True:
+        conn, _ = server.accept()
+        with conn:
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+            if not data.strip():
+                continue  # Liveness probe
+            try:
+                reply = daemon.run(json.loads(data))
+            except Exception as e:
+                reply = {"exit_code": 3, "results": {}, "output": f"pytest daemon error: {e}"}
+            try:
+                conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+            except OSError:
+                pass  # Client went away; keep serving
+
+
+def _request(payload, socket_path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        client.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(1 << 20)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data)
+    finally:
+        client.close()
+
+
+def ensure_daemon(daemon_source, socket_path=DAEMON_SOCKET, boot_timeout=DAEMON_BOOT_TIMEOUT):
+    """Starts the daemon if it is not listening yet and waits for it to come up."""
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            return True
+        except OSError:
+            os.remove(socket_path)
+        finally:
+            probe.close()
+
+    with open(DAEMON_SCRIPT, "w", encoding="utf-8") as f:
+        f.write(daemon_source + f"\nserve({socket_path!r}, 'src')\n")
+    with open(DAEMON_LOG, "a") as log:
+        proc = subprocess.Popen([sys.executable, DAEMON_SCRIPT], stdout=log, stderr=subprocess.STDOUT,
+                                stdin=subprocess.DEVNULL, start_new_session=True)
+    with open(DAEMON_PID, "w") as f:
+        f.write(str(proc.pid))
+
+    deadline = time.time() + boot_timeout
+    while time.time() < deadline:
+        if os.path.exists(socket_path):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def stop_daemon(pid_path=DAEMON_PID):
+    """Kills the daemon's process group (the daemon and any running test child)."""
+    try:
+        with open(pid_path, "r") as f:
+            pid = int(f.read().strip())
+        os.killpg(pid, signal.SIGKILL)
+    except (OSError, ValueError):
+        pass  # Not running
+    for path in (pid_path, os.path.join(os.path.dirname(pid_path), DAEMON_SOCKET)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def run_in_daemon(args, daemon_source, socket_path=DAEMON_SOCKET):
+    """
+    Runs pytest with `args` in a forked child of the warm daemon.
+    Returns {"exit_code", "results", "output", "reloaded"}, or None if the
+    daemon is unavailable (the caller then runs pytest in-process).
+    """
+    try:
+        if not ensure_daemon(daemon_source, socket_path):
+            return None
+        return _request({"args": list(args), "cwd": os.getcwd(),
+                         "env": {"PYTHONPATH": os.environ.get("PYTHONPATH", "")}}, socket_path)
+    except Exception:
+        return None
@@ -0,0 +1,93 @@
+"""
+Structured pytest results.
+
+ResultRecorder is a pytest plugin that keeps one compact record per test:
+{"nodeid", "outcome", "duration", "traceback"} where outcome is one of
+passed / failed / error / skipped and the traceback (failures only) is
+truncated. The runner prints the records between TEST_RESULTS markers and
+test_runner_node parses them instead of scraping the verbose log.
+
+Stdlib-only: shipped into the sandbox with the runner script.
+"""
+import re
+import json
+
+TRACEBACK_LIMIT = 2000
+RESULTS_START = "TEST_RESULTS_START"
+RESULTS_END = "TEST_RESULTS_END"
+OUTCOMES = ("passed", "failed", "error", "skipped")
+
+
+def truncate_traceback(text, limit=TRACEBACK_LIMIT):
+    """Keeps the tail of a traceback, where the actual error is."""
+    if not text or len(text) <= limit:
+        return text
+    return "..." + text[-limit:]
+
+
+class ResultRecorder:
+    """pytest plugin collecting one record per test id."""
+
+    def __init__(self):
+        self.results = {}
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.results[report.nodeid] = {
+                "nodeid": report.nodeid,
+                "outcome": "error",
+                "duration": 0.0,
+                "traceback": truncate_traceback(report.longreprtext),
+            }
+
+    def pytest_runtest_logreport(self, report):
+        entry = self.results.setdefault(report.nodeid, {
+            "nodeid": report.nodeid, "outcome": "passed", "duration": 0.0, "traceback": None,
+        })
+        entry["duration"] += report.duration
+        if report.failed:
+            # A failure in setup/teardown is an error, in the test body a failure
+            entry["outcome"] = "failed" if report.when == "call" else "error"
+            entry["traceback"] = truncate_traceback(report.longreprtext)
+        elif report.skipped and entry["outcome"] == "passed":
+            entry["outcome"] = "skipped"
+
+    def merge(self, results):
+        """Adds records produced elsewhere (shards, daemon children)."""
+        self.results.update(results)
+
+    @property
+    def failed(self):
+        return [n for n, r in self.results.items() if r["outcome"] in ("failed", "error")]
+
+
+def summarise(records):
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    for record in records:
+        counts[record["outcome"]] = counts.get(record["outcome"], 0) + 1
+    counts["total"] = len(records)
+    counts["duration"] = round(sum(r["duration"] for r in records), 3)
+    return counts
+
+
+def format_results(exit_code, results):
+    """The marker block the runner prints after the verbose log."""
+    records = list(results.values())
+    payload = {"exit_code": int(exit_code), "summary": summarise(records), "tests": records}
+    return RESULTS_START + json.dumps(payload) + RESULTS_END
+
+
+def parse_results(raw):
+    """Extracts the structured results from runner output, or None."""
+    match = re.search(rf"{RESULTS_START}(.*?){RESULTS_END}", raw, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def strip_results(raw):
+    """Runner output without the structured block (for humans and the Reviewer)."""
+    return re.sub(rf"{RESULTS_START}.*?{RESULTS_END}", "", raw, flags=re.DOTALL)
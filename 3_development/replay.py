@@ -0,0 +1,430 @@
+"""
+Record a live sprint, then replay it offline.
+
+Recording (`python main.py --stage S --record PATH`) writes one JSON line
+per event: a `sprint` header with the stage options, every LLM request and
+response, every call into the primary sandbox (with its latency), every
+Architect survey and every human decision.
+
+Replaying (`python replay.py PATH`) drives `run_workflow` with the same
+nodes against a ReplayLLM that answers from the recording and a
+LocalSandbox (subprocess) that really runs the code. The Architect gets the
+recorded survey text, so its request matches even after the tree or the
+survey cache has changed. No Gemini or E2B
+account is involved, so the run is repeatable and its wall time is the
+orchestration overhead plus local execution. It works as a benchmark and
+as a regression test for graph changes.
+
+A replayed request is matched to the recorded request with the same content
+when there is one. Otherwise it gets the next unused response of the same
+kind, because tool output such as latencies and pytest durations differs
+between runs. The report counts both, and a growing "drifted" count means
+the graph now asks different questions.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import inspect
+import argparse
+import tempfile
+import threading
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+RECORDING_FORMAT = 1
+
+
+def request_key(mode, schema_name, messages):
+    """Content hash of one LLM request."""
+    payload = {
+        "mode": mode,
+        "schema": schema_name,
+        "messages": [[m.type, m.content if isinstance(m.content, str) else json.dumps(m.content, sort_keys=True, default=str)]
+                     for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_recording(path):
+    with open(path, "r", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if not entries or entries[0].get("kind") != "sprint":
+        raise ValueError(f"{path} is not a sprint recording (no header)")
+    return entries
+
+
+class Recorder:
+    """Thread-safe, append-only JSONL event log; kept in memory when `path` is None."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.entries = []
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            open(path, "w", encoding="utf-8").close()
+
+    def record(self, kind: str, **fields):
+        with self._lock:
+            entry = {"seq": len(self.entries) + 1, "kind": kind, **fields}
+            self.entries.append(entry)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+    def total_seconds(self, kind: str) -> float:
+        return sum(e.get("seconds", 0.0) for e in self.entries if e["kind"] == kind)
+
+
+# --- Recording proxies ---
+
+class _RecordingRunnable:
+    """`llm.bind_tools(...)` or `llm.with_structured_output(...)`, recorded."""
+
+    def __init__(self, runnable, recorder, mode, schema=None):
+        self._runnable = runnable
+        self._recorder = recorder
+        self._mode = mode
+        self._schema = schema
+
+    def _record(self, messages, response, seconds):
+        name = self._schema.__name__ if self._schema else None
+        fields = {"mode": self._mode, "schema": name, "key": request_key(self._mode, name, messages),
+                  "seconds": round(seconds, 3)}
+        if self._schema:
+            fields["output"] = response.model_dump(mode="json")
+        else:
+            fields["message"] = message_to_dict(response)
+        self._recorder.record("llm", **fields)
+
+    def invoke(self, messages, *args, **kwargs):
+        start = time.perf_counter()
+        response = self._runnable.invoke(messages, *args, **kwargs)
+        self._record(messages, response, time.perf_counter() - start)
+        return response
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        start = time.perf_counter()
+        response = await self._runnable.ainvoke(messages, *args, **kwargs)
+        self._record(messages, response, time.perf_counter() - start)
+        return response
+
+
+class RecordingLLM(_RecordingRunnable):
+    """Wraps the chat model; every request/response pair goes to the recorder."""
+
+    def __init__(self, llm, recorder):
+        super().__init__(llm, recorder, "chat")
+        self._llm = llm
+
+    def bind_tools(self, tools, **kwargs):
+        return _RecordingRunnable(self._llm.bind_tools(tools, **kwargs), self._recorder, "tools")
+
+    def with_structured_output(self, schema, **kwargs):
+        return _RecordingRunnable(self._llm.with_structured_output(schema, **kwargs), self._recorder,
+                                  "structured", schema)
+
+    def model_copy(self, *args, **kwargs):
+        return RecordingLLM(self._llm.model_copy(*args, **kwargs), self._recorder)
+
+    def __getattr__(self, name):
+        # model, temperature... (the response cache keys on them)
+        return getattr(self._llm, name)
+
+
+def _execution_fields(execution):
+    error = getattr(execution, "error", None)
+    return {"stdout": list(execution.logs.stdout), "stderr": list(execution.logs.stderr),
+            "error": f"{error.name}: {error.value}" if error else None}
+
+
+class _RecordingNamespace:
+    """`sandbox.files` / `sandbox.commands`, recorded. Resolved lazily (LazySandbox)."""
+
+    def __init__(self, owner, attribute):
+        self._owner = owner
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+        target = getattr(getattr(self._owner._sandbox, self._attribute), name)
+        describe = {
+            ("files", "write"): lambda args, result: {"path": args[0], "size": len(args[1])},
+            ("files", "read"): lambda args, result: {"path": args[0]},
+            ("commands", "run"): lambda args, result: {
+                "cmd": args[0], "exit_code": getattr(result, "exit_code", None),
+                "stdout": getattr(result, "stdout", ""), "stderr": getattr(result, "stderr", "")},
+        }.get((self._attribute, name))
+        if describe is None:
+            return target
+        return lambda *args, **kwargs: self._owner._call(f"{self._attribute}.{name}", target, args, kwargs, describe)
+
+
+class RecordingSandbox:
+    """Wraps a (sync or async) sandbox; run_code, file and command calls are recorded."""
+
+    def __init__(self, sandbox, recorder):
+        self._sandbox = sandbox
+        self._recorder = recorder
+        self.files = _RecordingNamespace(self, "files")
+        self.commands = _RecordingNamespace(self, "commands")
+
+    def _call(self, op, target, args, kwargs, describe):
+        start = time.perf_counter()
+        result = target(*args, **kwargs)
+        if inspect.isawaitable(result):
+            return self._acall(op, result, args, describe, start)
+        self._recorder.record("sandbox", op=op, seconds=round(time.perf_counter() - start, 3),
+                              **describe(args, result))
+        return result
+
+    async def _acall(self, op, awaitable, args, describe, start):
+        result = await awaitable
+        self._recorder.record("sandbox", op=op, seconds=round(time.perf_counter() - start, 3),
+                              **describe(args, result))
+        return result
+
+    def run_code(self, code, *args, **kwargs):
+        return self._call("run_code", self._sandbox.run_code, (code,) + args, kwargs,
+                          lambda args, result: {"code": args[0], **_execution_fields(result)})
+
+    def __getattr__(self, name):
+        return getattr(self._sandbox, name)
+
+
+class RecordingHuman:
+    """
+    Stands in for the autopilot argument of human_node: asks the wrapped
+    autopilot, or the terminal when there is none, and records the answer.
+    """
+
+    def __init__(self, recorder, autopilot=None):
+        self._recorder = recorder
+        self._autopilot = autopilot
+
+    def decide(self, state):
+        if self._autopilot is not None:
+            text, reason = self._autopilot.decide(state)
+        else:
+            text, reason = input(">> ").strip(), "typed at the terminal"
+        self._recorder.record("human", instruction=text)
+        return text, reason
+
+
+class RecordingSurvey:
+    """Wraps the Architect's `survey` callable and records the text it returns."""
+
+    def __init__(self, survey, recorder):
+        self._survey = survey
+        self._recorder = recorder
+
+    def __call__(self):
+        text = self._survey()
+        self._recorder.record("survey", text=text)
+        return text
+
+
+# --- Replay ---
+
+class ReplaySurvey:
+    """The recorded survey texts, in order; the last one repeats if the Architect runs again."""
+
+    def __init__(self, entries):
+        self._texts = [e["text"] for e in entries if e["kind"] == "survey"]
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def __bool__(self):
+        return bool(self._texts)
+
+    def __call__(self):
+        with self._lock:
+            text = self._texts[min(self._next, len(self._texts) - 1)]
+            self._next += 1
+        return text
+
+
+class _ReplayRunnable:
+    def __init__(self, llm, mode, schema=None):
+        self._llm = llm
+        self._mode = mode
+        self._schema = schema
+
+    def invoke(self, messages, *args, **kwargs):
+        return self._llm.answer(self._mode, self._schema, messages)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return self._llm.answer(self._mode, self._schema, messages)
+
+
+class ReplayLLM(_ReplayRunnable):
+    """Deterministic chat model answering from a recording."""
+
+    model = "replay"
+    temperature = 0
+
+    def __init__(self, entries):
+        super().__init__(self, "chat")
+        self._pending = [e for e in entries if e["kind"] == "llm"]
+        self._lock = threading.Lock()
+        self.exact = 0
+        self.drifted = 0
+
+    @property
+    def unused(self) -> int:
+        return len(self._pending)
+
+    def bind_tools(self, tools, **kwargs):
+        return _ReplayRunnable(self, "tools")
+
+    def with_structured_output(self, schema, **kwargs):
+        return _ReplayRunnable(self, "structured", schema)
+
+    def model_copy(self, *args, **kwargs):
+        return self
+
+    def answer(self, mode, schema, messages):
+        name = schema.__name__ if schema else None
+        key = request_key(mode, name, messages)
+        with self._lock:
+            candidates = [e for e in self._pending if e["mode"] == mode and e["schema"] == name]
+            if not candidates:
+                raise RuntimeError(f"Recording has no {mode} response left for {name or 'the Developer'}")
+            entry = next((e for e in candidates if e["key"] == key), None)
+            if entry is None:
+                entry = candidates[0]
+                self.drifted += 1
+            else:
+                self.exact += 1
+            self._pending.remove(entry)
+        if schema:
+            return schema.model_validate(entry["output"])
+        return messages_from_dict([entry["message"]])[0]
+
+
+def replay(path, log_dir=None, workdir=None, keep_workdir=False):
+    """
+    Replays a recording through the graph, offline. Returns a report dict
+    with wall time, local sandbox time and LLM match counts.
+    """
+    from tools import create_tools
+    from agents import architect_node, tester_node, developer_node, test_runner_node, reviewer_node, human_node
+    from workflow import run_workflow
+    from state import new_sprint_state
+    from logger import SprintLogger
+    from autopilot import Autopilot
+    from local_sandbox import LocalSandbox
+    from utils import upload_package_to_sandbox
+    from prompts import SPRINT_PROMPTS
+    from survey import DEFAULT_TOKEN_BUDGET
+    from context_budget import DEFAULT_CONTEXT_BUDGET
+    from tool_executor import DEFAULT_TOOL_CONCURRENCY
+
+    entries = load_recording(path)
+    header = entries[0]
+    if header.get("format") != RECORDING_FORMAT:
+        raise ValueError(f"Unsupported recording format: {header.get('format')}")
+    if header.get("candidates", 1) > 1:
+        raise ValueError("Speculative sprints (--candidates > 1) cannot be replayed")
+    stage = header["stage"]
+    prompts = SPRINT_PROMPTS[stage]
+
+    llm = ReplayLLM(entries)
+    # Older recordings have no survey: the Architect surveys the sandbox instead
+    survey = ReplaySurvey(entries) or None
+    local = Recorder()
+    # Copies, never links: the replayed Developer must not edit the local package
+    sandbox = LocalSandbox(workdir, sync="copy")
+    logger = SprintLogger(stage, log_dir=log_dir or tempfile.mkdtemp(prefix="replay-logs-"))
+
+    # The recorded human decisions, in order; once used up the sprint ends
+    decisions = queue.Queue()
+    humans = [e["instruction"] for e in entries if e["kind"] == "human"]
+    for text in humans:
+        decisions.put(text)
+    autopilot = Autopilot(max_iterations=len(humans) + 1, instructions=decisions, default_action="EXIT")
+
+    try:
+        # Replays against the local package as it is now
+        upload_package_to_sandbox(sandbox, header["package_root"], header["orchestrator_root"])
+        tools = create_tools(RecordingSandbox(sandbox, local))
+        options = header.get("options", {})
+
+        nodes = {
+            "architect": lambda state: architect_node(state, llm, prompts["ARCHITECT_SYSTEM_PROMPT"], tools, logger,
+                                                      survey, options.get("survey_budget", DEFAULT_TOKEN_BUDGET), None),
+            "tester": lambda state: tester_node(state, llm, prompts["TESTER_SYSTEM_PROMPT"], tools, logger, None),
+            "developer": lambda state: developer_node(state, llm, prompts["DEVELOPER_SYSTEM_PROMPT"], tools, logger,
+                                                      options.get("context_budget", DEFAULT_CONTEXT_BUDGET)),
+            "test_runner": lambda state: test_runner_node(state, llm, prompts["TEST_RUNNER_SYSTEM_PROMPT"], tools, logger,
+                                                          options.get("impact_tests", False),
+                                                          shard_workers=options.get("shard_workers", 1),
+                                                          use_daemon=options.get("test_daemon", False),
+                                                          snapshots=options.get("snapshots", False),
+                                                          auto_rollback=options.get("auto_rollback", False)),
+            "reviewer": lambda state: reviewer_node(state, llm, prompts["REVIEWER_SYSTEM_PROMPT"], tools, logger, None),
+            "human_instructor": lambda state: human_node(state, logger, tools, autopilot),
+        }
+        app = run_workflow(*[logger.traced(name, node) for name, node in nodes.items()], tools,
+                           tool_concurrency=options.get("tool_concurrency", DEFAULT_TOOL_CONCURRENCY), logger=logger)
+
+        logger.sprint_start()
+        start = time.perf_counter()
+        app.invoke(new_sprint_state(stage), {"recursion_limit": 100})
+        wall = time.perf_counter() - start
+        logger.sprint_end("REPLAYED")
+    finally:
+        logger.close()
+        if not keep_workdir:
+            sandbox.kill()
+
+    return {
+        "stage": stage,
+        "wall_s": round(wall, 3),
+        "sandbox_s": round(local.total_seconds("sandbox"), 3),
+        "recorded_sandbox_s": round(sum(e.get("seconds", 0.0) for e in entries if e["kind"] == "sandbox"), 3),
+        "recorded_llm_s": round(sum(e.get("seconds", 0.0) for e in entries if e["kind"] == "llm"), 3),
+        "sandbox_calls": sum(1 for e in local.entries if e["kind"] == "sandbox"),
+        "llm_exact": llm.exact,
+        "llm_drifted": llm.drifted,
+        "llm_unused": llm.unused,
+        "nodes_ms": {key.split(":", 1)[1]: round(sum(values), 1)
+                     for key, values in logger.spans.items() if key.startswith("node:")},
+    }
+
+
+def format_report(report):
+    overhead = report["wall_s"] - report["sandbox_s"]
+    lines = [
+        "=" * 60,
+        f"🔁 REPLAY: {report['stage'].upper()}",
+        "=" * 60,
+        f"Wall time:              {report['wall_s']:.2f}s",
+        f"Local sandbox time:     {report['sandbox_s']:.2f}s ({report['sandbox_calls']} calls)",
+        f"Orchestration overhead: {overhead:.2f}s",
+        f"Recorded sandbox time:  {report['recorded_sandbox_s']:.2f}s",
+        f"Recorded LLM time:      {report['recorded_llm_s']:.2f}s",
+        f"LLM responses:          {report['llm_exact']} exact, {report['llm_drifted']} drifted, "
+        f"{report['llm_unused']} unused",
+        "",
+        "Time per node:",
+    ]
+    for name, ms in sorted(report["nodes_ms"].items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<18} {ms / 1000:8.2f}s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded sprint offline")
+    parser.add_argument("recording", help="JSONL file written by main.py --record")
+    parser.add_argument("--logs", default=None, help="Directory for the replay's sprint log (default: a temp dir)")
+    parser.add_argument("--workdir", default=None, help="Working directory of the local sandbox (default: a temp dir)")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the local sandbox's files after the replay")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = replay(args.recording, log_dir=args.logs, workdir=args.workdir, keep_workdir=args.keep_workdir)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    # Unused responses mean the graph stopped earlier than the recorded sprint
+    sys.exit(1 if report["llm_unused"] else 0)
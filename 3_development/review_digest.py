@@ -0,0 +1,93 @@
+"""
+Deterministic pre-analysis of structured test results for the Reviewer.
+
+Failing tests are grouped by (exception type, location) so that dozens of
+identical tracebacks collapse into one entry, and the Reviewer LLM only sees
+a compact digest instead of the full verbose pytest log.
+"""
+import re
+
+DIGEST_TRACEBACK_CHARS = 800
+MAX_TESTS_LISTED = 5
+
+# pytest's long repr ends with "path/to/file.py:42: KeyError"
+LOCATION_RE = re.compile(r"^(?P<path>[^\s:][^:]*\.py):(?P<line>\d+): (?P<exc>[A-Za-z_][\w.]*)\s*$", re.MULTILINE)
+ERROR_LINE_RE = re.compile(r"^E\s+(?P<msg>.+)$", re.MULTILINE)
+
+
+def is_green(test_results) -> bool:
+    """
+    True when the structured results say the selected tests ran and passed:
+    exit code 0, at least one pass, no failures or errors. An empty or
+    all-skipped run proves nothing and is not green.
+    """
+    if not test_results or test_results.get("exit_code") != 0:
+        return False
+    counts = test_results.get("summary")
+    if counts is None:
+        counts = {}
+        for record in test_results.get("tests", []):
+            counts[record.get("outcome")] = counts.get(record.get("outcome"), 0) + 1
+    return counts.get("passed", 0) > 0 and counts.get("failed", 0) + counts.get("error", 0) == 0
+
+
+def classify(record):
+    """Returns (failure_type, location, message) for a failed test record."""
+    traceback = record.get("traceback") or ""
+    locations = list(LOCATION_RE.finditer(traceback))
+    if locations:
+        last = locations[-1]
+        failure_type = last.group("exc").split(".")[-1]
+        location = f"{last.group('path')}:{last.group('line')}"
+    else:
+        failure_type = "CollectionError" if record.get("outcome") == "error" else "UnknownError"
+        location = record.get("nodeid", "").split("::")[0]
+
+    errors = ERROR_LINE_RE.findall(traceback)
+    message = errors[0].strip() if errors else (traceback.strip().splitlines() or [""])[-1]
+    return failure_type, location, message
+
+
+def digest_failures(test_results):
+    """
+    Groups failing records by (failure_type, location).
+    Returns a list of {"failure_type", "location", "message", "tests", "traceback"},
+    largest groups first.
+    """
+    groups = {}
+    for record in test_results.get("tests", []):
+        if record.get("outcome") not in ("failed", "error"):
+            continue
+        failure_type, location, message = classify(record)
+        group = groups.setdefault((failure_type, location), {
+            "failure_type": failure_type,
+            "location": location,
+            "message": message,
+            "tests": [],
+            "traceback": record.get("traceback") or "",
+        })
+        group["tests"].append(record["nodeid"])
+    return sorted(groups.values(), key=lambda g: (-len(g["tests"]), g["location"]))
+
+
+def format_digest(test_results, groups):
+    """Compact text handed to the Reviewer LLM."""
+    counts = test_results.get("summary", {})
+    lines = [
+        f"Exit code: {test_results.get('exit_code')} | "
+        f"{counts.get('passed', 0)} passed, {counts.get('failed', 0)} failed, "
+        f"{counts.get('error', 0)} errors, {counts.get('skipped', 0)} skipped",
+        f"{sum(len(g['tests']) for g in groups)} failing tests collapse into {len(groups)} distinct failures:",
+    ]
+    for i, group in enumerate(groups, 1):
+        tests = group["tests"]
+        listed = ", ".join(tests[:MAX_TESTS_LISTED])
+        if len(tests) > MAX_TESTS_LISTED:
+            listed += f", ... (+{len(tests) - MAX_TESTS_LISTED} more)"
+        tail = group["traceback"][-DIGEST_TRACEBACK_CHARS:]
+        lines.append(
+            f"\n{i}. [{group['failure_type']}] at {group['location']} ({len(tests)} tests: {listed})\n"
+            f"   {group['message']}\n"
+            f"   Traceback (tail):\n{tail}"
+        )
+    return "\n".join(lines)
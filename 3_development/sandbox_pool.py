@@ -0,0 +1,351 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# The scientific stack every sprint needs. Specifiers are quoted so the
+# shell does not treat '>=' as a redirection.
+SCIENTIFIC_STACK = (
+    "numpy==1.26.4",       # The most stable 'LTS' version of NumPy 1.x
+    "pandas>=2.2.0",
+    "xarray>=2024.1.0",
+    "pymc>=5.16.2",
+    "arviz>=0.18.0",
+    "pytensor>=2.22.1",
+)
+INSTALL_CMD = "pip install --quiet " + " ".join(f'"{spec}"' for spec in SCIENTIFIC_STACK)
+
+# Import everything once and compile a tiny graph so the PyTensor cache is warm
+WARMUP_CODE = """
+import numpy, pandas, xarray, arviz, pymc, pytensor
+import pytensor.tensor as pt
+_x = pt.dvector('x')
+pytensor.function([_x], (_x ** 2).sum())(numpy.ones(3))
+print('WARM_OK')
+"""
+
+HEALTH_CHECK_CODE = "print('HEALTH_OK')"
+
+# Everything private to a sprint: test scaffolding, snapshots (their ids would
+# continue from the old index), impact-selection and survey state, and the
+# warm pytest daemon with its stale imports. src/tests/configs are kept on
+# purpose so that the next upload only has to send a delta.
+RESET_CMD = (
+    "if [ -f .pytest_daemon.pid ]; then kill -9 -$(cat .pytest_daemon.pid) 2>/dev/null; fi; "
+    "rm -rf tester_outputs .pytest_cache .snapshots .test_selection.json .survey_cache.json "
+    ".pytest_daemon.pid .pytest_daemon.sock .pytest_daemon.log .pytest_daemon.py"
+)
+
+
+class E2BBackend:
+    """Creates and reattaches to E2B sandboxes."""
+
+    def __init__(self, timeout: int = 3600):
+        self.timeout = timeout
+
+    def create(self):
+        from e2b_code_interpreter import Sandbox
+        return Sandbox.create(timeout=self.timeout)
+
+    def connect(self, sandbox_id: str):
+        from e2b_code_interpreter import Sandbox
+        return Sandbox.connect(sandbox_id)
+
+    async def aconnect(self, sandbox_id: str):
+        """The same sandbox through the async client (AsyncSandbox)."""
+        from e2b_code_interpreter import AsyncSandbox
+        return await AsyncSandbox.connect(sandbox_id)
+
+    def keep_alive(self, sandbox):
+        """Pushes the sandbox's own timeout forward while it sits in the pool."""
+        sandbox.set_timeout(self.timeout)
+
+    def restart_kernel(self, sandbox) -> bool:
+        """
+        Restarts the sandbox's Python code contexts, dropping the previous
+        sprint's imported modules and globals. False if this SDK version has
+        no context API; the pool then retires the sandbox instead.
+        """
+        if not hasattr(sandbox, "list_code_contexts") or not hasattr(sandbox, "restart_code_context"):
+            return False
+        for context in sandbox.list_code_contexts():
+            if getattr(context, "language", "python") == "python":
+                sandbox.restart_code_context(context)
+        return True
+
+    def kill(self, sandbox):
+        sandbox.kill()
+
+
+class SandboxPool:
+    """
+    Keeps `size` sandboxes with the scientific stack installed and imported,
+    ready to be leased out. Released sandboxes are health-checked, reset (files,
+    pytest daemon and a fresh, re-warmed kernel) and returned to the pool until
+    they reach `max_uses`. A backend that cannot restart the kernel gets its
+    sandboxes retired instead: the next sprint must not import stale modules.
+
+    When `state_path` is given, idle sandbox ids are persisted so the next
+    process can reattach to them instead of provisioning from scratch.
+    """
+
+    def __init__(self, backend, size: int = 1, install_cmd: str = INSTALL_CMD,
+                 warmup_code: str = WARMUP_CODE, max_uses: int = 5,
+                 state_path: str = None, logger=None):
+        self.backend = backend
+        self.size = size
+        self.install_cmd = install_cmd
+        self.warmup_code = warmup_code
+        self.max_uses = max_uses
+        self.state_path = state_path
+        self.logger = logger
+        self._idle = []
+        self._filling = 0
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._restore()
+
+    # --- Internals ---
+
+    def _log(self, message: str):
+        print(message)
+        if self.logger:
+            self.logger.info(message)
+
+    @staticmethod
+    def _id(sandbox):
+        return getattr(sandbox, "sandbox_id", None) or str(id(sandbox))
+
+    def _save(self):
+        if not self.state_path:
+            return
+        state = {"idle": [{"id": self._id(s), "uses": self._uses.get(self._id(s), 0)} for s in self._idle]}
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def _restore(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("idle", [])
+        except (OSError, ValueError):
+            return
+        for entry in entries:
+            try:
+                sandbox = self.backend.connect(entry["id"])
+            except Exception:
+                continue  # Expired or killed since the last run
+            if self.health_check(sandbox):
+                self._idle.append(sandbox)
+                self._uses[self._id(sandbox)] = entry.get("uses", 0)
+        self._log(f"♻️ Pool: reattached {len(self._idle)}/{len(entries)} warm sandboxes.")
+        self._save()
+
+    def _provision(self):
+        """Creates a sandbox, installs the stack and warms the imports."""
+        sandbox = self.backend.create()
+        try:
+            if self.install_cmd:
+                sandbox.commands.run(self.install_cmd, timeout=0)
+            if self.warmup_code:
+                execution = sandbox.run_code(self.warmup_code)
+                if getattr(execution, "error", None):
+                    raise RuntimeError(f"Warm-up failed: {execution.error}")
+        except Exception:
+            self._discard(sandbox)
+            raise
+        self._uses[self._id(sandbox)] = 0
+        return sandbox
+
+    def _restart_kernel(self, sandbox):
+        """Fresh kernel, warmed up again. False if the backend cannot restart it."""
+        restart = getattr(self.backend, "restart_kernel", None)
+        if restart is None or not restart(sandbox):
+            self._log(f"🧹 Pool: cannot restart the kernel of {self._id(sandbox)}; retiring it.")
+            return False
+        if self.warmup_code:
+            execution = sandbox.run_code(self.warmup_code)
+            if getattr(execution, "error", None):
+                return False
+        return True
+
+    def _discard(self, sandbox):
+        self._uses.pop(self._id(sandbox), None)
+        try:
+            self.backend.kill(sandbox)
+        except Exception:
+            pass
+
+    # --- Public API ---
+
+    def health_check(self, sandbox) -> bool:
+        """True if the sandbox answers a trivial run_code call."""
+        try:
+            execution = sandbox.run_code(HEALTH_CHECK_CODE)
+            return not getattr(execution, "error", None) and "HEALTH_OK" in "".join(execution.logs.stdout)
+        except Exception:
+            return False
+
+    def fill(self):
+        """Provisions sandboxes until `size` are idle. Safe to run in a thread."""
+        with self._lock:
+            # Sandboxes another fill() is already provisioning count as idle
+            missing = self.size - len(self._idle) - self._filling
+            if missing <= 0:
+                return
+            self._filling += missing
+
+        created = []
+
+        def _worker():
+            try:
+                created.append(self._provision())
+            except Exception as e:
+                self._log(f"⚠️ Pool: provisioning failed: {e}")
+
+        threads = [threading.Thread(target=_worker) for _ in range(missing)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with self._lock:
+            self._filling -= missing
+            # A release may have filled the pool in the meantime
+            room = max(0, self.size - len(self._idle))
+            surplus = created[room:]
+            self._idle.extend(created[:room])
+            self._save()
+        for sandbox in surplus:
+            self._discard(sandbox)
+        self._log(f"🔥 Pool: {len(created) - len(surplus)} sandboxes provisioned ({len(self._idle)} idle).")
+
+    def top_up(self):
+        """Starts a background fill() if fewer than `size` sandboxes are idle or on the way."""
+        with self._lock:
+            if len(self._idle) + self._filling >= self.size:
+                return None
+        thread = threading.Thread(target=self.fill, daemon=True)
+        thread.start()
+        return thread
+
+    def acquire(self):
+        """Returns a healthy warm sandbox, provisioning one if the pool is empty."""
+        while True:
+            with self._lock:
+                sandbox = self._idle.pop(0) if self._idle else None
+                self._save()
+            if sandbox is None:
+                self._log("⏳ Pool empty: provisioning a fresh sandbox...")
+                return self._provision()
+            if self.health_check(sandbox):
+                return sandbox
+            self._log(f"🩺 Pool: dropping unhealthy sandbox {self._id(sandbox)}.")
+            self._discard(sandbox)
+
+    def release(self, sandbox, healthy: bool = True):
+        """Resets the sandbox and returns it to the pool, or kills it."""
+        key = self._id(sandbox)
+        self._uses[key] = self._uses.get(key, 0) + 1
+
+        keep = healthy and self._uses[key] < self.max_uses
+        if keep:
+            try:
+                sandbox.commands.run(RESET_CMD)
+                keep = self._restart_kernel(sandbox)
+                if keep:
+                    self.backend.keep_alive(sandbox)
+                    keep = self.health_check(sandbox)
+            except Exception:
+                keep = False
+
+        with self._lock:
+            if keep and len(self._idle) < self.size:
+                self._idle.append(sandbox)
+                self._save()
+                return
+        self._discard(sandbox)
+
+    @contextmanager
+    def lease(self):
+        """Context manager: acquire on enter, recycle on exit."""
+        sandbox = self.acquire()
+        try:
+            yield sandbox
+        finally:
+            # A failed sprint does not mean a broken sandbox: the health check decides
+            self.release(sandbox)
+
+    def shutdown(self):
+        """Kills every idle sandbox and clears the persisted state."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._save()
+        for sandbox in idle:
+            self._discard(sandbox)
+
+
+class LazySandbox:
+    """
+    Stands in for a sandbox that is still being provisioned in the background.
+    Any attribute access (files, commands, run_code...) blocks until
+    `provision()` has returned the real sandbox, so callers only wait at the
+    point where they actually touch it.
+    """
+
+    def __init__(self, provision):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sandbox-provision")
+        self._future = self._executor.submit(provision)
+        self._executor.shutdown(wait=False)
+
+    @property
+    def ready(self) -> bool:
+        return self._future.done()
+
+    def wait(self, timeout: float = None):
+        """Returns the real sandbox, re-raising any provisioning error."""
+        return self._future.result(timeout=timeout)
+
+    def __getattr__(self, name):
+        return getattr(self.wait(), name)
+
+
+class ShardSandboxes:
+    """
+    Extra sandboxes leased from the pool to run test shards (or speculative
+    Developer candidates) next to the primary sandbox. `sync()` mirrors the
+    primary's workspace into them.
+    """
+
+    def __init__(self, pool, primary, count: int):
+        self.pool = pool
+        self.primary = primary
+        self.count = count
+        self.sandboxes = []
+
+    def __len__(self):
+        return len(self.sandboxes)
+
+    def acquire(self):
+        with ThreadPoolExecutor(max_workers=max(1, self.count)) as executor:
+            self.sandboxes = list(executor.map(lambda _: self.pool.acquire(), range(self.count)))
+        return self
+
+    def sync(self):
+        from utils import mirror_workspace
+        if self.sandboxes:
+            mirror_workspace(self.primary, self.sandboxes)
+
+    def run(self, index: int, code: str) -> str:
+        """Runs code in one shard sandbox; same output format as the exec_python tool."""
+        execution = self.sandboxes[index].run_code(code)
+        stdout = "\n".join(execution.logs.stdout)
+        stderr = "\n".join(execution.logs.stderr)
+        return f"STDOUT: {stdout}\nSTDERR: {stderr}"
+
+    def release(self):
+        for sandbox in self.sandboxes:
+            self.pool.release(sandbox)
+        self.sandboxes = []
@@ -0,0 +1,205 @@
+"""
+Runs several sprint stages in one process, concurrently where the stage
+dependency DAG allows it.
+
+Each stage is a full `main.main` sprint in its own sandbox leased from one
+shared pool. A single LLM rate limiter is shared by every stage, and each
+stage merges back only the files it changed (last writer wins; overlaps are
+reported). A stage starts as soon as every stage it depends on has
+succeeded; a failed stage skips everything downstream of it.
+
+    python scheduler.py --stages data features modelling
+    python scheduler.py --dag "data; features: data; modelling: data; strategy: features+modelling"
+"""
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# What each stage of SPRINT_PROMPTS builds on, per the dev plans (2_dev_plan):
+# features uses the data stage's team indices, modelling the features'
+# delta_t, and the backtester wires all of them together. The strategy module
+# is standalone by design, so it runs alongside data/features/modelling.
+STAGE_DEPENDENCIES = {
+    "data": [],
+    "features": ["data"],
+    "modelling": ["features"],
+    "strategy": [],
+    "backtest": ["data", "features", "modelling", "strategy"],
+}
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+
+def parse_dag(spec: str) -> dict:
+    """
+    Parses "stage: dep+dep; stage; ..." into {stage: [deps]}.
+    Dependencies that are not listed as stages themselves are added with no
+    dependencies of their own.
+    """
+    dag = {}
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        stage, _, deps = item.partition(":")
+        dag[stage.strip()] = [d.strip() for d in deps.split("+") if d.strip()]
+    for deps in list(dag.values()):
+        for dep in deps:
+            dag.setdefault(dep, [])
+    return dag
+
+
+def select_stages(dag: dict, stages) -> dict:
+    """The sub-DAG for `stages`; dependencies outside the selection are treated as done."""
+    return {s: [d for d in dag.get(s, []) if d in stages] for s in stages}
+
+
+def validate_dag(dag: dict, known=None):
+    """Raises ValueError on unknown stages or dependency cycles."""
+    for stage, deps in dag.items():
+        for name in [stage] + list(deps):
+            if name not in dag:
+                raise ValueError(f"Stage '{stage}' depends on unknown stage '{name}'.")
+            if known is not None and name not in known:
+                raise ValueError(f"Unknown stage '{name}'. Available: {', '.join(known)}")
+
+    visiting, done = set(), set()
+
+    def visit(stage, path):
+        if stage in done:
+            return
+        if stage in visiting:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [stage])}")
+        visiting.add(stage)
+        for dep in dag[stage]:
+            visit(dep, path + [stage])
+        visiting.discard(stage)
+        done.add(stage)
+
+    for stage in dag:
+        visit(stage, [])
+
+
+def run_schedule(dag: dict, run_stage, max_parallel: int = None, clock=time.monotonic) -> dict:
+    """
+    Calls `run_stage(stage)` for every stage, each once all of its
+    dependencies have succeeded. `run_stage` returns truthy on success; an
+    exception counts as a failure.
+
+    Returns {stage: {"status", "start", "end"}} with status SUCCESS, FAILED
+    or SKIPPED (a dependency did not succeed; start/end are None).
+    """
+    validate_dag(dag)
+    timings = {}
+    pending = dict(dag)
+
+    def timed(stage):
+        start = clock()
+        try:
+            ok = bool(run_stage(stage))
+        except Exception as e:
+            print(f"❌ [{stage}] {e}")
+            ok = False
+        return {"status": "SUCCESS" if ok else "FAILED", "start": start, "end": clock()}
+
+    with ThreadPoolExecutor(max_workers=max_parallel or max(1, len(dag))) as pool:
+        running = {}
+        while pending or running:
+            progressed = True
+            while progressed:  # A skip can in turn skip its own dependents
+                progressed = False
+                for stage, deps in list(pending.items()):
+                    statuses = [timings[d]["status"] for d in deps if d in timings]
+                    if any(s != "SUCCESS" for s in statuses):
+                        timings[stage] = {"status": "SKIPPED", "start": None, "end": None}
+                    elif len(statuses) == len(deps):
+                        print(f"▶️ Scheduling stage: {stage}")
+                        running[pool.submit(timed, stage)] = stage
+                    else:
+                        continue
+                    del pending[stage]
+                    progressed = True
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                timings[running.pop(future)] = future.result()
+    return timings
+
+
+def critical_path(dag: dict, timings: dict):
+    """
+    The dependency chain with the largest total run time among the stages
+    that ran: (stages in order, seconds). This chain bounds the wall time no
+    matter how many stages run in parallel.
+    """
+    duration = {s: t["end"] - t["start"] for s, t in timings.items() if t["start"] is not None}
+    best = {}
+
+    def longest(stage):
+        if stage not in best:
+            upstream = max((longest(d) for d in dag[stage] if d in duration),
+                           key=lambda chain: chain[1], default=([], 0.0))
+            best[stage] = (upstream[0] + [stage], upstream[1] + duration[stage])
+        return best[stage]
+
+    return max((longest(s) for s in duration), key=lambda chain: chain[1], default=([], 0.0))
+
+
+def format_summary(dag: dict, timings: dict, wall: float) -> str:
+    origin = min((t["start"] for t in timings.values() if t["start"] is not None), default=0.0)
+    lines = ["=" * 60, "🗓️ SCHEDULE SUMMARY", "=" * 60]
+    for stage in dag:
+        t = timings.get(stage, {"status": "SKIPPED", "start": None})
+        if t["start"] is None:
+            lines.append(f" {stage:<12} {t['status']:<8}")
+        else:
+            lines.append(f" {stage:<12} {t['status']:<8} {t['start'] - origin:>8.1f}s → "
+                         f"{t['end'] - origin:>8.1f}s  ({t['end'] - t['start']:.1f}s)")
+    path, length = critical_path(dag, timings)
+    busy = sum(t["end"] - t["start"] for t in timings.values() if t["start"] is not None)
+    lines.append("-" * 60)
+    lines.append(f" Critical path: {' → '.join(path) or '-'} ({length:.1f}s)")
+    lines.append(f" Wall time: {wall:.1f}s, stage time: {busy:.1f}s "
+                 f"(parallelism {busy / wall if wall else 0:.2f}x)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import main as sprint
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+    from autopilot import Autopilot, DEFAULT_MAX_ITERATIONS
+
+    parser = argparse.ArgumentParser(description="Run several sprint stages concurrently")
+    parser.add_argument("--stages", nargs="+", help="Stages to run (default: every stage in the DAG)")
+    parser.add_argument("--dag", type=str, help='Dependency DAG, e.g. "data; features: data; strategy: features+modelling"')
+    parser.add_argument("--max-parallel", type=int, default=None, help="Stages running at once (default: no limit)")
+    parser.add_argument("--llm-rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE, help="LLM requests per minute across all stages")
+    parser.add_argument("--pool-size", type=int, default=1, help="Warm sandboxes kept ready between sprints")
+    parser.add_argument("--sandbox", choices=["e2b", "local"], default="e2b", help="Where code runs: E2B, or local processes")
+    parser.add_argument("--impact-tests", action="store_true", help="Only re-run tests affected by changed src modules")
+    parser.add_argument("--test-daemon", action="store_true", help="Run pytest in a warm, pre-imported worker inside the sandbox")
+    parser.add_argument("--async-graph", action="store_true", help="Run each stage's graph with ainvoke on async E2B/LLM clients")
+    parser.add_argument("--autopilot", action="store_true", help="Run every stage headless (auto-continue, auto-exit on green)")
+    parser.add_argument("--autopilot-budget", type=int, default=DEFAULT_MAX_ITERATIONS, help="Reviewer iterations per stage before the autopilot exits")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Bypass the on-disk cache of Architect/Tester/Reviewer responses")
+    args = parser.parse_args()
+
+    dag = parse_dag(args.dag) if args.dag else dict(STAGE_DEPENDENCIES)
+    if args.stages:
+        dag = select_stages(dag, args.stages)
+    validate_dag(dag, known=sprint.SPRINT_PROMPTS)
+
+    # One bucket for every stage's LLM calls
+    rate_limiter = InMemoryRateLimiter(requests_per_second=args.llm_rpm / 60,
+                                       check_every_n_seconds=0.1, max_bucket_size=1)
+    # Fan-in merges each stage's changes, so local sandboxes always sync by copy
+    pool = sprint.create_pool(args.sandbox, args.pool_size)
+    console_lock = threading.Lock()
+
+    def run_stage(stage):
+        return sprint.main(stage, impact_tests=args.impact_tests, test_daemon=args.test_daemon,
+                           llm_cache=not args.no_llm_cache, async_graph=args.async_graph,
+                           pool=pool, rate_limiter=rate_limiter, console_lock=console_lock, fan_in=True,
+                           autopilot=Autopilot(args.autopilot_budget) if args.autopilot else None)
+
+    start = time.monotonic()
+    timings = run_schedule(dag, run_stage, args.max_parallel)
+    print(format_summary(dag, timings, time.monotonic() - start))
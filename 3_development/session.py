@@ -0,0 +1,108 @@
+"""
+Bookkeeping for crash-safe, resumable development sprints.
+
+The graph state itself is checkpointed by SqliteSaver after every node. This
+module remembers which checkpoint thread and sandbox belong to an unfinished
+sprint, and rebuilds the sandbox workspace from the checkpointed state when
+the original sandbox has expired.
+"""
+import os
+import json
+import threading
+from datetime import datetime
+
+CHECKPOINT_DB = "development_session.sqlite"
+SESSION_FILE = ".dev_session.json"
+# Stages scheduled concurrently update the same session file
+_LOCK = threading.Lock()
+
+
+def new_thread_id(stage: str) -> str:
+    return f"{stage}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+
+
+def _load_all(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def load_session(stage: str, path: str = SESSION_FILE):
+    """Returns {"thread_id", "sandbox_id"} of the unfinished sprint for `stage`, or None."""
+    return _load_all(path).get(stage)
+
+
+def save_session(stage: str, path: str = SESSION_FILE, **fields):
+    with _LOCK:
+        sessions = _load_all(path)
+        sessions.setdefault(stage, {}).update(fields)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(sessions, f)
+
+
+def clear_session(stage: str, path: str = SESSION_FILE):
+    with _LOCK:
+        sessions = _load_all(path)
+        if sessions.pop(stage, None) is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(sessions, f)
+
+
+def retire_session(stage: str, pool, path: str = SESSION_FILE):
+    """
+    Forgets the unfinished sprint of `stage` before a fresh run replaces it,
+    returning the sandbox it kept alive for --resume to `pool` (which resets
+    and recycles it, or kills it if it is unhealthy). Returns the sandbox id,
+    or None if there was nothing to retire.
+    """
+    session = load_session(stage, path)
+    if not session:
+        return None
+    sandbox_id = session.get("sandbox_id")
+    if sandbox_id:
+        try:
+            sandbox = pool.backend.connect(sandbox_id)
+        except Exception:
+            sandbox = None  # Already expired
+        if sandbox is not None:
+            pool.release(sandbox)
+    clear_session(stage, path)
+    return sandbox_id
+
+
+def rebuilt_state_update():
+    """
+    State update for a sprint resumed on a rebuilt sandbox. The old sandbox's
+    workspace snapshots died with it and the new one numbers its own from #1
+    again, so the checkpointed records are dropped: a ROLLBACK or auto-rollback
+    would otherwise restore a different workspace under the same id.
+    """
+    return {"snapshots": []}
+
+
+def workspace_files(values: dict):
+    """
+    Files a fresh sandbox needs to continue from a checkpointed state: the
+    Architect's config, the Tester's scaffolding and every write_files call
+    the Developer made, in order (later writes win).
+    Files changed only through exec_python cannot be recovered this way.
+    """
+    stage = values.get("current_stage", "")
+    files = {}
+    if values.get("active_config"):
+        files[f"configs/{stage}.yaml"] = values["active_config"]
+    for suffix, key in (("mock_data.csv", "active_mock_data"), ("tests.py", "active_tests"),
+                        ("requirements.txt", "active_requirements")):
+        if values.get(key):
+            files[f"tester_outputs/{stage}_{suffix}"] = values[key]
+
+    for message in values.get("messages", []):
+        for call in getattr(message, "tool_calls", None) or []:
+            if call.get("name") == "write_files":
+                for f in call.get("args", {}).get("files", []):
+                    files[f["path"]] = f["content"]
+    return [{"path": p, "content": c} for p, c in files.items()]
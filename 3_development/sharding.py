@@ -0,0 +1,160 @@
+"""
+Duration-balanced pytest sharding.
+
+Collected test ids are split into shards by their historical duration
+(longest-processing-time first), each shard runs in its own pytest process,
+and the per-shard outputs, results and exit codes are merged into one report.
+
+Stdlib-only: the source is shipped into the sandbox with the runner script.
+"""
+import os
+import sys
+import json
+import tempfile
+import statistics
+import subprocess
+
+DURATIONS_FILE = ".test_durations.json"
+DEFAULT_DURATION = 1.0
+PYTEST_ARGS = ["-vv", "--import-mode=importlib", "-p", "no:cacheprovider"]
+
+# Written to disk (after the pytest_results source, which defines
+# ResultRecorder) and run once per shard
+SHARD_RUNNER = '''
+import sys
+import json
+import pytest
+
+with open(sys.argv[2]) as f:
+    nodeids = json.load(f)
+recorder = ResultRecorder()
+code = int(pytest.main(sys.argv[3:] + nodeids, plugins=[recorder]))
+with open(sys.argv[1], "w") as f:
+    json.dump({"exit_code": code, "results": recorder.results}, f)
+sys.exit(code)
+'''
+
+
+def collect_nodeids(targets):
+    """Returns the collected test ids, or None if collection itself failed."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q"] + PYTEST_ARGS[1:] + list(targets),
+        capture_output=True, text=True,
+    )
+    if proc.returncode not in (0, 5):
+        return None
+    return [line.strip() for line in proc.stdout.splitlines() if "::" in line and not line.startswith(" ")]
+
+
+def load_durations(path=DURATIONS_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def update_durations(results, path=DURATIONS_FILE):
+    durations = load_durations(path)
+    durations.update({n: r["duration"] for n, r in results.items() if r["outcome"] in ("passed", "failed")})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(durations, f)
+
+
+def split_shards(nodeids, durations, n):
+    """
+    Greedy longest-first split into at most `n` shards of similar total
+    duration. Unknown tests are assumed to take the median known duration.
+    Each shard keeps the original collection order.
+    """
+    known = [durations[i] for i in nodeids if i in durations]
+    default = statistics.median(known) if known else DEFAULT_DURATION
+    order = {nid: i for i, nid in enumerate(nodeids)}
+
+    shards = [[] for _ in range(max(1, n))]
+    loads = [0.0] * len(shards)
+    for nid in sorted(nodeids, key=lambda i: durations.get(i, default), reverse=True):
+        k = loads.index(min(loads))
+        shards[k].append(nid)
+        loads[k] += durations.get(nid, default)
+    return [sorted(s, key=order.get) for s in shards if s]
+
+
+def merge_exit_codes(codes):
+    """Worst code wins: internal/usage errors > failures > success; 5 only if all shards were empty."""
+    codes = [int(c) for c in codes]
+    if not codes:
+        return 5
+    serious = [c for c in codes if c not in (0, 1, 5)]
+    if serious:
+        return max(serious)
+    if 1 in codes:
+        return 1
+    return 5 if all(c == 5 for c in codes) else 0
+
+
+def run_shards(groups, recorder_source):
+    """
+    Runs each group in its own pytest process and merges the reports.
+    `recorder_source` is the pytest_results module source.
+    """
+    workdir = tempfile.mkdtemp(prefix="shards_")
+    runner = os.path.join(workdir, "shard_runner.py")
+    with open(runner, "w", encoding="utf-8") as f:
+        f.write(recorder_source + SHARD_RUNNER)
+
+    procs = []
+    for i, group in enumerate(groups):
+        ids_path = os.path.join(workdir, f"shard_{i}.ids.json")
+        out_path = os.path.join(workdir, f"shard_{i}.results.json")
+        log_path = os.path.join(workdir, f"shard_{i}.log")
+        with open(ids_path, "w", encoding="utf-8") as f:
+            json.dump(group, f)
+        log = open(log_path, "w", encoding="utf-8")
+        proc = subprocess.Popen(
+            [sys.executable, runner, out_path, ids_path] + PYTEST_ARGS,
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+        procs.append((proc, log, log_path, out_path, group))
+
+    outputs, codes, results = [], [], {}
+    for i, (proc, log, log_path, out_path, group) in enumerate(procs):
+        proc.wait()
+        log.close()
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            outputs.append(f"===== SHARD {i + 1}/{len(groups)} ({len(group)} tests) =====\n{f.read()}")
+        if os.path.exists(out_path):
+            with open(out_path, "r", encoding="utf-8") as f:
+                shard = json.load(f)
+            codes.append(shard["exit_code"])
+            results.update(shard["results"])
+        else:
+            codes.append(proc.returncode if proc.returncode else 3)
+
+    return {"exit_code": merge_exit_codes(codes), "output": "\n".join(outputs), "results": results}
+
+
+def run_sharded(targets, workers, recorder_source, nodeids=None, durations_path=DURATIONS_FILE, record=True):
+    """
+    Collects (unless `nodeids` is given), splits by duration into `workers`
+    shards, runs them concurrently and prints the merged report.
+    Returns the merged dict, or None if collection failed (the caller should
+    then fall back to a plain run so the collection errors get reported).
+    """
+    if nodeids is None:
+        nodeids = collect_nodeids(targets)
+        if nodeids is None:
+            return None
+
+    groups = split_shards(nodeids, load_durations(durations_path), workers)
+    if not groups:
+        return {"exit_code": 5, "output": "", "results": {}}
+
+    print(f"SHARDING: {len(nodeids)} tests across {len(groups)} workers")
+    merged = run_shards(groups, recorder_source)
+    if record:
+        update_durations(merged["results"], durations_path)
+    print(merged["output"])
+    return merged
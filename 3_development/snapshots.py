@@ -0,0 +1,104 @@
+"""
+Content-addressed snapshots of the sandbox workspace.
+
+Shipped into the sandbox (stdlib only) and run after every test run. File
+contents go into a shared object store named by their sha256, so a snapshot
+only writes the files that changed since any earlier snapshot; the snapshot
+itself is a {path: sha256} map plus the test outcome it was taken with.
+Restoring rewrites only the files that differ and removes files the
+snapshot did not have.
+"""
+import os
+import json
+import hashlib
+
+SNAPSHOT_DIR = ".snapshots"
+SNAPSHOT_FOLDERS = ("src", "tests")
+SKIP_DIRS = ("__pycache__", ".pytest_cache")
+
+
+def load_index(store=SNAPSHOT_DIR):
+    path = os.path.join(store, "index.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(index, store):
+    path = os.path.join(store, "index.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(path + ".tmp", path)
+
+
+def _workspace_files(folders):
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for name in sorted(filenames):
+                if not name.endswith(".pyc"):
+                    yield os.path.join(dirpath, name).replace(os.sep, "/")
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def take_snapshot(meta, folders=SNAPSHOT_FOLDERS, store=SNAPSHOT_DIR):
+    """Snapshots `folders`; `meta` (test outcome etc.) is stored with it. Returns the record without its file map."""
+    objects = os.path.join(store, "objects")
+    os.makedirs(objects, exist_ok=True)
+    files, new_objects = {}, 0
+    for path in _workspace_files(folders):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        blob = os.path.join(objects, digest)
+        if not os.path.exists(blob):
+            with open(blob, "wb") as f:
+                f.write(data)
+            new_objects += 1
+        files[path] = digest
+
+    index = load_index(store)
+    previous = index[-1]["files"] if index else {}
+    changed = sum(1 for p, d in files.items() if previous.get(p) != d) + sum(1 for p in previous if p not in files)
+    record = dict(meta, id=len(index) + 1, files=files, changed=changed, new_objects=new_objects)
+    index.append(record)
+    _save_index(index, store)
+    return {k: v for k, v in record.items() if k != "files"}
+
+
+def restore_snapshot(snapshot_id, folders=SNAPSHOT_FOLDERS, store=SNAPSHOT_DIR):
+    """Puts `folders` back exactly as they were in snapshot `snapshot_id`."""
+    record = next((r for r in load_index(store) if r["id"] == snapshot_id), None)
+    if record is None:
+        raise ValueError(f"No snapshot #{snapshot_id}")
+    files = record["files"]
+    removed = 0
+    for path in list(_workspace_files(folders)):
+        if path not in files:
+            os.remove(path)
+            removed += 1
+    restored = 0
+    for path, digest in files.items():
+        if os.path.exists(path) and _digest(path) == digest:
+            continue
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(os.path.join(store, "objects", digest), "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+        restored += 1
+    return {"id": snapshot_id, "restored": restored, "removed": removed}
+
+
+def best_snapshot(records):
+    """The snapshot with the most passing tests (the latest one on ties), or None."""
+    return max(records, key=lambda r: (r.get("passed", 0), r["id"]), default=None)
+
+
+def regressions(best, test_results):
+    """Tests that passed in `best` but fail or error in `test_results`."""
+    broken = {t["nodeid"] for t in test_results.get("tests", []) if t.get("outcome") in ("failed", "error")}
+    return sorted(broken & set(best.get("passed_ids", [])))
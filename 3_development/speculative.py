@@ -0,0 +1,67 @@
+"""
+Speculative best-of-N Developer iterations.
+
+Instead of one candidate fix per iteration, N candidates are developed at
+the same time, each in its own sandbox leased from the pool and mirrored
+from the primary workspace. Every candidate runs its own tool loop and then
+the test suite; the candidate with the most passing tests wins (ties go to
+the shorter test runtime, then to the lower-temperature candidate) and its
+workspace is mirrored back into the primary sandbox.
+Candidates differ by sampling temperature; candidate 0 is the usual
+deterministic Developer.
+"""
+from tool_executor import ConcurrentToolNode, DEFAULT_TOOL_CONCURRENCY
+
+DEFAULT_CANDIDATES = 1
+TEMPERATURE_STEP = 0.4
+MAX_TEMPERATURE = 1.0
+# Same cap as the graph's Developer tool loop (workflow.should_continue)
+CANDIDATE_MAX_TURNS = 5
+
+
+def candidate_temperature(index: int) -> float:
+    return min(MAX_TEMPERATURE, index * TEMPERATURE_STEP)
+
+
+def diversify(llm, index: int):
+    """A copy of the chat model sampling at the candidate's temperature."""
+    if index == 0 or not hasattr(llm, "model_copy"):
+        return llm
+    return llm.model_copy(update={"temperature": candidate_temperature(index)})
+
+
+def candidate_score(test_results):
+    """Sort key: more passed tests first, then shorter runtime."""
+    if not test_results:
+        return (-1, 0.0)
+    summary = test_results.get("summary", {})
+    return (summary.get("passed", 0), -summary.get("duration", 0.0))
+
+
+def pick_best(candidates):
+    """
+    Index of the winning candidate among [{"test_results": ...} or None], or
+    None when every candidate failed. Earlier (cooler) candidates win ties.
+    """
+    scored = [(candidate_score(c["test_results"]), -i) for i, c in enumerate(candidates) if c]
+    if not scored:
+        return None
+    return -max(scored)[1]
+
+
+def develop_candidate(llm, messages, tools, max_turns=CANDIDATE_MAX_TURNS,
+                      tool_concurrency=DEFAULT_TOOL_CONCURRENCY):
+    """
+    Runs one Developer tool loop outside the graph: LLM turn, tool calls,
+    repeat until the LLM stops calling tools. Returns the new messages.
+    """
+    llm_with_tools = llm.bind_tools(list(tools.values()))
+    tool_node = ConcurrentToolNode(list(tools.values()), tool_concurrency)
+    transcript = []
+    for _ in range(max_turns):
+        response = llm_with_tools.invoke(list(messages) + transcript)
+        transcript.append(response)
+        if not response.tool_calls:
+            break
+        transcript += tool_node({"messages": [response]})["messages"]
+    return transcript
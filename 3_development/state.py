@@ -15,4 +15,24 @@ class AgentState(TypedDict):
     human_instruction: str
     tool_loop_count: int
     metadata: dict
-    last_test_output: str
\ No newline at end of file
+    last_test_output: str
+    test_results: dict         # Structured pytest records: exit_code, summary, tests
+    snapshots: List[dict]      # Workspace snapshots taken after each test run
+
+def new_sprint_state(stage: str) -> AgentState:
+    """The starting point for every fresh run of a stage."""
+    return AgentState(
+        current_stage=stage,
+        messages=[],
+        iteration_count=0,
+        active_failures=[],
+        tool_loop_count=0,
+        active_plan="",
+        active_config="",
+        active_mock_data="",
+        active_tests="",
+        active_requirements="",
+        human_instruction="",
+        test_results={},
+        snapshots=[]
+    )
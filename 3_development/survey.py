@@ -0,0 +1,206 @@
+"""
+Codebase survey for the Architect.
+
+Stdlib-only: the same code runs locally (pipelined start-up) or is shipped
+into the sandbox by architect_node.
+
+Files are content-hashed and the hashes cached between runs. Full bodies
+are only sent for files that are new/changed or relevant to the stage, and
+only while they fit in the token budget; everything else is summarised as
+an AST-derived outline (classes, signatures, constants) or its config keys.
+The rendered text therefore changes between runs over the same tree; the
+FINGERPRINT line (file listing plus content hashes) does not, and is what the
+Architect's response cache is keyed on. A file only counts as seen once its full body was sent: a change that did
+not fit the budget is still "changed" on the next run.
+"""
+import os
+import re
+import ast
+import json
+import hashlib
+import tempfile
+
+SURVEY_EXTENSIONS = (".py", ".yaml", ".yml")
+DEFAULT_TOKEN_BUDGET = 40000
+CHARS_PER_TOKEN = 4
+FINGERPRINT_RE = re.compile(r"^FINGERPRINT: ([0-9a-f]{64})$", re.MULTILINE)
+
+
+def get_structure(path):
+    if not os.path.exists(path):
+        return []
+    return [os.path.join(dp, f) for dp, dn, filenames in os.walk(path) for f in filenames]
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _docline(node):
+    doc = ast.get_docstring(node)
+    return f"  # {doc.strip().splitlines()[0]}" if doc else ""
+
+
+def _signature(node, indent=""):
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}{_docline(node)}"
+
+
+def outline_python(source):
+    """Returns imports, constants, classes and function signatures of a module."""
+    tree = ast.parse(source)
+    lines = []
+    imports = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append(f"{'.' * node.level}{node.module or ''}:{','.join(a.name for a in node.names)}")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            lines.append(_signature(node))
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            lines.append(f"class {node.name}({bases}){_docline(node)}")
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    lines.append(_signature(item, indent="    "))
+                elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                    lines.append(f"    {item.target.id}: {ast.unparse(item.annotation)}")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for t in targets:
+                if isinstance(t, ast.Name) and t.id.isupper():
+                    lines.append(f"{t.id} = ...")
+    if imports:
+        lines.insert(0, f"imports: {', '.join(imports)}")
+    return "\n".join(lines)
+
+
+def outline_yaml(source):
+    """Returns top-level config keys with their immediate child keys."""
+    keys = {}
+    current = None
+    for line in source.splitlines():
+        match = re.match(r"^( *)([A-Za-z0-9_.\-]+)\s*:", line)
+        if not match:
+            continue
+        if not match.group(1):
+            current = match.group(2)
+            keys[current] = []
+        elif current is not None and len(keys[current]) < 20:
+            keys[current].append(match.group(2))
+    return "\n".join(f"{k}: [{', '.join(v)}]" if v else k for k, v in keys.items())
+
+
+def outline_file(path, source):
+    try:
+        if path.endswith(".py"):
+            return outline_python(source)
+        return outline_yaml(source)
+    except SyntaxError as e:
+        return f"(unparseable: {e.msg} on line {e.lineno})"
+
+
+def _save_cache(cache_path, hashes):
+    # Temp file + rename: a concurrent reader never sees a half-written cache
+    fd, tmp = tempfile.mkstemp(prefix=".survey_cache.", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(cache_path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+        os.replace(tmp, cache_path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def survey_fingerprint(survey_text):
+    """The tree fingerprint of a survey_codebase result, or None."""
+    match = FINGERPRINT_RE.search(survey_text or "")
+    return match.group(1) if match else None
+
+
+def _is_relevant(display, stage):
+    if not stage:
+        return False
+    parts = re.split(r"[/._\-]", display.lower())
+    return stage.lower() in parts
+
+
+def survey_codebase(roots, stage=None, cache_path=None, token_budget=None):
+    """
+    Surveys every source/config file under `roots` ({display prefix: directory})
+    and returns the text in the STRUCTURE_START / CONTENTS_START format the
+    Architect expects, followed by an OUTLINES_START section.
+
+    - cache_path: JSON file with the hashes of the file bodies sent so far;
+      one per stage, since concurrently scheduled stages survey independently.
+    - token_budget: max estimated tokens spent on full bodies (None = unlimited).
+    """
+    previous = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+
+    # 1. Index the tree
+    listing = {}
+    files = {}
+    for prefix, folder in roots.items():
+        listing[prefix] = []
+        for full in sorted(get_structure(folder)):
+            if "__pycache__" in full:
+                continue
+            rel = os.path.relpath(full, folder).replace(os.sep, "/")
+            display = f"{prefix}/{rel}"
+            listing[prefix].append(display)
+            if not full.endswith(SURVEY_EXTENSIONS):
+                continue
+            try:
+                with open(full, "r", encoding="utf-8") as f:
+                    files[display] = f.read()
+            except (OSError, UnicodeDecodeError):
+                pass
+
+    hashes = {p: hashlib.sha256(s.encode("utf-8")).hexdigest() for p, s in files.items()}
+    fingerprint = hashlib.sha256(json.dumps([listing, hashes], sort_keys=True).encode("utf-8")).hexdigest()
+    changed = {p for p in files if previous.get(p) != hashes[p]}
+    relevant = {p for p in files if _is_relevant(p, stage)}
+
+    # 2. Spend the budget: changed+relevant first, then relevant, then changed
+    candidates = sorted(
+        changed | relevant,
+        key=lambda p: (not (p in changed and p in relevant), p not in relevant, len(files[p]), p),
+    )
+    contents = {}
+    remaining = token_budget
+    for path in candidates:
+        cost = estimate_tokens(files[path])
+        if remaining is not None and cost > remaining:
+            continue
+        contents[path] = files[path]
+        if remaining is not None:
+            remaining -= cost
+
+    outlines = {p: outline_file(p, files[p]) for p in sorted(files) if p not in contents}
+
+    if cache_path:
+        # Outlined files keep the hash the Architect last saw in full (if any)
+        seen = {p: previous[p] for p in files if p in previous and p not in contents}
+        seen.update({p: hashes[p] for p in contents})
+        _save_cache(cache_path, seen)
+
+    outline_text = "\n".join(f"## {p} ({'changed' if p in changed else 'unchanged'})\n{o}" for p, o in outlines.items())
+    return (
+        f"FINGERPRINT: {fingerprint}\n"
+        "STRUCTURE_START\n"
+        f"FILES: {listing.get('src', [])}\n"
+        f"CONFIGS: {listing.get('configs', [])}\n"
+        "CONTENTS_START\n"
+        f"{contents}\n"
+        "OUTLINES_START\n"
+        f"{outline_text}\n"
+    )
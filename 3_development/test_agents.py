@@ -0,0 +1,272 @@
+"""
+Node-level tests for the agents, with stub LLMs and a LocalSandbox.
+
+Run with:
+    pytest test_agents.py -v
+"""
+
+import queue
+import pytest
+from types import SimpleNamespace
+from langchain_core.messages import AIMessage, ToolMessage
+from agents import (developer_node, human_node, reviewer_node, speculative_developer_node,
+                    _parse_snapshot, _snapshot_script)
+from autopilot import Autopilot, CONTINUE_INSTRUCTION
+from context_budget import TEST_REPORT_MARKER, is_blueprint
+from output_schema import ReviewerOutput
+from local_sandbox import LocalSandbox
+from sandbox_pool import ShardSandboxes
+from session import rebuilt_state_update, workspace_files
+from tools import create_tools
+
+
+def _results(passed):
+    return {"exit_code": 0, "summary": {"passed": passed, "failed": 0, "error": 0}, "tests": []}
+
+
+def _snapshot(tools, state, passed):
+    return _parse_snapshot(tools["exec_python"].invoke({"code": _snapshot_script(state, _results(passed))}))
+
+
+def _write_call(path, content):
+    return AIMessage(content="", tool_calls=[{"name": "write_files", "id": "w",
+                                              "args": {"files": [{"path": path, "content": content}]}}])
+
+
+def _tool_turn(i, output):
+    return [AIMessage(content="", tool_calls=[{"name": "run_code", "id": f"r{i}", "args": {"code": str(i)}}]),
+            ToolMessage(content=output, tool_call_id=f"r{i}")]
+
+
+def _pilot(*instructions):
+    answers = queue.Queue()
+    for text in instructions:
+        answers.put(text)
+    return Autopilot(instructions=answers)
+
+
+class StubLLM:
+    """Answers every request with `response` and keeps the requests it saw."""
+
+    model = "stub"
+    temperature = 0
+
+    def __init__(self, response=None):
+        self.response = response
+        self.requests = []
+
+    def with_structured_output(self, schema):
+        return self
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages):
+        self.requests.append(messages)
+        return self.response
+
+
+class CandidateLLM:
+    """Writes src/calc.py: a wrong add() at temperature 0, the right one when sampled warmer."""
+
+    model = "stub"
+
+    def __init__(self, temperature=0.0):
+        self.temperature = temperature
+
+    def model_copy(self, update):
+        return CandidateLLM(update["temperature"])
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages):
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content="done")
+        body = "a + b" if self.temperature > 0 else "a - b"
+        return _write_call("src/calc.py", f"def add(a, b):\n    return {body}\n")
+
+
+@pytest.fixture
+def make_sandbox(tmp_path):
+    sandboxes = []
+
+    def make(name):
+        sandbox = LocalSandbox(str(tmp_path / name))
+        sandboxes.append(sandbox)
+        return sandbox, create_tools(sandbox)
+
+    yield make
+    for sandbox in sandboxes:
+        sandbox.kill()
+
+
+class TestHumanRollback:
+    """Test suite for ROLLBACK in human_node."""
+
+    def test_rollback_restores_the_snapshot(self, make_sandbox):
+        sandbox, tools = make_sandbox("box")
+        state = {"iteration_count": 0, "snapshots": [], "messages": []}
+        sandbox.files.write("src/model.py", "v1")
+        state["snapshots"].append(_snapshot(tools, state, 3))
+        sandbox.files.write("src/model.py", "v2")
+        state["snapshots"].append(_snapshot(tools, {**state, "iteration_count": 1}, 1))
+
+        update = human_node(state, tools=tools, autopilot=_pilot("ROLLBACK 1"))
+        assert sandbox.files.read("src/model.py") == "v1"
+        assert "snapshot #1" in update["human_instruction"]
+
+    def test_unknown_snapshot_asks_again(self, make_sandbox):
+        sandbox, tools = make_sandbox("box")
+        state = {"iteration_count": 0, "snapshots": [], "messages": []}
+        sandbox.files.write("src/model.py", "v1")
+        state["snapshots"].append(_snapshot(tools, state, 1))
+
+        update = human_node(state, tools=tools, autopilot=_pilot("ROLLBACK 7", "EXIT"))
+        assert update["human_instruction"] == "EXIT_SIGNAL"
+
+    def test_bare_rollback_takes_the_best_snapshot_after_a_bad_id(self, make_sandbox):
+        sandbox, tools = make_sandbox("box")
+        state = {"iteration_count": 0, "snapshots": [], "messages": []}
+        for i, (content, passed) in enumerate((("v1", 3), ("v2", 1))):
+            sandbox.files.write("src/model.py", content)
+            state["snapshots"].append(_snapshot(tools, {**state, "iteration_count": i}, passed))
+
+        update = human_node(state, tools=tools, autopilot=_pilot("ROLLBACK latest", "ROLLBACK"))
+        assert sandbox.files.read("src/model.py") == "v1"
+        assert "snapshot #1" in update["human_instruction"]
+
+        # Any other instruction leaves the loop and the workspace alone
+        update = human_node(state, tools=tools, autopilot=_pilot("Rename fit to train"))
+        assert update["human_instruction"] == "Rename fit to train"
+        assert sandbox.files.read("src/model.py") == "v1"
+
+    def test_rollback_after_rebuild_uses_the_new_sandbox_ids(self, make_sandbox):
+        """Snapshots of an expired sandbox are dropped, so #1 means the rebuilt sandbox's #1."""
+        old, old_tools = make_sandbox("old")
+        state = {"iteration_count": 0, "snapshots": [], "messages": [], "current_stage": "data"}
+        for i, content in enumerate(("v1", "v2")):
+            old_tools["write_files"].invoke({"files": [{"path": "src/model.py", "content": content}]})
+            state["snapshots"].append(_snapshot(old_tools, {**state, "iteration_count": i}, 1))
+        old.kill()
+
+        # Resume on a fresh sandbox rebuilt from the checkpointed writes (v2)
+        new, new_tools = make_sandbox("new")
+        state["messages"] = [_write_call("src/model.py", "v2")]
+        new_tools["write_files"].invoke({"files": workspace_files(state)})
+        state.update(rebuilt_state_update())
+        state["iteration_count"] = 5
+        state["snapshots"] = state["snapshots"] + [_snapshot(new_tools, state, 2)]
+        new.files.write("src/model.py", "v3")
+
+        assert [r["id"] for r in state["snapshots"]] == [1]
+        update = human_node(state, tools=new_tools, autopilot=_pilot("ROLLBACK 1"))
+        assert new.files.read("src/model.py") == "v2"
+        assert "iteration 6" in update["human_instruction"]
+
+
+
+class TestHumanContinue:
+    """Test suite for CONTINUE in human_node."""
+
+    def test_continue_sends_an_explicit_instruction(self):
+        """The Developer never gets an empty HumanMessage, from the autopilot or an old recording."""
+        state = {"iteration_count": 1, "messages": [],
+                 "test_results": {"exit_code": 1, "summary": {"passed": 1, "failed": 1, "error": 0}}}
+        for pilot in (Autopilot(), _pilot("")):
+            update = human_node(state, autopilot=pilot)
+            assert update["messages"][0].content == CONTINUE_INSTRUCTION
+            assert update["human_instruction"] == CONTINUE_INSTRUCTION
+
+
+
+class TestReviewer:
+    """Test suite for reviewer_node."""
+
+    def test_green_run_skips_the_llm(self):
+        llm = StubLLM()
+        state = {"iteration_count": 2, "messages": [AIMessage(content="3 passed")], "test_results": _results(3)}
+        update = reviewer_node(state, llm, "You are the Reviewer.", tools=None)
+        assert llm.requests == []
+        assert update["iteration_count"] == 3 and update["active_failures"] == []
+        assert update["messages"][0].content.startswith("REVIEWER SUMMARY:")
+
+    def test_failing_run_sends_the_digest(self):
+        traceback = 'src/model.py:12: in fit\n    raise KeyError("team")\nE   KeyError: \'team\'\n'
+        records = [{"nodeid": f"tests/test_model.py::test_{i}", "outcome": "failed", "traceback": traceback}
+                   for i in range(3)]
+        state = {"iteration_count": 0, "messages": [AIMessage(content="3 failed")],
+                 "test_results": {"exit_code": 1, "summary": {"passed": 0, "failed": 3, "error": 0},
+                                  "tests": records}}
+        llm = StubLLM(ReviewerOutput(summary="KeyError in fit", developer_priority_instructions="fix fit",
+                                     can_proceed_to_next_stage=False))
+        update = reviewer_node(state, llm, "You are the Reviewer.", tools=None)
+        assert len(llm.requests) == 1
+        prompt = llm.requests[0][-1].content
+        # Three identical failures, one group
+        assert prompt.count("src/model.py:12") == 1 and "test_2" in prompt
+        assert update["messages"][0].content.startswith("REVIEWER SUMMARY: KeyError in fit")
+
+
+
+class TestDeveloperContext:
+    """Test suite for the pinned blueprint and history compaction in developer_node."""
+
+    STATE = {"current_stage": "features", "active_plan": "PLAN " * 50, "active_config": "a: 1",
+             "active_mock_data": "x,y", "active_tests": "def test_x(): pass", "messages": []}
+
+    def test_blueprint_is_pinned_once_and_history_compacted(self, make_sandbox):
+        _, tools = make_sandbox("box")
+        llm = StubLLM(AIMessage(content="done"))
+        first = developer_node(self.STATE, llm, "You are the Developer.", tools)
+        blueprint = first["messages"][0]
+        assert is_blueprint(blueprint) and "PLAN" in blueprint.content and first["messages"][1].content == "done"
+
+        history = ([blueprint] + _tool_turn(1, "old output " * 400)
+                   + [AIMessage(content=f"{TEST_REPORT_MARKER}: 3 failed")] + _tool_turn(2, "new output " * 400))
+        update = developer_node({**self.STATE, "messages": history}, llm, "You are the Developer.", tools)
+        request = llm.requests[-1]
+        # Sent once: the stored update does not repeat it, the request carries the pinned copy
+        assert update["messages"] == [llm.response]
+        assert sum(is_blueprint(m) for m in request) == 1 and is_blueprint(request[1])
+        assert not any(TEST_REPORT_MARKER in str(m.content) for m in request)
+        outputs = [m.content for m in request if isinstance(m, ToolMessage)]
+        assert outputs[0].startswith("[stale tool output elided") and outputs[1] == "new output " * 400
+
+    def test_tight_budget_drops_old_turns_but_keeps_the_blueprint(self, make_sandbox):
+        _, tools = make_sandbox("box")
+        llm = StubLLM(AIMessage(content="done"))
+        blueprint = developer_node(self.STATE, llm, "You are the Developer.", tools)["messages"][0]
+        history = [blueprint] + [m for i in range(20) for m in _tool_turn(i, "x" * 150)]
+
+        developer_node({**self.STATE, "messages": history}, llm, "You are the Developer.", tools, context_budget=700)
+        request = llm.requests[-1]
+        calls = [m.tool_calls[0]["id"] for m in request if isinstance(m, AIMessage) and m.tool_calls]
+        assert is_blueprint(request[1])
+        assert calls and calls[-1] == "r19" and "r0" not in calls
+
+
+
+class TestSpeculativeDeveloper:
+    """Test suite for promoting the speculative winner in speculative_developer_node."""
+
+    def test_winner_is_promoted_into_the_primary_sandbox(self, make_sandbox):
+        primary, tools = make_sandbox("primary")
+        primary.files.write("tests/test_calc.py", "from calc import add\n\n"
+                            "def test_add():\n    assert add(1, 2) == 3\n\n"
+                            "def test_zero():\n    assert add(0, 0) == 0\n")
+        pool = SimpleNamespace(acquire=lambda: make_sandbox("spare")[0])
+        spares = ShardSandboxes(pool, primary, 1).acquire()
+        state = {"current_stage": "features", "messages": [], "iteration_count": 0}
+
+        update = speculative_developer_node(state, CandidateLLM(), "You are the Developer.", tools,
+                                            spares=spares, make_tools=create_tools)
+        assert update["test_results"]["summary"]["passed"] == 2
+        assert "candidate 2/2 promoted" in update["messages"][-1].content
+        assert "a + b" in primary.files.read("src/calc.py")
+        # The spare got the primary's tests before developing
+        assert "test_zero" in spares.sandboxes[0].files.read("tests/test_calc.py")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
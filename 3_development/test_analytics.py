@@ -0,0 +1,126 @@
+"""
+Unit tests for the cross-sprint analytics store.
+
+Run with:
+    pytest test_analytics.py -v
+"""
+
+import os
+import pytest
+from pathlib import Path
+from logger import SprintLogger
+from analytics import (
+    connect, failure_types, format_report, ingest, iterations, parse_log, regressions, time_to_green,
+)
+
+
+def _run(passed, failed, failing=()):
+    tests = [{"nodeid": n, "outcome": "failed", "duration": 0.1} for n in failing]
+    return {"exit_code": 0 if failed == 0 else 1,
+            "summary": {"passed": passed, "failed": failed, "error": 0, "skipped": 0, "duration": 1.0},
+            "tests": tests}
+
+
+def _sprint(log_dir, timestamp, stage, runs, status="SUCCESS"):
+    """Writes a real SprintLogger log, renamed to `timestamp`."""
+    logger = SprintLogger(stage, log_dir=str(log_dir))
+    logger.sprint_start()
+    for results in runs:
+        logger.agent_start("test_runner")
+        logger.test_results(results)
+        if results["exit_code"]:
+            failures = [{"file_path": "src/features.py", "failure_type": "KeyError",
+                         "root_cause": "missing column", "actionable_fix": "rename"}]
+            logger.reviewer_feedback("1 issue", failures, "Fix the column first")
+    if status:
+        logger.sprint_end(status)
+    logger.close()
+    target = log_dir / f"{timestamp}_{stage}_sprint.log"
+    os.replace(logger.get_log_file(), target)
+    return target
+
+
+class TestAnalytics:
+    """Test suite for log parsing, ingestion and the reports."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        _sprint(tmp_path, "2026-01-01_10-00-00", "features",
+                [_run(3, 2, ["tests/t.py::a", "tests/t.py::b"]), _run(5, 0)])
+        _sprint(tmp_path, "2026-01-02_10-00-00", "features",
+                [_run(4, 1, ["tests/t.py::c"])], status=None)
+        _sprint(tmp_path, "2026-01-02_11-00-00", "data", [_run(2, 0)])
+        assert ingest(tmp_path) == 3
+        db = connect(tmp_path / "sprint_analytics.sqlite")
+        yield tmp_path, db
+        db.close()
+
+    def test_parse_log(self, tmp_path):
+        path = _sprint(tmp_path, "2026-01-01_10-00-00", "model_v2", [_run(1, 1, ["tests/t.py::x"]), _run(2, 0)])
+        parsed = parse_log(path)
+        assert parsed["sprint"]["stage"] == "model_v2"
+        assert parsed["sprint"]["iterations"] == 2 and parsed["sprint"]["status"] == "SUCCESS"
+        assert parsed["sprint"]["time_to_green_s"] is not None
+        assert parsed["failing_tests"] == [{"seq": 1, "nodeid": "tests/t.py::x", "outcome": "failed"}]
+        assert parsed["review_failures"] == [{"seq": 1, "failure_type": "KeyError", "file_path": "src/features.py"}]
+
+    def test_ingest_is_incremental(self, store):
+        log_dir, _ = store
+        assert ingest(log_dir) == 0
+
+    def test_reports(self, store):
+        _, db = store
+        green = time_to_green(db)
+        assert green["features"]["sprints"] == 2 and green["features"]["green"] == 1
+        assert [row[2] for row in iterations(db, "features")] == [2, 1]
+        assert failure_types(db) == [("KeyError", 2)]
+
+        found = regressions(db)
+        assert len(found) == 1
+        assert (found[0]["passed_before"], found[0]["passed_after"]) == (5, 4)
+        assert found[0]["newly_failing"] == ["tests/t.py::c"]
+
+        report = format_report(db, "features")
+        assert "TIME TO GREEN" in report and "UNFINISHED" in report and "tests/t.py::c" in report
+
+    def test_rotated_segments_belong_to_one_sprint(self, tmp_path):
+        """A sprint split by size rotation is ingested whole, and stays whole after another rotation."""
+        logger = SprintLogger("features", log_dir=str(tmp_path), queued=True, max_bytes=300, backup_count=50)
+        logger.sprint_start()
+        for results in [_run(1, 1, ["tests/t.py::a"])] * 3 + [_run(2, 0)] * 3:
+            logger.test_results(results)
+        logger.sprint_end("SUCCESS")
+        logger.close()
+        base = Path(logger.get_log_file())
+        assert Path(f"{base}.1").exists()
+        assert ingest(tmp_path) == 1
+
+        # Rotate once more by hand: the live file starts over empty
+        backups = sorted(tmp_path.glob(base.name + ".*"), key=lambda p: -int(p.suffix[1:]))
+        for backup in backups:
+            os.replace(backup, f"{base}.{int(backup.suffix[1:]) + 1}")
+        os.replace(base, f"{base}.1")
+        base.write_text("")
+        assert ingest(tmp_path) == 1
+
+        db = connect(tmp_path / "sprint_analytics.sqlite")
+        try:
+            assert [row[2:4] for row in iterations(db)] == [(6, "SUCCESS")]
+            assert time_to_green(db)["features"]["green"] == 1
+        finally:
+            db.close()
+
+    def test_smaller_selection_is_not_a_regression(self, tmp_path):
+        """An impact-selected run passing fewer tests, with nothing newly failing, is fine."""
+        _sprint(tmp_path, "2026-01-01_10-00-00", "features", [_run(10, 0), _run(2, 0), _run(1, 1, ["tests/t.py::a"])])
+        ingest(tmp_path)
+        db = connect(tmp_path / "sprint_analytics.sqlite")
+        try:
+            found = regressions(db)
+            assert [r["newly_failing"] for r in found] == [["tests/t.py::a"]]
+        finally:
+            db.close()
+
+    def test_empty_run_is_not_green(self, tmp_path):
+        path = _sprint(tmp_path, "2026-01-01_10-00-00", "features", [_run(0, 0)])
+        assert parse_log(path)["sprint"]["time_to_green_s"] is None
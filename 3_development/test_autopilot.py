@@ -0,0 +1,71 @@
+"""
+Unit tests for the headless autopilot policy.
+
+Run with:
+    pytest test_autopilot.py -v
+"""
+
+import time
+import queue
+import threading
+import pytest
+from autopilot import Autopilot, CONTINUE_INSTRUCTION
+
+FAILING = {"test_results": {"exit_code": 1}, "iteration_count": 1}
+GREEN = {"test_results": {"exit_code": 0, "summary": {"passed": 3, "failed": 0, "error": 0}}}
+
+
+class TestAutopilot:
+    """Test suite for Autopilot.decide."""
+
+    def test_exits_on_green(self):
+        assert Autopilot().decide(GREEN)[0] == "EXIT"
+
+    def test_empty_or_skipped_run_does_not_exit(self):
+        """Exit code 0 without a single passing test is not a reason to stop."""
+        pilot = Autopilot(max_iterations=3)
+        empty = {"test_results": {"exit_code": 0, "tests": []}, "iteration_count": 1}
+        skipped = {"test_results": {"exit_code": 0, "summary": {"passed": 0, "failed": 0, "error": 0, "skipped": 2}},
+                   "iteration_count": 1}
+        assert pilot.decide(empty)[0] == CONTINUE_INSTRUCTION
+        assert pilot.decide(skipped)[0] == CONTINUE_INSTRUCTION
+
+    def test_continues_on_failure_until_budget(self):
+        pilot = Autopilot(max_iterations=3)
+        assert pilot.decide(FAILING)[0] == CONTINUE_INSTRUCTION
+        text, reason = pilot.decide({**FAILING, "iteration_count": 3})
+        assert text == "EXIT" and "budget" in reason
+
+    def test_default_action_exit(self):
+        assert Autopilot(default_action="exit").decide(FAILING)[0] == "EXIT"
+        with pytest.raises(ValueError):
+            Autopilot(default_action="retry")
+
+    def test_instructions_file_is_read_incrementally(self, tmp_path):
+        path = tmp_path / "instructions.txt"
+        path.write_text("# operator notes\nCheck the date parsing\n\n", encoding="utf-8")
+        pilot = Autopilot(instructions_file=str(path))
+
+        assert pilot.decide(FAILING) == ("Check the date parsing", "operator instruction")
+        assert pilot.decide(FAILING)[0] == CONTINUE_INSTRUCTION
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("ROLLBACK 2\n")
+        assert pilot.decide(FAILING)[0] == "ROLLBACK 2"
+
+    def test_operator_instruction_beats_green(self):
+        instructions = queue.Queue()
+        instructions.put("Add one more edge-case test")
+        pilot = Autopilot(instructions=instructions)
+        assert pilot.decide(GREEN)[0] == "Add one more edge-case test"
+
+    def test_waits_for_instruction_until_timeout(self):
+        instructions = queue.Queue()
+        pilot = Autopilot(instructions=instructions, timeout=5)
+        threading.Timer(0.2, instructions.put, ["Use the cached fixtures"]).start()
+
+        start = time.monotonic()
+        assert pilot.decide(FAILING)[0] == "Use the cached fixtures"
+        assert time.monotonic() - start < 4
+
+        pilot.timeout = 0.1
+        assert pilot.decide(FAILING)[0] == CONTINUE_INSTRUCTION
@@ -0,0 +1,58 @@
+"""
+Unit tests for the Developer's token-budgeted history compaction.
+
+Run with:
+    pytest test_context_budget.py -v
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from context_budget import (
+    BLUEPRINT_HEADER, compact_history, estimate_tokens, is_blueprint, is_test_report,
+)
+
+
+def _tool_turn(call_id, output):
+    call = AIMessage(content="", tool_calls=[{"name": "exec_python", "args": {"code": "print(1)"}, "id": call_id}])
+    return [call, ToolMessage(content=output, tool_call_id=call_id, name="exec_python")]
+
+
+class TestContextBudget:
+    """Test suite for compact_history."""
+
+    def test_test_reports_are_removed(self):
+        history = [AIMessage(content="### ❌ SANDBOX TEST RESULTS (FAILURE)\n\n" + "x" * 500),
+                   AIMessage(content="Reviewer found 1 issue.")]
+        compacted, _ = compact_history(history, budget=10000)
+        assert not any(is_test_report(m) for m in compacted)
+        assert compacted[-1].content == "Reviewer found 1 issue."
+
+    def test_only_latest_tool_turn_keeps_full_output(self):
+        history = _tool_turn("a", "old " * 500) + _tool_turn("b", "new " * 500)
+        compacted, _ = compact_history(history, budget=100000)
+        assert compacted[1].content.startswith("[stale tool output elided")
+        assert compacted[1].tool_call_id == "a"
+        assert compacted[3].content == "new " * 500
+
+    def test_drops_oldest_turns_but_keeps_blueprint(self):
+        blueprint = HumanMessage(content=BLUEPRINT_HEADER + "\n" + "plan " * 200)
+        history = [AIMessage(content="architect " * 300), blueprint]
+        for i in range(5):
+            history += _tool_turn(f"c{i}", "out " * 100)
+        compacted, stats = compact_history(history, budget=estimate_tokens([blueprint]) + 150)
+
+        assert any(is_blueprint(m) for m in compacted)
+        assert stats["dropped"] > 0
+        assert stats["tokens"] < stats["original_tokens"]
+        assert compacted[-1].tool_call_id == "c4"
+        # Tool results are never separated from the call that produced them
+        for i, m in enumerate(compacted):
+            if isinstance(m, ToolMessage):
+                assert any(isinstance(p, AIMessage) and p.tool_calls and
+                           p.tool_calls[0]["id"] == m.tool_call_id for p in compacted[:i])
+
+    def test_history_within_budget_is_unchanged(self):
+        history = [AIMessage(content="architect"), HumanMessage(content=BLUEPRINT_HEADER)] + _tool_turn("a", "ok")
+        compacted, stats = compact_history(history, budget=10000)
+        assert compacted == history
+        assert stats["dropped"] == 0
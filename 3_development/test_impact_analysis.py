@@ -0,0 +1,108 @@
+"""
+Unit tests for change-aware test selection.
+
+Run with:
+    pytest test_impact_analysis.py -v
+"""
+
+import os
+import pytest
+from impact_analysis import build_import_graph, affected_modules, nodeid_exists, plan_selection, record_outcome
+
+
+class TestImpactAnalysis:
+    """Test suite for the import graph and run planning."""
+
+    @pytest.fixture
+    def workspace(self, tmp_path, monkeypatch):
+        """A tiny src layout: features depends on data, plus three test files."""
+        monkeypatch.chdir(tmp_path)
+        for pkg in ("src/qf", "src/qf/data", "src/qf/features", "tests"):
+            os.makedirs(pkg)
+        for init in ("src/qf/__init__.py", "src/qf/data/__init__.py", "src/qf/features/__init__.py"):
+            open(init, "w").close()
+        self._write("src/qf/data/loader.py", "def load():\n    return 1\n")
+        self._write("src/qf/features/ind.py", "from ..data.loader import load\n")
+        self._write("tests/test_data.py", "from qf.data.loader import load\n")
+        self._write("tests/test_feat.py", "from qf.features import ind\n")
+        self._write("tests/test_other.py", "import os\n\ndef test_x():\n    pass\n")
+        return tmp_path
+
+    @staticmethod
+    def _write(path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_relative_imports_are_resolved(self, workspace):
+        """'from ..data.loader import load' links features.ind to data.loader."""
+        graph = build_import_graph("src")
+        assert "qf.data.loader" in graph["qf.features.ind"]
+
+    def test_affected_modules_are_transitive(self, workspace):
+        """Changing the loader affects every module that imports it."""
+        graph = build_import_graph("src")
+        assert {"qf.data.loader", "qf.features.ind"} <= affected_modules({"qf.data.loader"}, graph)
+
+    def test_first_run_is_full(self, workspace):
+        assert plan_selection()["mode"] == "full"
+
+    def test_only_affected_and_failing_tests_are_selected(self, workspace):
+        """A loader change selects both dependants; failures are carried over."""
+        record_outcome(plan_selection(), ["tests/test_other.py::test_x"])
+        self._write("src/qf/data/loader.py", "def load():\n    return 2\n")
+
+        plan = plan_selection()
+        assert plan["mode"] == "impact"
+        assert plan["targets"] == [
+            "tests/test_data.py",
+            "tests/test_feat.py",
+            "tests/test_other.py::test_x",
+        ]
+
+    def test_periodic_full_run(self, workspace):
+        """Every `full_every` runs the whole suite is executed again."""
+        record_outcome(plan_selection(full_every=2), [])
+        record_outcome(plan_selection(full_every=2), [])
+        assert plan_selection(full_every=2)["mode"] == "full"
+
+    def test_global_change_forces_full_run(self, workspace):
+        """A conftest.py change can affect any test."""
+        record_outcome(plan_selection(), [])
+        self._write("tests/conftest.py", "import pytest\n")
+        assert plan_selection()["mode"] == "full"
+
+    def test_test_data_change_forces_full_run(self, workspace):
+        """A changed fixture file under tests/ may be read by any test."""
+        record_outcome(plan_selection(), [])
+        os.makedirs("tests/data")
+        self._write("tests/data/matches.csv", "home,away\n")
+
+        plan = plan_selection()
+        assert plan["mode"] == "full"
+        assert "tests/data/matches.csv" in plan["reason"]
+
+    def test_stale_failing_nodeids_are_dropped(self, workspace):
+        """Renamed or removed failing tests are not passed to pytest (exit code 4)."""
+        record_outcome(plan_selection(), [
+            "tests/test_other.py::test_x",
+            "tests/test_other.py::test_renamed",
+            "tests/test_gone.py::test_y",
+        ])
+        self._write("src/qf/data/loader.py", "def load():\n    return 2\n")
+
+        targets = plan_selection()["targets"]
+        assert "tests/test_other.py::test_x" in targets
+        assert not any("test_renamed" in t or "test_gone" in t for t in targets)
+
+    def test_nodeid_exists(self, workspace):
+        """Classes, parametrized ids and inherited methods are resolved."""
+        self._write("tests/test_cls.py", "class TestA:\n    def test_b(self): pass\n"
+                                         "class TestC(TestA):\n    pass\n")
+        assert nodeid_exists("tests/test_cls.py::TestA::test_b[1-2]")
+        assert nodeid_exists("tests/test_cls.py::TestC::test_b")
+        assert not nodeid_exists("tests/test_cls.py::TestA::test_z")
+        assert not nodeid_exists("tests/test_cls.py::test_b")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
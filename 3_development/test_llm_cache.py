@@ -0,0 +1,131 @@
+"""
+Unit tests for the persistent LLM response cache.
+
+Run with:
+    pytest test_llm_cache.py -v
+"""
+
+import asyncio
+import pytest
+from pydantic import BaseModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from llm_cache import ResponseCache, cache_key, structured_invoke, astructured_invoke
+from agents import architect_node, _architect_cache_messages
+from local_sandbox import LocalSandbox
+from output_schema import ArchitectOutput
+from survey import survey_codebase
+from tools import create_tools
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class FakeLLM:
+    """Counts structured calls; answers with the last message's content."""
+
+    def __init__(self, model="fake-model"):
+        self.model = model
+        self.temperature = 0
+        self.calls = 0
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, messages):
+        self.calls += 1
+        return Answer(text=messages[-1].content)
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+class ArchitectLLM(FakeLLM):
+    """Answers every request with the same plan."""
+
+    def invoke(self, messages):
+        self.calls += 1
+        return ArchitectOutput(reasoning="r", development_plan="p", config_yaml="a: 1", files_to_create=[])
+
+
+class FakeLogger:
+    def __init__(self):
+        self.lookups = []
+
+    def cache_lookup(self, agent_name, hit):
+        self.lookups.append((agent_name, hit))
+
+
+def _messages(text):
+    return [SystemMessage(content="You are a reviewer."), HumanMessage(content=text)]
+
+
+class TestLLMCache:
+    """Test suite for ResponseCache and structured_invoke."""
+
+    def test_key_normalises_whitespace_but_not_content(self):
+        llm = FakeLLM()
+        assert cache_key(llm, Answer, _messages("digest\n")) == cache_key(llm, Answer, _messages("  digest   "))
+        assert cache_key(llm, Answer, _messages("digest")) != cache_key(llm, Answer, _messages("other"))
+        assert cache_key(llm, Answer, _messages("digest")) != cache_key(FakeLLM("other-model"), Answer, _messages("digest"))
+
+    def test_second_identical_call_is_served_from_disk(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        llm, logger = FakeLLM(), FakeLogger()
+
+        first = structured_invoke(llm, Answer, _messages("digest"), ResponseCache(path), logger, "reviewer")
+        # A fresh cache object on the same file: survives a restart
+        second = structured_invoke(llm, Answer, _messages("digest"), ResponseCache(path), logger, "reviewer")
+
+        assert first == second == Answer(text="digest")
+        assert llm.calls == 1
+        assert logger.lookups == [("reviewer", False), ("reviewer", True)]
+
+    def test_bypass_always_calls_the_llm(self):
+        llm = FakeLLM()
+        structured_invoke(llm, Answer, _messages("digest"))
+        structured_invoke(llm, Answer, _messages("digest"))
+        assert llm.calls == 2
+
+    def test_lru_eviction_keeps_recently_used_entries(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=250)
+        cache.put("a", "x" * 100)
+        cache.put("b", "y" * 100)
+        assert cache.get("a") is not None  # "a" is now the most recent
+        cache.put("c", "z" * 100)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats() == {"entries": 2, "bytes": 200}
+
+    def test_async_shares_the_cache_with_sync(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        llm = FakeLLM()
+        structured_invoke(llm, Answer, _messages("digest"), cache)
+        output = asyncio.run(astructured_invoke(llm, Answer, _messages("digest"), cache))
+        assert output == Answer(text="digest")
+        assert llm.calls == 1
+
+    def test_architect_hits_across_surveys_of_an_unchanged_tree(self, tmp_path):
+        """The second survey sends outlines instead of bodies, yet the Architect request is a hit."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "loader.py").write_text("def load():\n    return 1\n")
+        roots = {"src": str(tmp_path / "src")}
+        survey_cache = str(tmp_path / "survey.json")
+        surveys = [survey_codebase(roots, "features", survey_cache) for _ in range(2)]
+        assert surveys[0] != surveys[1]
+
+        llm, cache = ArchitectLLM(), ResponseCache(str(tmp_path / "cache.sqlite"))
+        sandbox = LocalSandbox(str(tmp_path / "box"))
+        try:
+            for survey in surveys:
+                architect_node({"current_stage": "features"}, llm, "You are an architect.",
+                               create_tools(sandbox), survey=lambda: survey, cache=cache)
+        finally:
+            sandbox.kill()
+        assert llm.calls == 1
+
+        (tmp_path / "src" / "loader.py").write_text("def load():\n    return 2\n")
+        changed = survey_codebase(roots, "features", survey_cache)
+        key = _architect_cache_messages("features", changed, "You are an architect.")
+        assert cache.get(cache_key(llm, ArchitectOutput, key)) is None
@@ -0,0 +1,215 @@
+"""
+Unit tests for the local, subprocess-backed sandbox.
+
+Run with:
+    pytest test_local_sandbox.py -v
+"""
+
+import os
+import time
+import asyncio
+import pytest
+from local_sandbox import LocalSandbox, LocalBackend, AsyncLocalSandbox
+from sandbox_pool import SandboxPool
+from utils import upload_package_to_sandbox, download_package_from_sandbox
+
+
+def _alive(pid):
+    # A killed orphan may linger as a zombie until init reaps it
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+class TestLocalSandbox:
+    """Test suite for the E2B-shaped surface of LocalSandbox."""
+
+    @pytest.fixture
+    def sandbox(self, tmp_path):
+        sandbox = LocalSandbox(str(tmp_path / "work"))
+        yield sandbox
+        sandbox.kill()
+
+    def test_run_code_in_workdir(self, sandbox):
+        execution = sandbox.run_code("import os\nprint(os.getcwd())")
+        assert execution.error is None
+        assert execution.logs.stdout == [sandbox.workdir + "\n"]
+
+    def test_run_code_reports_errors(self, sandbox):
+        execution = sandbox.run_code("print('before')\nraise KeyError('home_goals')")
+        assert execution.logs.stdout == ["before\n"]
+        assert (execution.error.name, execution.error.value) == ("KeyError", "'home_goals'")
+        assert "LOCAL_ERROR" not in "".join(execution.logs.stderr)
+
+    def test_run_code_timeout(self, sandbox):
+        execution = sandbox.run_code("import time\ntime.sleep(5)", timeout=0.5)
+        assert execution.error.name == "TimeoutError"
+
+    def test_files_and_commands(self, sandbox):
+        sandbox.files.write("src/model.py", "x = 1\n")
+        sandbox.files.write("archive.zip", b"\x00\x01")
+
+        assert sandbox.files.read("src/model.py") == "x = 1\n"
+        assert sandbox.files.read("archive.zip", format="bytes") == bytearray(b"\x00\x01")
+        assert b"".join(sandbox.files.read("archive.zip", format="stream")) == b"\x00\x01"
+
+        result = sandbox.commands.run("rm -f archive.zip && ls src")
+        assert (result.exit_code, result.stdout) == (0, "model.py\n")
+        assert not os.path.exists(sandbox.path("archive.zip"))
+        assert sandbox.run_code("print(open('src/model.py').read())").logs.stdout == ["x = 1\n\n"]
+
+    def test_kill_stops_the_pytest_daemon(self, sandbox):
+        # Stand-in daemon: its own session, pid recorded like ensure_daemon does
+        sandbox.run_code(
+            "import subprocess\n"
+            "proc = subprocess.Popen(['sleep', '60'], start_new_session=True,\n"
+            "                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)\n"
+            "open('.pytest_daemon.pid', 'w').write(str(proc.pid))")
+        with open(sandbox.path(".pytest_daemon.pid")) as f:
+            pid = int(f.read())
+        sandbox.kill()
+        time.sleep(0.2)
+        assert not _alive(pid)
+
+    def test_kill_removes_workdir(self, tmp_path):
+        sandbox = LocalSandbox(str(tmp_path / "scratch"))
+        sandbox.kill()
+        assert not os.path.exists(sandbox.workdir)
+
+    def test_limits_and_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GOOGLE_API_KEY", "secret")
+        monkeypatch.setenv("SPRINT_STAGE", "features")
+        sandbox = LocalSandbox(str(tmp_path / "limited"), memory_mb=256)
+
+        execution = sandbox.run_code("import os\nprint(os.getenv('GOOGLE_API_KEY'), os.getenv('SPRINT_STAGE'))")
+        assert execution.logs.stdout == ["None features\n"]
+        assert sandbox.run_code("x = bytearray(512 * 1024 * 1024)").error.name == "MemoryError"
+        assert sandbox.commands.run("echo $GOOGLE_API_KEY").stdout == "\n"
+        sandbox.kill()
+
+
+def _package(tmp_path):
+    _write(tmp_path / "pkg" / "src" / "model.py", "v1")
+    _write(tmp_path / "pkg" / "tests" / "test_model.py", "tests")
+    _write(tmp_path / "orch" / "configs" / "features.yaml", "a: 1")
+    return str(tmp_path / "pkg"), str(tmp_path / "orch")
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class TestLocalSync:
+    """Test suite for hardlink, copy and no-op syncing through utils."""
+
+    @pytest.mark.parametrize("mode", ["link", "copy", "none"])
+    def test_round_trip(self, tmp_path, mode):
+        package_root, orchestrator_root = _package(tmp_path)
+        sandbox = LocalSandbox(str(tmp_path / "box"), sync=mode)
+
+        uploaded = upload_package_to_sandbox(sandbox, package_root, orchestrator_root)
+        assert sorted(uploaded["manifest"]) == ["configs/features.yaml", "src/model.py", "tests/test_model.py"]
+        assert sandbox.run_code("print(open('src/model.py').read())").logs.stdout == ["v1\n"]
+
+        # The sandbox writes a new file and replaces another one
+        sandbox.files.write("src/features.py", "new")
+        os.remove(sandbox.path("tests/test_model.py"))
+        sandbox.files.write("tests/test_model.py", "tests v2")
+        local_test = os.path.join(package_root, "tests", "test_model.py")
+        # Only the symlinked folders see it before the download
+        assert _read(local_test) == ("tests v2" if mode == "none" else "tests")
+
+        download_package_from_sandbox(sandbox, package_root, orchestrator_root)
+        assert _read(os.path.join(package_root, "src", "features.py")) == "new"
+        assert _read(local_test) == "tests v2"
+
+        sandbox.kill()
+        assert _read(os.path.join(package_root, "src", "model.py")) == "v1"
+
+    def test_default_sync_isolates_the_package(self, tmp_path):
+        package_root, orchestrator_root = _package(tmp_path)
+        sandbox = LocalSandbox(str(tmp_path / "box"))
+        upload_package_to_sandbox(sandbox, package_root, orchestrator_root)
+
+        sandbox.run_code("open('src/model.py', 'w').write('edited in place')")
+        sandbox.files.write("tests/test_model.py", "rewritten")
+        assert _read(os.path.join(package_root, "src", "model.py")) == "v1"
+        assert _read(os.path.join(package_root, "tests", "test_model.py")) == "tests"
+
+    def test_link_sync_shares_files_and_deletes(self, tmp_path):
+        package_root, orchestrator_root = _package(tmp_path)
+        sandbox = LocalSandbox(str(tmp_path / "box"), sync="link")
+        upload_package_to_sandbox(sandbox, package_root, orchestrator_root)
+        assert os.path.samefile(sandbox.path("src/model.py"), os.path.join(package_root, "src", "model.py"))
+        # Edits in place reach the local file at once
+        sandbox.run_code("open('src/model.py', 'w').write('v2')")
+        assert _read(os.path.join(package_root, "src", "model.py")) == "v2"
+
+        os.remove(os.path.join(package_root, "src", "model.py"))
+        result = upload_package_to_sandbox(sandbox, package_root, orchestrator_root)
+        assert (result["changed"], result["deleted"]) == ([], ["src/model.py"])
+        assert not os.path.exists(sandbox.path("src/model.py"))
+
+
+class TestLocalBackend:
+    """Test suite for LocalBackend in the SandboxPool."""
+
+    def test_pool_lease_and_reattach(self, tmp_path):
+        backend = LocalBackend(str(tmp_path / "boxes"))
+        pool = SandboxPool(backend, size=1, install_cmd=None, warmup_code=None)
+        pool.fill()
+
+        sandbox = pool.acquire()
+        sandbox.files.write("tester_outputs/mock.csv", "a,b")
+        assert backend.connect(sandbox.sandbox_id).workdir == sandbox.workdir
+        pool.release(sandbox)
+        assert not os.path.exists(sandbox.path("tester_outputs"))
+
+        with pytest.raises(ValueError):
+            backend.connect("local-missing")
+        pool.shutdown()
+        assert not os.path.exists(sandbox.workdir)
+
+    def test_release_resets_sprint_state(self, tmp_path):
+        """Recycling stops the pytest daemon and clears snapshots and caches."""
+        backend = LocalBackend(str(tmp_path / "boxes"))
+        pool = SandboxPool(backend, size=1, install_cmd=None, warmup_code=None)
+        sandbox = pool.acquire()
+        sandbox.run_code(
+            "import os, subprocess\n"
+            "proc = subprocess.Popen(['sleep', '60'], start_new_session=True,\n"
+            "                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)\n"
+            "open('.pytest_daemon.pid', 'w').write(str(proc.pid))\n"
+            "os.makedirs('.snapshots/0001')\n"
+            "open('.test_selection.json', 'w').write('{}')")
+        with open(sandbox.path(".pytest_daemon.pid")) as f:
+            pid = int(f.read())
+
+        pool.release(sandbox)
+        time.sleep(0.2)
+        assert not _alive(pid)
+        for path in (".pytest_daemon.pid", ".snapshots", ".test_selection.json"):
+            assert not os.path.exists(sandbox.path(path))
+        pool.shutdown()
+
+    def test_async_sandbox(self, tmp_path):
+        backend = LocalBackend(str(tmp_path / "boxes"))
+        sandbox = backend.create()
+
+        async def _use():
+            asandbox = await backend.aconnect(sandbox.sandbox_id)
+            await asandbox.files.write("x.txt", "1")
+            return await asandbox.run_code("print(open('x.txt').read())")
+
+        assert isinstance(asyncio.run(backend.aconnect(sandbox.sandbox_id)), AsyncLocalSandbox)
+        assert asyncio.run(_use()).logs.stdout == ["1\n"]
+        backend.kill(sandbox)
@@ -10,6 +10,7 @@ Or for detailed output:
 
 import pytest
 import os
+import threading
 from pathlib import Path
 from logger import SprintLogger
 
@@ -104,6 +105,102 @@ class TestSprintLogger:
         assert "🔧 Tool: pytest" in content
         assert "5 passed, 2 failed" in content
     
+    def test_structured_test_results_logging(self, logger):
+        """Test structured pytest results logging."""
+        log_file = logger.get_log_file()
+        results = {
+            "exit_code": 1,
+            "summary": {"passed": 3, "failed": 1, "error": 0, "skipped": 1, "total": 5, "duration": 2.5},
+            "tests": [
+                {"nodeid": "tests/test_data.py::test_load", "outcome": "passed", "duration": 0.5, "traceback": None},
+                {"nodeid": "tests/test_data.py::test_clean", "outcome": "failed", "duration": 1.25, "traceback": "KeyError"},
+            ]
+        }
+        logger.test_results(results)
+        
+        with open(log_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        assert "🧪 TESTS: 3 passed, 1 failed, 0 errors, 1 skipped in 2.50s (exit code 1)" in content
+        assert "[FAILED] tests/test_data.py::test_clean (1.25s)" in content
+        assert "test_load" not in content
+    
+    def test_cache_lookup_counters(self, logger):
+        """Test LLM cache hit/miss counters and the sprint-end summary."""
+        log_file = logger.get_log_file()
+        logger.cache_lookup("architect", hit=False)
+        logger.cache_lookup("architect", hit=True)
+        logger.cache_lookup("reviewer", hit=True)
+        logger.sprint_end("SUCCESS")
+        
+        with open(log_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        assert (logger.cache_hits, logger.cache_misses) == (2, 1)
+        assert "💾 [architect] LLM cache MISS" in content
+        assert "💾 LLM CACHE: 2 hits, 1 misses" in content
+    
+    def test_telemetry_spans_and_tokens(self, logger):
+        """Test span timers, token counts, the JSONL stream and the p50/p95 summary."""
+        import json
+        with logger.span("developer"):
+            logger.llm_usage(1200, 300, duration_ms=850.0)
+        for duration in (100.0, 200.0, 900.0):
+            logger.record_span("tool", "run_code", duration)
+        logger.sprint_end("SUCCESS")
+        
+        with open(logger.get_log_file(), 'r', encoding='utf-8') as f:
+            content = f.read()
+        with open(logger.get_events_file(), 'r', encoding='utf-8') as f:
+            events = [json.loads(line) for line in f]
+        os.remove(logger.get_events_file())
+        
+        assert logger.tokens == {"developer": [1200, 300, 1]}
+        assert "tool:run_code" in content and "200.0" in content and "900.0" in content
+        assert "🔢 LLM TOKENS: 1200 in / 300 out" in content
+        assert [e["event"] for e in events][-2:] == ["summary", "sprint_end"]
+        assert events[0]["kind"] == "llm" and events[0]["input_tokens"] == 1200
+    
+    def test_queued_logging_flushes_on_close(self, tmp_path):
+        """Test the background writer: lazy formatting, events and the shutdown flush."""
+        import logger as logger_module
+        formatted = []
+
+        class Probe(logger_module._Truncated):
+            def __str__(self):
+                formatted.append(threading.current_thread().name)
+                return super().__str__()
+
+        queued = SprintLogger("test_queued", log_dir=str(tmp_path), queued=True)
+        queued.sprint_start()
+        queued.logger.info("💭 [%s] %s", "developer", Probe("x" * 500, 200))
+        queued.record_span("node", "developer", 12.5)
+        queued.sprint_end("SUCCESS")
+        queued.close()
+        
+        with open(queued.get_log_file(), 'r', encoding='utf-8') as f:
+            content = f.read()
+        with open(queued.get_events_file(), 'r', encoding='utf-8') as f:
+            events = f.read()
+        
+        assert "🚀 SPRINT START" in content and "✅ SPRINT END: SUCCESS" in content
+        assert "💭 [developer] " + "x" * 200 + "..." in content
+        assert '"event": "span"' in events and '"event"' not in content
+        # The message was built on the writer thread, not the agent thread
+        assert formatted and threading.main_thread().name not in formatted
+    
+    def test_queued_logging_rotates_by_size(self, tmp_path):
+        """Test size-based rotation of the queued log file."""
+        queued = SprintLogger("test_rotation", log_dir=str(tmp_path), queued=True, max_bytes=2000, backup_count=2)
+        for i in range(200):
+            queued.info(f"line {i:04d} " + "-" * 40)
+        queued.close()
+        
+        rotated = sorted(p.name for p in tmp_path.iterdir())
+        assert Path(queued.get_log_file()).name + ".1" in rotated
+        assert len(rotated) == 3  # current file + backup_count
+        assert "line 0199" in Path(queued.get_log_file()).read_text(encoding="utf-8")
+    
     def test_reviewer_feedback_logging(self, logger):
         """Test reviewer feedback with failures."""
         log_file = logger.get_log_file()
@@ -0,0 +1,70 @@
+"""
+Unit tests for the content-hash manifest used by the sandbox sync.
+
+Run with:
+    pytest test_manifest.py -v
+"""
+
+import os
+import json
+import pytest
+from manifest import build_manifest, diff_manifests
+
+
+class TestManifest:
+    """Test suite for build_manifest and diff_manifests."""
+
+    @pytest.fixture
+    def roots(self, tmp_path):
+        """Create a small src/configs layout."""
+        (tmp_path / "pkg" / "src" / "data").mkdir(parents=True)
+        (tmp_path / "pkg" / "src" / "data" / "loader.py").write_text("x = 1\n")
+        (tmp_path / "pkg" / "src" / "__pycache__").mkdir()
+        (tmp_path / "pkg" / "src" / "__pycache__" / "loader.cpython-311.pyc").write_bytes(b"\x00")
+        (tmp_path / "cfg").mkdir()
+        (tmp_path / "cfg" / "data.yaml").write_text("a: 1\n")
+        return {"src": str(tmp_path / "pkg" / "src"), "configs": str(tmp_path / "cfg")}
+
+    def test_manifest_keys_use_remote_prefix(self, roots):
+        """Keys are '<folder>/<relative path>' with forward slashes."""
+        result = build_manifest(roots)
+        assert set(result) == {"src/data/loader.py", "configs/data.yaml"}
+
+    def test_pycache_is_skipped(self, roots):
+        """Compiled artefacts never enter the manifest."""
+        assert not any("__pycache__" in k for k in build_manifest(roots))
+
+    def test_index_is_reused_for_untouched_files(self, roots, tmp_path):
+        """Cached hashes are re-used when size and mtime have not changed."""
+        index_path = str(tmp_path / "index.json")
+        build_manifest(roots, index_path)
+
+        # Tamper with the cached hash: it must be trusted for untouched files
+        with open(index_path) as f:
+            index = json.load(f)
+        index["configs/data.yaml"][2] = "cached"
+        with open(index_path, "w") as f:
+            json.dump(index, f)
+
+        assert build_manifest(roots, index_path)["configs/data.yaml"] == "cached"
+
+    def test_modified_file_is_rehashed(self, roots, tmp_path):
+        """A content change invalidates the cached entry."""
+        index_path = str(tmp_path / "index.json")
+        before = build_manifest(roots, index_path)
+        with open(os.path.join(roots["src"], "data", "loader.py"), "w") as f:
+            f.write("x = 22\n")
+        after = build_manifest(roots, index_path)
+        assert before["src/data/loader.py"] != after["src/data/loader.py"]
+
+    def test_diff_reports_changes_and_deletes(self):
+        """Added/changed files are sent, files missing locally are deleted."""
+        local = {"src/a.py": "1", "src/b.py": "2", "tests/test_a.py": "3"}
+        remote = {"src/a.py": "1", "src/b.py": "old", "src/gone.py": "4"}
+        changed, deleted = diff_manifests(local, remote)
+        assert changed == ["src/b.py", "tests/test_a.py"]
+        assert deleted == ["src/gone.py"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,145 @@
+"""
+Unit tests for sprint recording and the deterministic replay LLM.
+
+Run with:
+    pytest test_replay.py -v
+"""
+
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from pydantic import BaseModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from local_sandbox import LocalSandbox
+from replay import (Recorder, RecordingLLM, RecordingSandbox, RecordingHuman, RecordingSurvey, ReplayLLM,
+                    ReplaySurvey, RECORDING_FORMAT, load_recording)
+from agents import architect_node
+from output_schema import ArchitectOutput
+from tools import create_tools
+
+
+class Verdict(BaseModel):
+    passed: bool
+    reason: str
+
+
+class StubChatModel:
+    """Answers like a chat model: tool calls when bound, pydantic when structured."""
+
+    model = "stub"
+    temperature = 0
+
+    def __init__(self):
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return SimpleNamespace(invoke=self._tool_call)
+
+    def with_structured_output(self, schema):
+        if schema is ArchitectOutput:
+            return SimpleNamespace(invoke=self._plan)
+        return SimpleNamespace(invoke=lambda messages: schema(passed=False, reason=f"call {self._count()}"))
+
+    def _count(self):
+        self.calls += 1
+        return self.calls
+
+    def _plan(self, messages):
+        self._count()
+        return ArchitectOutput(reasoning="r", development_plan="p", config_yaml="a: 1", files_to_create=[])
+
+    def _tool_call(self, messages):
+        return AIMessage(content="", tool_calls=[{"name": "run_code", "args": {"code": f"print({self._count()})"},
+                                                  "id": "call-1"}])
+
+
+def _prompt(text):
+    return [SystemMessage(content="You are the Reviewer."), HumanMessage(content=text)]
+
+
+class TestRecordReplay:
+    """Test suite for recording proxies and ReplayLLM."""
+
+    def test_recorded_responses_replay(self, tmp_path):
+        path = tmp_path / "sprint.jsonl"
+        recorder = Recorder(str(path))
+        recorder.record("sprint", format=RECORDING_FORMAT, stage="features")
+        llm = RecordingLLM(StubChatModel(), recorder)
+
+        first = llm.with_structured_output(Verdict).invoke(_prompt("run 1"))
+        second = llm.with_structured_output(Verdict).invoke(_prompt("run 2"))
+        call = llm.bind_tools([]).invoke(_prompt("develop"))
+        assert llm.model == "stub"
+
+        replayed = ReplayLLM(load_recording(path))
+        # Out of order but identical content: matched exactly
+        assert replayed.with_structured_output(Verdict).invoke(_prompt("run 2")) == second
+        assert replayed.bind_tools([]).invoke(_prompt("develop")).tool_calls == call.tool_calls
+        # Different content: the next unused response of that kind
+        assert replayed.with_structured_output(Verdict).invoke(_prompt("run 1, edited")) == first
+        assert (replayed.exact, replayed.drifted, replayed.unused) == (2, 1, 0)
+
+        with pytest.raises(RuntimeError):
+            replayed.with_structured_output(Verdict).invoke(_prompt("one more"))
+
+    def test_load_recording_needs_header(self, tmp_path):
+        path = tmp_path / "not_a_recording.jsonl"
+        path.write_text(json.dumps({"seq": 1, "kind": "llm"}) + "\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_recording(path)
+
+    def test_sandbox_calls_are_recorded(self, tmp_path):
+        recorder = Recorder()
+        local = LocalSandbox(str(tmp_path / "work"))
+        sandbox = RecordingSandbox(local, recorder)
+
+        sandbox.files.write("data.csv", "a,b\n")
+        execution = sandbox.run_code("print(open('data.csv').read().strip())")
+        sandbox.commands.run("rm data.csv")
+        local.kill()
+
+        assert execution.logs.stdout == ["a,b\n"]
+        assert sandbox.sandbox_id == local.sandbox_id
+        ops = [(e["op"], e.get("path") or e.get("cmd") or e["stdout"]) for e in recorder.entries]
+        assert ops == [("files.write", "data.csv"), ("run_code", ["a,b\n"]), ("commands.run", "rm data.csv")]
+        assert recorder.total_seconds("sandbox") > 0
+
+    def test_async_sandbox_calls_are_recorded(self):
+        class AsyncStub:
+            async def run_code(self, code):
+                return SimpleNamespace(error=None, logs=SimpleNamespace(stdout=["ok\n"], stderr=[]))
+
+        recorder = Recorder()
+        execution = asyncio.run(RecordingSandbox(AsyncStub(), recorder).run_code("print('ok')"))
+        assert execution.logs.stdout == ["ok\n"]
+        assert recorder.entries[0]["stdout"] == ["ok\n"]
+
+    def test_human_decisions_are_recorded(self):
+        recorder = Recorder()
+        autopilot = SimpleNamespace(decide=lambda state: ("ROLLBACK 2", "operator instruction"))
+        assert RecordingHuman(recorder, autopilot).decide({}) == ("ROLLBACK 2", "operator instruction")
+        assert recorder.entries == [{"seq": 1, "kind": "human", "instruction": "ROLLBACK 2"}]
+
+    def test_architect_replays_the_recorded_survey(self, tmp_path):
+        """The replayed Architect request matches exactly even though the tree has since changed."""
+        path = tmp_path / "sprint.jsonl"
+        recorder = Recorder(str(path))
+        recorder.record("sprint", format=RECORDING_FORMAT, stage="features")
+        tree = {"text": "STRUCTURE: src/loader.py"}
+        sandbox = LocalSandbox(str(tmp_path / "box"))
+        try:
+            tools = create_tools(sandbox)
+            architect_node({"current_stage": "features"}, RecordingLLM(StubChatModel(), recorder),
+                           "You are an architect.", tools, survey=RecordingSurvey(lambda: tree["text"], recorder))
+            tree["text"] = "STRUCTURE: src/loader.py src/new.py"
+
+            entries = load_recording(path)
+            assert [e["text"] for e in entries if e["kind"] == "survey"] == ["STRUCTURE: src/loader.py"]
+            replayed = ReplayLLM(entries)
+            architect_node({"current_stage": "features"}, replayed, "You are an architect.", tools,
+                           survey=ReplaySurvey(entries))
+        finally:
+            sandbox.kill()
+        assert (replayed.exact, replayed.drifted, replayed.unused) == (1, 0, 0)
+        assert not ReplaySurvey([{"kind": "sprint"}])
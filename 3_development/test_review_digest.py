@@ -0,0 +1,80 @@
+"""
+Unit tests for the Reviewer's deterministic failure digest.
+
+Run with:
+    pytest test_review_digest.py -v
+"""
+
+import pytest
+from review_digest import is_green, classify, digest_failures, format_digest
+
+
+def _failed(nodeid, traceback, outcome="failed"):
+    return {"nodeid": nodeid, "outcome": outcome, "duration": 0.1, "traceback": traceback}
+
+
+KEY_ERROR = """    def test_load():
+>       df = load(['a.csv'])
+
+src/qf/data/loader.py:12: in load
+    return df['close_price']
+E   KeyError: 'close_price'
+
+src/qf/data/loader.py:12: KeyError"""
+
+
+class TestReviewDigest:
+    """Test suite for is_green, classify and digest_failures."""
+
+    def test_green_needs_exit_code_zero(self):
+        passed = [{"nodeid": "tests/test_a.py::test_a", "outcome": "passed"}]
+        assert is_green({"exit_code": 0, "tests": passed})
+        assert not is_green({"exit_code": 1, "tests": passed})
+        assert not is_green({"exit_code": 5, "tests": []})
+        assert not is_green({})
+
+    def test_empty_or_skipped_run_is_not_green(self):
+        """Exit code 0 with nothing passing proves nothing."""
+        skipped = [{"nodeid": "tests/test_a.py::test_a", "outcome": "skipped"}]
+        assert not is_green({"exit_code": 0, "tests": []})
+        assert not is_green({"exit_code": 0, "tests": skipped})
+        assert not is_green({"exit_code": 0, "summary": {"passed": 0, "failed": 0, "error": 0, "skipped": 3}})
+
+    def test_green_reads_the_summary_counts(self):
+        assert is_green({"exit_code": 0, "summary": {"passed": 4, "failed": 0, "error": 0}})
+        assert not is_green({"exit_code": 0, "summary": {"passed": 4, "failed": 0, "error": 1}})
+
+    def test_classify_reads_type_location_and_message(self):
+        failure_type, location, message = classify(_failed("tests/test_data.py::test_load", KEY_ERROR))
+        assert failure_type == "KeyError"
+        assert location == "src/qf/data/loader.py:12"
+        assert message == "KeyError: 'close_price'"
+
+    def test_identical_failures_are_collapsed(self):
+        """Ten tests hitting the same line become one digest entry."""
+        results = {
+            "exit_code": 1,
+            "summary": {"passed": 1, "failed": 11, "error": 0, "skipped": 0},
+            "tests": [_failed(f"tests/test_data.py::test_{i}", KEY_ERROR) for i in range(10)]
+            + [_failed("tests/test_feat.py::test_x", "E   assert 1 == 2\n\ntests/test_feat.py:4: AssertionError")]
+            + [{"nodeid": "tests/test_ok.py::test_ok", "outcome": "passed", "duration": 0.1, "traceback": None}],
+        }
+        groups = digest_failures(results)
+
+        assert [len(g["tests"]) for g in groups] == [10, 1]
+        assert groups[1]["failure_type"] == "AssertionError"
+
+        text = format_digest(results, groups)
+        assert "11 failing tests collapse into 2 distinct failures" in text
+        assert "(+5 more)" in text
+        assert text.count("KeyError: 'close_price'") < 10
+
+    def test_collection_error_without_location(self):
+        record = _failed("tests/test_broken.py", "ImportError while importing test module", outcome="error")
+        failure_type, location, _ = classify(record)
+        assert failure_type == "CollectionError"
+        assert location == "tests/test_broken.py"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
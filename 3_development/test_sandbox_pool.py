@@ -0,0 +1,231 @@
+"""
+Unit tests for SandboxPool using an in-memory stand-in backend.
+
+Run with:
+    pytest test_sandbox_pool.py -v
+"""
+
+import itertools
+import threading
+import pytest
+from types import SimpleNamespace
+from sandbox_pool import SandboxPool, LazySandbox
+
+
+class FakeSandbox:
+    """Answers run_code/commands.run like an E2B sandbox, without a network."""
+
+    _ids = itertools.count()
+
+    def __init__(self):
+        self.sandbox_id = f"fake-{next(self._ids)}"
+        self.alive = True
+        self.commands_run = []
+        self.code_run = []
+        # Code run since the kernel last (re)started, like a Jupyter kernel's globals
+        self.kernel = []
+        self.kernel_restarts = 0
+        self.commands = SimpleNamespace(run=self._run_command)
+
+    def _run_command(self, cmd, timeout=None):
+        self.commands_run.append(cmd)
+
+    def run_code(self, code):
+        if not self.alive:
+            raise ConnectionError("sandbox is gone")
+        self.code_run.append(code)
+        self.kernel.append(code)
+        return SimpleNamespace(error=None, logs=SimpleNamespace(stdout=["HEALTH_OK\n"]))
+
+
+class FakeBackend:
+    """Stand-in for E2BBackend."""
+
+    def __init__(self):
+        self.created = []
+        self.killed = []
+
+    def create(self):
+        sandbox = FakeSandbox()
+        self.created.append(sandbox)
+        return sandbox
+
+    def connect(self, sandbox_id):
+        for sandbox in self.created:
+            if sandbox.sandbox_id == sandbox_id and sandbox.alive:
+                return sandbox
+        raise LookupError(sandbox_id)
+
+    def keep_alive(self, sandbox):
+        pass
+
+    def restart_kernel(self, sandbox):
+        sandbox.kernel = []
+        sandbox.kernel_restarts += 1
+        return True
+
+    def kill(self, sandbox):
+        sandbox.alive = False
+        self.killed.append(sandbox)
+
+
+class NoRestartBackend(FakeBackend):
+    """A backend whose SDK cannot restart the kernel."""
+
+    def restart_kernel(self, sandbox):
+        return False
+
+
+class TestSandboxPool:
+    """Test suite for SandboxPool."""
+
+    @pytest.fixture
+    def backend(self):
+        return FakeBackend()
+
+    def test_fill_provisions_and_warms(self, backend):
+        """fill() installs the stack and runs the warm-up in every sandbox."""
+        pool = SandboxPool(backend, size=2, install_cmd="pip install x", warmup_code="import x")
+        pool.fill()
+
+        assert len(backend.created) == 2
+        for sandbox in backend.created:
+            assert sandbox.commands_run == ["pip install x"]
+            assert sandbox.code_run == ["import x"]
+
+    def test_acquire_reuses_idle_sandbox(self, backend):
+        """A warm sandbox is leased instead of creating a new one."""
+        pool = SandboxPool(backend, size=1)
+        pool.fill()
+        with pool.lease() as sandbox:
+            assert sandbox is backend.created[0]
+        assert len(backend.created) == 1
+
+    def test_unhealthy_sandbox_is_replaced(self, backend):
+        """A dead idle sandbox is dropped and a fresh one provisioned."""
+        pool = SandboxPool(backend, size=1)
+        pool.fill()
+        backend.created[0].alive = False
+
+        sandbox = pool.acquire()
+        assert sandbox is backend.created[1]
+        assert backend.created[0] in backend.killed
+
+    def test_release_recycles_until_max_uses(self, backend):
+        """Sandboxes are reset and re-pooled, then killed after max_uses."""
+        pool = SandboxPool(backend, size=1, max_uses=2)
+        sandbox = pool.acquire()
+
+        pool.release(sandbox)
+        assert sandbox.alive
+        assert any("rm -rf" in c for c in sandbox.commands_run)
+
+        assert pool.acquire() is sandbox
+        pool.release(sandbox)
+        assert not sandbox.alive
+
+    def test_release_clears_sprint_state(self, backend):
+        """Snapshots, selection/survey caches and the pytest daemon do not outlive a sprint."""
+        pool = SandboxPool(backend, size=1)
+        sandbox = pool.acquire()
+        pool.release(sandbox)
+
+        reset = sandbox.commands_run[-1]
+        for path in (".snapshots", ".test_selection.json", ".survey_cache.json", ".pytest_daemon.sock"):
+            assert path in reset
+        assert "kill -9" in reset
+
+    def test_release_restarts_and_rewarms_the_kernel(self, backend):
+        """The next sprint gets a fresh kernel, not the previous sprint's modules."""
+        pool = SandboxPool(backend, size=1, warmup_code="import x")
+        sandbox = pool.acquire()
+        sandbox.run_code("import src.model")
+
+        pool.release(sandbox)
+        assert sandbox.kernel_restarts == 1
+        assert "import src.model" not in sandbox.kernel
+        assert sandbox.kernel[0] == "import x"
+        assert pool.acquire() is sandbox
+
+    def test_sandbox_is_retired_without_kernel_restart(self):
+        backend = NoRestartBackend()
+        pool = SandboxPool(backend, size=1)
+        sandbox = pool.acquire()
+
+        pool.release(sandbox)
+        assert not sandbox.alive
+        assert pool.acquire() is not sandbox
+
+    def test_top_up_only_when_short(self, backend):
+        """top_up() is a no-op on a full pool and fills in a daemon thread otherwise."""
+        pool = SandboxPool(backend, size=1)
+        pool.fill()
+        assert pool.top_up() is None
+
+        pool.acquire()
+        thread = pool.top_up()
+        assert thread.daemon
+        thread.join()
+        assert len(backend.created) == 2
+
+    def test_concurrent_fills_do_not_over_provision(self, backend):
+        """A second fill() while the first is still provisioning creates nothing."""
+        gate = threading.Event()
+        create = backend.create
+
+        def slow_create():
+            gate.wait()
+            return create()
+
+        backend.create = slow_create
+        pool = SandboxPool(backend, size=2)
+        first = threading.Thread(target=pool.fill)
+        first.start()
+        while pool._filling < 2:
+            pass
+        assert pool.top_up() is None
+        pool.fill()
+        gate.set()
+        first.join()
+        assert len(backend.created) == 2
+
+    def test_state_is_restored_across_pools(self, backend, tmp_path):
+        """A new pool reattaches to sandboxes left idle by the previous one."""
+        state_path = str(tmp_path / "pool.json")
+        SandboxPool(backend, size=1, state_path=state_path).fill()
+
+        second = SandboxPool(backend, size=1, state_path=state_path)
+        assert second.acquire() is backend.created[0]
+        assert len(backend.created) == 1
+
+
+class TestLazySandbox:
+    """Test suite for the pipelined start-up proxy."""
+
+    def test_access_blocks_until_provisioned(self):
+        """Attributes resolve on the real sandbox once provisioning finishes."""
+        gate = threading.Event()
+        sandbox = FakeSandbox()
+
+        def provision():
+            gate.wait()
+            return sandbox
+
+        lazy = LazySandbox(provision)
+        assert not lazy.ready
+        gate.set()
+        assert lazy.sandbox_id == sandbox.sandbox_id
+        assert lazy.ready
+
+    def test_provisioning_error_surfaces_on_use(self):
+        """A failed start-up is raised at the first point of use."""
+        def provision():
+            raise RuntimeError("no quota")
+
+        lazy = LazySandbox(provision)
+        with pytest.raises(RuntimeError, match="no quota"):
+            lazy.run_code("print(1)")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,97 @@
+"""
+Unit tests for the multi-stage sprint scheduler.
+
+Run with:
+    pytest test_scheduler.py -v
+"""
+
+import time
+import threading
+import pytest
+from scheduler import (
+    STAGE_DEPENDENCIES, critical_path, format_summary, parse_dag, run_schedule,
+    select_stages, validate_dag,
+)
+
+DIAMOND = parse_dag("data; features: data; modelling: data; strategy: features+modelling")
+
+
+class TestScheduler:
+    """Test suite for DAG handling and concurrent stage execution."""
+
+    def test_parse_dag(self):
+        assert DIAMOND == {"data": [], "features": ["data"], "modelling": ["data"],
+                           "strategy": ["features", "modelling"]}
+        assert parse_dag("features: data") == {"features": ["data"], "data": []}
+
+    def test_validate_rejects_cycles_and_unknown_stages(self):
+        validate_dag(STAGE_DEPENDENCIES)
+        with pytest.raises(ValueError, match="cycle"):
+            validate_dag({"data": ["backtest"], "backtest": ["data"]})
+        with pytest.raises(ValueError, match="Unknown stage"):
+            validate_dag({"bogus": []}, known=STAGE_DEPENDENCIES)
+
+    def test_select_stages_drops_outside_dependencies(self):
+        assert select_stages(STAGE_DEPENDENCIES, ["modelling", "backtest"]) == {
+            "modelling": [], "backtest": ["modelling"]}
+
+    def test_independent_stages_run_concurrently_after_dependencies(self):
+        events, lock = [], threading.Lock()
+        both_started = threading.Barrier(2, timeout=5)
+
+        def run_stage(stage):
+            with lock:
+                events.append(("start", stage))
+            if stage in ("features", "modelling"):
+                both_started.wait()  # Deadlocks unless the two run at the same time
+            with lock:
+                events.append(("end", stage))
+            return True
+
+        timings = run_schedule(DIAMOND, run_stage)
+
+        assert all(t["status"] == "SUCCESS" for t in timings.values())
+        assert events[0] == ("start", "data") and events[1] == ("end", "data")
+        assert events[-1] == ("end", "strategy")
+
+    def test_default_dag_overlaps_stages(self):
+        """Under the default DAG the standalone strategy stage runs alongside the data chain."""
+        active, peak, lock = set(), [0], threading.Lock()
+
+        def run_stage(stage):
+            with lock:
+                active.add(stage)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.05)
+            with lock:
+                active.discard(stage)
+            return True
+
+        timings = run_schedule(STAGE_DEPENDENCIES, run_stage)
+        assert peak[0] >= 2
+        assert timings["strategy"]["start"] < timings["data"]["end"]
+        assert timings["backtest"]["start"] >= max(t["end"] for s, t in timings.items() if s != "backtest")
+
+    def test_failure_skips_downstream_stages(self):
+        def run_stage(stage):
+            if stage == "features":
+                raise RuntimeError("sandbox died")
+            return True
+
+        timings = run_schedule(DIAMOND, run_stage)
+        assert timings["features"]["status"] == "FAILED"
+        assert timings["modelling"]["status"] == "SUCCESS"
+        assert timings["strategy"] == {"status": "SKIPPED", "start": None, "end": None}
+
+    def test_critical_path_is_longest_chain(self):
+        timings = {
+            "data": {"status": "SUCCESS", "start": 0.0, "end": 2.0},
+            "features": {"status": "SUCCESS", "start": 2.0, "end": 3.0},
+            "modelling": {"status": "SUCCESS", "start": 2.0, "end": 7.0},
+            "strategy": {"status": "SUCCESS", "start": 7.0, "end": 8.0},
+        }
+        assert critical_path(DIAMOND, timings) == (["data", "modelling", "strategy"], 8.0)
+
+        summary = format_summary(DIAMOND, timings, wall=8.0)
+        assert "Critical path: data → modelling → strategy (8.0s)" in summary
+        assert "parallelism 1.12x" in summary
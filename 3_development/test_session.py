@@ -0,0 +1,90 @@
+"""
+Unit tests for resumable sprint bookkeeping.
+
+Run with:
+    pytest test_session.py -v
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from types import SimpleNamespace
+from session import load_session, save_session, clear_session, retire_session, workspace_files
+
+
+class FakePool:
+    """Just the SandboxPool surface retire_session uses."""
+
+    def __init__(self, *alive):
+        self.alive = {sandbox_id: SimpleNamespace(sandbox_id=sandbox_id) for sandbox_id in alive}
+        self.released = []
+        self.backend = SimpleNamespace(connect=self._connect)
+
+    def _connect(self, sandbox_id):
+        if sandbox_id not in self.alive:
+            raise LookupError(sandbox_id)
+        return self.alive[sandbox_id]
+
+    def release(self, sandbox):
+        self.released.append(sandbox.sandbox_id)
+
+
+def _write_call(call_id, files):
+    return AIMessage(content="", tool_calls=[{"name": "write_files", "args": {"files": files}, "id": call_id}])
+
+
+class TestSession:
+    """Test suite for the session file and checkpoint workspace replay."""
+
+    def test_session_roundtrip_per_stage(self, tmp_path):
+        path = str(tmp_path / "session.json")
+        assert load_session("data", path) is None
+
+        save_session("data", path, thread_id="data_1", sandbox_id="sbx-a")
+        save_session("data", path, sandbox_id="sbx-b")
+        save_session("features", path, thread_id="features_1")
+        assert load_session("data", path) == {"thread_id": "data_1", "sandbox_id": "sbx-b"}
+
+        clear_session("data", path)
+        assert load_session("data", path) is None
+        assert load_session("features", path) == {"thread_id": "features_1"}
+
+    def test_retire_session_recycles_the_kept_sandbox(self, tmp_path):
+        """A fresh run hands the unfinished sprint's sandbox back to the pool."""
+        pool = FakePool("sbx-a")
+        path = str(tmp_path / "session.json")
+        save_session("data", path, thread_id="data_1", sandbox_id="sbx-a")
+
+        assert retire_session("data", pool, path) == "sbx-a"
+        assert pool.released == ["sbx-a"]
+        assert load_session("data", path) is None
+        assert retire_session("data", pool, path) is None
+
+    def test_retire_session_with_expired_sandbox(self, tmp_path):
+        pool = FakePool()
+        path = str(tmp_path / "session.json")
+        save_session("data", path, thread_id="data_1", sandbox_id="gone")
+
+        assert retire_session("data", pool, path) == "gone"
+        assert pool.released == []
+        assert load_session("data", path) is None
+
+    def test_workspace_files_replays_writes_in_order(self):
+        values = {
+            "current_stage": "data",
+            "active_config": "columns: [a]",
+            "active_tests": "def test_a(): pass",
+            "messages": [
+                _write_call("1", [{"path": "src/loader.py", "content": "v1"}]),
+                ToolMessage(content="ok", tool_call_id="1", name="write_files"),
+                AIMessage(content="", tool_calls=[{"name": "exec_python", "args": {"code": "x"}, "id": "2"}]),
+                _write_call("3", [{"path": "src/loader.py", "content": "v2"},
+                                  {"path": "src/clean.py", "content": "c"}]),
+            ],
+        }
+        files = {f["path"]: f["content"] for f in workspace_files(values)}
+        assert files == {
+            "configs/data.yaml": "columns: [a]",
+            "tester_outputs/data_tests.py": "def test_a(): pass",
+            "src/loader.py": "v2",
+            "src/clean.py": "c",
+        }
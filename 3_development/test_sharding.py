@@ -0,0 +1,53 @@
+"""
+Unit tests for duration-balanced pytest sharding.
+
+Run with:
+    pytest test_sharding.py -v
+"""
+
+import pytest
+from sharding import split_shards, merge_exit_codes
+
+
+class TestSharding:
+    """Test suite for split_shards and merge_exit_codes."""
+
+    def test_slow_tests_are_spread_out(self):
+        """The two slow tests never end up in the same shard."""
+        nodeids = ["t::a", "t::b", "t::c", "t::d"]
+        durations = {"t::a": 60.0, "t::b": 1.0, "t::c": 55.0, "t::d": 2.0}
+        shards = split_shards(nodeids, durations, 2)
+
+        assert len(shards) == 2
+        assert not any({"t::a", "t::c"} <= set(s) for s in shards)
+
+    def test_collection_order_is_kept_within_a_shard(self):
+        nodeids = ["t::a", "t::b", "t::c"]
+        shards = split_shards(nodeids, {"t::c": 10.0}, 1)
+        assert shards == [["t::a", "t::b", "t::c"]]
+
+    def test_no_empty_shards(self):
+        """More workers than tests only yields non-empty shards."""
+        assert split_shards(["t::a"], {}, 4) == [["t::a"]]
+
+    def test_unknown_tests_use_median_duration(self):
+        """A new test is balanced as if it took the median known time."""
+        nodeids = ["t::a", "t::b", "t::c", "t::new"]
+        durations = {"t::a": 1.0, "t::b": 1.0, "t::c": 1.0}
+        shards = split_shards(nodeids, durations, 2)
+        assert sorted(len(s) for s in shards) == [2, 2]
+
+    @pytest.mark.parametrize("codes, expected", [
+        ([0, 0], 0),
+        ([0, 1], 1),
+        ([0, 5], 0),
+        ([5, 5], 5),
+        ([1, 2], 2),
+        ([], 5),
+    ])
+    def test_merge_exit_codes(self, codes, expected):
+        assert merge_exit_codes(codes) == expected
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,70 @@
+"""
+Unit tests for content-addressed workspace snapshots.
+
+Run with:
+    pytest test_snapshots.py -v
+"""
+
+import os
+import pytest
+from snapshots import best_snapshot, load_index, regressions, restore_snapshot, take_snapshot
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class TestSnapshots:
+    """Test suite for taking, restoring and ranking snapshots."""
+
+    @pytest.fixture(autouse=True)
+    def workspace(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        _write("src/model.py", "v1")
+        _write("src/util.py", "util")
+        _write("tests/test_model.py", "tests")
+
+    def test_only_changed_content_is_stored(self):
+        first = take_snapshot({"passed": 1})
+        _write("src/model.py", "v2")
+        second = take_snapshot({"passed": 2})
+
+        assert (first["id"], first["new_objects"]) == (1, 3)
+        assert (second["id"], second["changed"], second["new_objects"]) == (2, 1, 1)
+        assert "files" not in second and load_index()[1]["passed"] == 2
+
+    def test_restore_puts_workspace_back(self):
+        take_snapshot({"passed": 3})
+        _write("src/model.py", "broken")
+        _write("src/extra.py", "new file")
+        os.remove("src/util.py")
+
+        result = restore_snapshot(1)
+
+        assert result == {"id": 1, "restored": 2, "removed": 1}
+        assert _read("src/model.py") == "v1" and _read("src/util.py") == "util"
+        assert not os.path.exists("src/extra.py")
+
+    def test_restore_unknown_snapshot(self):
+        with pytest.raises(ValueError):
+            restore_snapshot(7)
+
+    def test_best_snapshot_and_regressions(self):
+        records = [{"id": 1, "passed": 4, "passed_ids": ["t::a", "t::b"]},
+                   {"id": 2, "passed": 2, "passed_ids": ["t::a"]},
+                   {"id": 3, "passed": 4, "passed_ids": ["t::a", "t::c"]}]
+        best = best_snapshot(records)
+        assert best["id"] == 3
+        assert best_snapshot([]) is None
+
+        results = {"tests": [{"nodeid": "t::a", "outcome": "passed"},
+                             {"nodeid": "t::c", "outcome": "failed"},
+                             {"nodeid": "t::d", "outcome": "error"}]}
+        assert regressions(best, results) == ["t::c"]
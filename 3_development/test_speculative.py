@@ -0,0 +1,79 @@
+"""
+Unit tests for speculative best-of-N Developer candidates.
+
+Run with:
+    pytest test_speculative.py -v
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from speculative import candidate_score, candidate_temperature, develop_candidate, diversify, pick_best
+from workflow import should_continue
+
+
+def _results(passed, duration):
+    return {"test_results": {"summary": {"passed": passed, "duration": duration}}}
+
+
+class ScriptedLLM:
+    """Replays AI messages in order; records what it was sent."""
+
+    def __init__(self, responses, temperature=0.0):
+        self.responses = list(responses)
+        self.temperature = temperature
+        self.calls = []
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages):
+        self.calls.append(list(messages))
+        return self.responses.pop(0)
+
+    def model_copy(self, update):
+        return ScriptedLLM(self.responses, update["temperature"])
+
+
+class TestSpeculative:
+    """Test suite for candidate scoring and the out-of-graph tool loop."""
+
+    def test_most_passes_win_then_fastest(self):
+        candidates = [_results(3, 1.0), _results(5, 9.0), _results(5, 2.0), None]
+        assert pick_best(candidates) == 2
+        assert candidate_score(None) < candidate_score({"summary": {"passed": 0, "duration": 0.0}})
+
+    def test_ties_go_to_the_earlier_candidate(self):
+        assert pick_best([_results(4, 1.0), _results(4, 1.0)]) == 0
+        assert pick_best([None, None]) is None
+
+    def test_candidates_sample_at_increasing_temperatures(self):
+        llm = ScriptedLLM([])
+        assert diversify(llm, 0) is llm
+        assert diversify(llm, 1).temperature == candidate_temperature(1) > 0
+        assert candidate_temperature(10) == 1.0
+
+    def test_develop_candidate_runs_tool_loop_until_done(self):
+        written = []
+
+        @tool
+        def write_files(files: list) -> str:
+            """Writes files."""
+            written.extend(f["path"] for f in files)
+            return "ok"
+
+        llm = ScriptedLLM([
+            AIMessage(content="", tool_calls=[{"name": "write_files", "id": "w1",
+                                               "args": {"files": [{"path": "src/a.py", "content": "x"}]}}]),
+            AIMessage(content="Done."),
+        ])
+        transcript = develop_candidate(llm, [HumanMessage(content="fix it")], {"write_files": write_files})
+
+        assert written == ["src/a.py"]
+        assert [type(m) for m in transcript] == [AIMessage, ToolMessage, AIMessage]
+        # The second turn saw the tool result
+        assert isinstance(llm.calls[1][-1], ToolMessage)
+
+    def test_tested_candidate_goes_straight_to_reviewer(self):
+        report = AIMessage(content="### ✅ SANDBOX TEST RESULTS (SUCCESS)\n\nok")
+        assert should_continue({"messages": [report], "tool_loop_count": 1}) == "reviewer"
+        assert should_continue({"messages": [AIMessage(content="Done.")], "tool_loop_count": 1}) == "test_runner"
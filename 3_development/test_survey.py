@@ -0,0 +1,111 @@
+"""
+Unit tests for the Architect's incremental codebase survey.
+
+Run with:
+    pytest test_survey.py -v
+"""
+
+import json
+import threading
+import pytest
+from survey import survey_codebase, outline_python, outline_yaml
+
+
+MODULE = '''
+import pandas as pd
+from .schema import COLUMNS
+
+MAX_ROWS = 10
+
+class DataLoader:
+    """Loads football csv files."""
+    path: str
+
+    def load(self, files: list, sep: str = ",") -> pd.DataFrame:
+        return pd.concat([pd.read_csv(f, sep=sep) for f in files])
+
+def clean(df):
+    return df.dropna()
+'''
+
+
+class TestSurvey:
+    """Test suite for survey_codebase and the outline helpers."""
+
+    @pytest.fixture
+    def roots(self, tmp_path):
+        (tmp_path / "src" / "data").mkdir(parents=True)
+        (tmp_path / "src" / "data" / "loader.py").write_text(MODULE)
+        (tmp_path / "src" / "features").mkdir()
+        (tmp_path / "src" / "features" / "indicators.py").write_text("def rolling_form(df, window=5):\n    pass\n")
+        (tmp_path / "configs").mkdir()
+        (tmp_path / "configs" / "data.yaml").write_text("schema:\n  Date: string\n  FTHG: Int64\npaths: []\n")
+        return {"src": str(tmp_path / "src"), "configs": str(tmp_path / "configs")}
+
+    def test_outline_python_keeps_signatures(self):
+        """Classes, methods, functions, constants and imports are outlined."""
+        outline = outline_python(MODULE)
+        assert "imports: pandas, .schema:COLUMNS" in outline
+        assert "MAX_ROWS = ..." in outline
+        assert "class DataLoader()  # Loads football csv files." in outline
+        assert "    def load(self, files: list, sep: str=',') -> pd.DataFrame" in outline
+        assert "def clean(df)" in outline
+        assert "pd.concat" not in outline
+
+    def test_outline_yaml_lists_keys(self):
+        """Top-level keys with their immediate children."""
+        assert outline_yaml("schema:\n  Date: string\n  FTHG: Int64\npaths: []\n") == "schema: [Date, FTHG]\npaths"
+
+    def test_first_run_sends_full_bodies(self, roots):
+        """Without a cache every file is new and sent in full."""
+        result = survey_codebase(roots)
+        assert "pd.concat" in result
+        assert "def rolling_form" in result
+
+    def test_unchanged_irrelevant_files_are_outlined(self, roots, tmp_path):
+        """On the second run only stage-relevant files stay in full."""
+        cache = str(tmp_path / "cache.json")
+        survey_codebase(roots, stage="features", cache_path=cache)
+        result = survey_codebase(roots, stage="features", cache_path=cache)
+
+        contents, outlines = result.split("OUTLINES_START")
+        assert "def rolling_form(df, window=5):\\n    pass" in contents
+        assert "pd.concat" not in result
+        assert "## src/data/loader.py (unchanged)" in outlines
+
+    def test_budget_limits_full_bodies(self, roots):
+        """Files that do not fit the budget fall back to outlines."""
+        result = survey_codebase(roots, stage="data", token_budget=60)
+        contents, outlines = result.split("OUTLINES_START")
+        assert "configs/data.yaml" in contents
+        assert "pd.concat" not in result
+        assert "class DataLoader()" in outlines
+
+    def test_outlined_changes_stay_changed(self, roots, tmp_path):
+        """A new file that did not fit the budget is not marked as seen."""
+        cache = str(tmp_path / "cache.json")
+        first = survey_codebase(roots, stage="features", cache_path=cache, token_budget=30)
+        assert "pd.concat" not in first
+
+        result = survey_codebase(roots, stage="features", cache_path=cache)
+        contents, outlines = result.split("OUTLINES_START")
+        assert "pd.concat" in contents
+        assert "## configs/data.yaml (unchanged)" in outlines
+
+    def test_concurrent_cache_writes_stay_valid(self, roots, tmp_path):
+        """Surveys racing on one cache file never leave it truncated."""
+        cache = tmp_path / "cache.json"
+        threads = [threading.Thread(target=survey_codebase, args=(roots,),
+                                    kwargs={"stage": stage, "cache_path": str(cache)})
+                   for stage in ("data", "features") * 10]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert "src/data/loader.py" in json.loads(cache.read_text())
+        assert list(tmp_path.glob("*.tmp")) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,163 @@
+"""
+Unit tests for the concurrent Developer tool executor.
+
+Run with:
+    pytest test_tool_executor.py -v
+"""
+
+import time
+import asyncio
+import threading
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from tool_executor import ConcurrentToolNode, dependencies
+from logger import SprintLogger
+
+EVENTS = []
+LOCK = threading.Lock()
+
+
+def _record(event):
+    with LOCK:
+        EVENTS.append(event)
+
+
+@tool
+def write_files(files: list):
+    """Fake batch write."""
+    _record(("write_start", files[0]["path"]))
+    time.sleep(0.05)
+    _record(("write_end", files[0]["path"]))
+    return f"wrote {files[0]['content']}"
+
+
+@tool
+def run_code(code: str):
+    """Fake remote execution."""
+    time.sleep(0.1)
+    if code == "boom":
+        raise RuntimeError("kernel died")
+    return f"ran {code}"
+
+
+@tool
+def read_plan(stage_name: str):
+    """Fake host-side plan read."""
+    _record(("read_start", stage_name))
+    time.sleep(0.05)
+    _record(("read_end", stage_name))
+    return f"plan {stage_name}"
+
+
+@tool("run_code")
+async def async_run_code(code: str):
+    """Fake async remote execution."""
+    _record(("run_start", code))
+    await asyncio.sleep(0.05)
+    _record(("run_end", code))
+    return f"ran {code}"
+
+
+@tool("write_files")
+async def async_write_files(files: list):
+    """Fake async batch write."""
+    await asyncio.sleep(0.1)
+    return f"wrote {files[0]['content']}"
+
+
+def _state(*calls):
+    tool_calls = [{"name": name, "args": args, "id": str(i)} for i, (name, args) in enumerate(calls)]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+def _write(path, content="x"):
+    return ("write_files", {"files": [{"path": path, "content": content}]})
+
+
+class TestConcurrentToolNode:
+    """Test suite for dependencies and ConcurrentToolNode."""
+
+    @pytest.fixture(autouse=True)
+    def clear_events(self):
+        EVENTS.clear()
+
+    def test_dependencies(self):
+        calls = _state(_write("src/a.py"), _write("src/b.py"), _write("src/./a.py"),
+                       ("run_code", {"code": "1"}), ("run_code", {"code": "2"}),
+                       _write("src/c.py"))["messages"][-1].tool_calls
+        assert dependencies(calls) == [set(), set(), {0}, {0, 1, 2}, {0, 1, 2, 3}, {3, 4}]
+
+    def test_independent_calls_run_in_parallel_and_keep_order(self):
+        node = ConcurrentToolNode([write_files, run_code], max_concurrency=4)
+        start = time.perf_counter()
+        result = node(_state(*[_write(f"src/{i}.py", str(i)) for i in range(4)]))
+        assert time.perf_counter() - start < 0.15
+        assert [m.content for m in result["messages"]] == ["wrote 0", "wrote 1", "wrote 2", "wrote 3"]
+        assert [m.tool_call_id for m in result["messages"]] == ["0", "1", "2", "3"]
+
+    def test_run_code_calls_run_one_at_a_time_in_order(self):
+        """Scripts share one kernel: no overlap, and the LLM's order is kept."""
+        node = ConcurrentToolNode([async_run_code], max_concurrency=4)
+        asyncio.run(node.acall(_state(*[("run_code", {"code": str(i)}) for i in range(3)])))
+        assert EVENTS == [(edge, str(i)) for i in range(3) for edge in ("run_start", "run_end")]
+
+    def test_reads_overlap_sandbox_calls(self):
+        """read_plan does not touch the sandbox, so it never waits on a write or a script."""
+        calls = _state(_write("src/a.py"), ("run_code", {"code": "1"}),
+                       ("read_plan", {"stage_name": "data"}))["messages"][-1].tool_calls
+        assert dependencies(calls)[2] == set()
+        node = ConcurrentToolNode([write_files, run_code, read_plan], max_concurrency=4)
+        result = node(_state(*[(c["name"], c["args"]) for c in calls]))
+        assert EVENTS.index(("read_start", "data")) < EVENTS.index(("write_end", "src/a.py"))
+        assert result["messages"][2].content == "plan data"
+
+    def test_concurrency_limit(self):
+        node = ConcurrentToolNode([write_files], max_concurrency=1)
+        start = time.perf_counter()
+        node(_state(_write("src/a.py"), _write("src/b.py")))
+        assert time.perf_counter() - start >= 0.1
+
+    def test_writes_to_same_path_are_ordered(self):
+        node = ConcurrentToolNode([write_files], max_concurrency=4)
+        result = node(_state(_write("src/a.py", "v1"), _write("src/a.py", "v2")))
+        assert EVENTS == [("write_start", "src/a.py"), ("write_end", "src/a.py"),
+                          ("write_start", "src/a.py"), ("write_end", "src/a.py")]
+        assert [m.content for m in result["messages"]] == ["wrote v1", "wrote v2"]
+
+    def test_errors_become_tool_messages(self):
+        node = ConcurrentToolNode([run_code])
+        result = node(_state(("run_code", {"code": "boom"}), ("read_plan", {"stage_name": "data"})))
+        assert [m.status for m in result["messages"]] == ["error", "error"]
+        assert "kernel died" in result["messages"][0].content
+        assert "not a valid tool" in result["messages"][1].content
+
+    def test_async_calls_run_concurrently_on_the_loop(self):
+        node = ConcurrentToolNode([async_write_files], max_concurrency=4)
+        start = time.perf_counter()
+        result = asyncio.run(node.acall(_state(*[_write(f"src/{i}.py", str(i)) for i in range(4)])))
+        assert time.perf_counter() - start < 0.3
+        assert [m.content for m in result["messages"]] == ["wrote 0", "wrote 1", "wrote 2", "wrote 3"]
+
+    def test_tool_calls_are_timed_as_spans(self, tmp_path):
+        logger = SprintLogger("test_tools", log_dir=str(tmp_path))
+        node = ConcurrentToolNode([run_code], logger=logger)
+        node(_state(("run_code", {"code": "1"}), ("run_code", {"code": "boom"})))
+        assert len(logger.spans["tool:run_code"]) == 2
+        assert all(d >= 90 for d in logger.spans["tool:run_code"])
+        events = (tmp_path / logger.events_file.name).read_text(encoding="utf-8")
+        assert '"status": "error"' in events and '"status": "ok"' in events
+
+    def test_tool_threads_keep_the_current_node(self, tmp_path):
+        """LLM usage inside a tool call is attributed to the node that issued it."""
+        logger = SprintLogger("test_tools", log_dir=str(tmp_path))
+
+        @tool
+        def ask(question: str):
+            """Fake tool that calls an LLM."""
+            logger.llm_usage(10, 5)
+            return "ok"
+
+        with logger.span("developer"):
+            ConcurrentToolNode([ask])(_state(("ask", {"question": "a"}), ("ask", {"question": "b"})))
+        assert logger.tokens == {"developer": [20, 10, 2]}
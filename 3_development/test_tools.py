@@ -0,0 +1,47 @@
+"""
+Unit tests for the Developer's sandbox tools, run against a LocalSandbox.
+
+Run with:
+    pytest test_tools.py -v
+"""
+
+import pytest
+from types import SimpleNamespace
+from local_sandbox import LocalSandbox
+from tools import create_tools, _write_report
+
+
+class TestWriteFiles:
+    """Test suite for the batched write_files tool."""
+
+    @pytest.fixture
+    def tools(self, tmp_path):
+        sandbox = LocalSandbox(workdir=str(tmp_path / "box"))
+        yield create_tools(sandbox), sandbox
+        sandbox.kill()
+
+    def test_writes_every_file(self, tools):
+        """All files land in the sandbox in one batch and are reported."""
+        tools, sandbox = tools
+        report = tools["write_files"].invoke({"files": [
+            {"path": "src/a.py", "content": "A = 1\n"},
+            {"path": "tests/test_a.py", "content": "def test_a(): pass\n"},
+        ]})
+
+        assert report.startswith("Successfully wrote 2 files")
+        assert sandbox.files.read("src/a.py") == "A = 1\n"
+
+    def test_missing_report_is_an_error(self):
+        """A script that dies before reporting surfaces its stderr, not '0 files'."""
+        execution = SimpleNamespace(error=None, logs=SimpleNamespace(
+            stdout=[], stderr=["MemoryError: out of memory\n"]))
+
+        report = _write_report(execution, 0.0)
+
+        assert report.startswith("Error writing files")
+        assert "MemoryError: out of memory" in report
+        assert "Successfully" not in report
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
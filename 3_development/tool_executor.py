@@ -0,0 +1,149 @@
+"""
+Concurrent replacement for LangGraph's ToolNode in the Developer tool loop.
+
+For calls that touch the sandbox this is ordered execution with a
+concurrency cap, not free parallelism: a call waits for the earlier calls
+it depends on, and a per-sandbox semaphore caps how many run at once.
+- write_files after a write_files touching any of the same paths,
+- run_code after every earlier write_files (it must see the new code)
+  and every earlier run_code (they share one kernel, so scripts run one at
+  a time, in the order the LLM wrote them),
+- write_files after every earlier run_code (it must not change a file
+  under a running script).
+What overlaps is write_files batches to different paths (up to the next
+run_code) and the tools that do not touch the sandbox (read_plan reads the
+plans on the host), which never wait.
+Results are returned in call order, whatever order they finish in.
+`acall` does the same on the event loop for async tools (create_async_tools).
+"""
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import ToolMessage
+
+DEFAULT_TOOL_CONCURRENCY = 4
+WRITE_TOOLS = ("write_files",)
+# Tool names as the LLM sees them (create_tools exposes run_code as "exec_python")
+EXEC_TOOLS = ("run_code",)
+
+
+def _write_paths(call):
+    files = (call.get("args") or {}).get("files") or []
+    return {os.path.normpath(f.get("path", "")) for f in files if isinstance(f, dict)}
+
+
+def dependencies(calls):
+    """For each call, the indices of earlier calls it must wait for."""
+    deps = []
+    for j, call in enumerate(calls):
+        needs = set()
+        for i, earlier in enumerate(calls[:j]):
+            if call["name"] in WRITE_TOOLS and earlier["name"] in WRITE_TOOLS:
+                if _write_paths(call) & _write_paths(earlier):
+                    needs.add(i)
+            elif call["name"] in EXEC_TOOLS and earlier["name"] in WRITE_TOOLS + EXEC_TOOLS:
+                needs.add(i)
+            elif call["name"] in WRITE_TOOLS and earlier["name"] in EXEC_TOOLS:
+                needs.add(i)
+        deps.append(needs)
+    return deps
+
+
+class ConcurrentToolNode:
+    """Graph node: runs the tool calls of the last AI message, returns ToolMessages in call order."""
+
+    def __init__(self, tools, max_concurrency: int = DEFAULT_TOOL_CONCURRENCY, logger=None):
+        self.tools = {t.name: t for t in tools}
+        self.max_concurrency = max(1, max_concurrency)
+        # Optional SprintLogger: one "tool" telemetry span per call
+        self.logger = logger
+        # One limit per node, i.e. per sandbox the tools are bound to
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def _span(self, call):
+        return self.logger.span(call["name"], kind="tool") if self.logger else nullcontext()
+
+    def _run(self, call):
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return ToolMessage(
+                content=f"Error: {call['name']} is not a valid tool, try one of [{', '.join(self.tools)}].",
+                name=call["name"], tool_call_id=call["id"], status="error",
+            )
+        with self._slots:
+            try:
+                with self._span(call):
+                    output = tool.invoke(call["args"])
+            except Exception as e:
+                return ToolMessage(content=f"Error: {e!r}\n Please fix your mistakes.",
+                                   name=call["name"], tool_call_id=call["id"], status="error")
+        return ToolMessage(content=output if isinstance(output, str) else str(output),
+                           name=call["name"], tool_call_id=call["id"])
+
+    async def _arun(self, call, slots):
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return self._run(call)  # Unknown-tool error message, no I/O
+        async with slots:
+            try:
+                with self._span(call):
+                    output = await tool.ainvoke(call["args"])
+            except Exception as e:
+                return ToolMessage(content=f"Error: {e!r}\n Please fix your mistakes.",
+                                   name=call["name"], tool_call_id=call["id"], status="error")
+        return ToolMessage(content=output if isinstance(output, str) else str(output),
+                           name=call["name"], tool_call_id=call["id"])
+
+    def _after(self, waits, call):
+        for future in waits:
+            future.result()
+        return self._run(call)
+
+    def __call__(self, state):
+        calls = list(state["messages"][-1].tool_calls)
+        if not calls:
+            return {"messages": []}
+
+        start = time.perf_counter()
+        deps = dependencies(calls)
+        futures = []
+        # One thread per call; the semaphore, not the pool size, bounds sandbox load,
+        # so calls blocked on dependencies never hold a slot. Each call runs in a
+        # copy of the caller's context, keeping the logger's current node.
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            for j, call in enumerate(calls):
+                waits = [futures[i] for i in sorted(deps[j])]
+                futures.append(pool.submit(contextvars.copy_context().run, self._after, waits, call))
+            messages = [f.result() for f in futures]
+
+        print(f"[TOOLS] {len(calls)} calls in {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"(max {self.max_concurrency} concurrent)")
+        return {"messages": messages}
+
+    async def acall(self, state):
+        """Async __call__: one task per call, same dependencies and limit."""
+        calls = list(state["messages"][-1].tool_calls)
+        if not calls:
+            return {"messages": []}
+
+        start = time.perf_counter()
+        deps = dependencies(calls)
+        slots = asyncio.Semaphore(self.max_concurrency)
+        tasks = []
+
+        async def _after(waits, call):
+            if waits:
+                await asyncio.gather(*waits)
+            return await self._arun(call, slots)
+
+        for j, call in enumerate(calls):
+            tasks.append(asyncio.ensure_future(_after([tasks[i] for i in sorted(deps[j])], call)))
+        messages = list(await asyncio.gather(*tasks))
+
+        print(f"[TOOLS] {len(calls)} calls in {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"(max {self.max_concurrency} concurrent)")
+        return {"messages": messages}
@@ -1,8 +1,12 @@
 import os
+import re
+import json
+import time
+import zlib
+import base64
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
-from langchain.tools import tool
-from e2b_code_interpreter import Sandbox
+from langchain_core.tools import tool
 
 # Define the schema for the LLM
 class WriteFilesInput(BaseModel):
@@ -10,19 +14,84 @@ class WriteFilesInput(BaseModel):
         description="List of dicts with 'path' (str) and 'content' (str)."
     )
 
-def create_tools(sandbox: Sandbox):
+# Runs inside the sandbox: unpacks the batch, creates all directories once,
+# then writes each file and prints a {path: "ok" | error} map.
+WRITE_BATCH_SCRIPT = """
+import os, json, zlib, base64
+_files = json.loads(zlib.decompress(base64.b64decode("__PAYLOAD__")).decode("utf-8"))
+for _d in sorted({os.path.dirname(f["path"]) for f in _files} - {""}):
+    os.makedirs(_d, exist_ok=True)
+_results = {}
+for _f in _files:
+    try:
+        with open(_f["path"], "w", encoding="utf-8") as _fh:
+            _fh.write(_f["content"])
+        _results[_f["path"]] = "ok"
+    except Exception as _e:
+        _results[_f["path"]] = f"{type(_e).__name__}: {_e}"
+print("WRITE_RESULTS_START" + json.dumps(_results) + "WRITE_RESULTS_END")
+"""
+
+def _run_output(execution):
+    stdout = "\n".join(execution.logs.stdout)
+    stderr = "\n".join(execution.logs.stderr)
+
+    if not stdout and not stderr:
+        return "Execution successful (no output produced)."
+
+    return f"STDOUT: {stdout}\nSTDERR: {stderr}"
+
+def _write_batch_script(files):
+    # All files travel in one compressed batch; the sandbox creates every
+    # directory in one pass and writes each file, reporting per-file status.
+    payload = base64.b64encode(zlib.compress(json.dumps(
+        [{"path": f["path"], "content": f["content"]} for f in files]
+    ).encode("utf-8"))).decode("ascii")
+    return WRITE_BATCH_SCRIPT.replace("__PAYLOAD__", payload)
+
+def _write_report(execution, start):
+    if execution.error:
+        return f"Error writing files: {execution.error.name}: {execution.error.value}"
+
+    stdout = "".join(execution.logs.stdout)
+    match = re.search(r"WRITE_RESULTS_START(.*?)WRITE_RESULTS_END", stdout, re.DOTALL)
+    if not match:
+        # The script died before reporting (killed, out of memory, ...)
+        stderr = "".join(execution.logs.stderr)
+        return f"Error writing files: the sandbox returned no write report.\nSTDOUT: {stdout}\nSTDERR: {stderr}"
+    results = json.loads(match.group(1))
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    written = [p for p, status in results.items() if status == "ok"]
+    failed = {p: status for p, status in results.items() if status != "ok"}
+
+    report = f"Successfully wrote {len(written)} files: {', '.join(written)}"
+    if failed:
+        report += "\nFailed to write " + "; ".join(f"{p} ({err})" for p, err in failed.items())
+    return f"{report}\n[write_files latency: {latency_ms:.0f} ms, 1 round trip]"
+
+def _read_plan_file(stage_name):
+    # Using absolute path logic is safer for long-term research
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(base_dir, "..", "2_dev_plan", "outputs", f"dev_{stage_name}_plan.md")
     
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return f"Error: Plan for {stage_name} not found at {file_path}"
+
+def create_tools(sandbox):
+    """
+    The Developer's tools over any sandbox with the E2B surface
+    (e2b_code_interpreter.Sandbox, local_sandbox.LocalSandbox; see the
+    sandbox contract in local_sandbox.py).
+    """
+
     @tool
     def run_code(code: str):
         """Run Python code in the sandbox. Use this to execute pytest or verify data."""
-        execution = sandbox.run_code(code)
-        stdout = "\n".join(execution.logs.stdout)
-        stderr = "\n".join(execution.logs.stderr)
-    
-        if not stdout and not stderr:
-            return "Execution successful (no output produced)."
-    
-        return f"STDOUT: {stdout}\nSTDERR: {stderr}"
+        return _run_output(sandbox.run_code(code))
 
     @tool(args_schema=WriteFilesInput)
     def write_files(files: List[Dict[str, Any]]):
@@ -31,41 +100,55 @@ def create_tools(sandbox: Sandbox):
         Automatically creates directories if they don't exist.
         """
         try:
-            paths_written = []
-            for file_info in files:
-                path = file_info['path']
-                content = file_info['content']
-                
-                # CRITICAL FIX: Ensure directory structure exists in E2B
-                # We do this by running a small shell command in the sandbox
-                dir_path = os.path.dirname(path)
-                if dir_path:
-                    sandbox.commands.run(f"mkdir -p {dir_path}")
-                
-                sandbox.files.write(path, content)
-                paths_written.append(path)
-            
-            return f"Successfully wrote {len(paths_written)} files: {', '.join(paths_written)}"
+            start = time.perf_counter()
+            return _write_report(sandbox.run_code(_write_batch_script(files)), start)
         except Exception as e:
             return f"Error writing files: {str(e)}"
 
     @tool
     def read_plan(stage_name: str):
         """Reads the .md plan file for a specific development stage."""
-        # Using absolute path logic is safer for long-term research
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, "..", "2_dev_plan", "outputs", f"dev_{stage_name}_plan.md")
-        
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            return f"Error: Plan for {stage_name} not found at {file_path}"
+        return _read_plan_file(stage_name)
 
-    # Inside create_tools(sandbox: Sandbox)
+    # Inside create_tools(sandbox)
     
     return {
         "read_plan": read_plan,
         "exec_python": run_code,
         "write_files": write_files
-    }
\ No newline at end of file
+    }
+
+def create_async_tools(sandbox):
+    """
+    Same tools (names, schemas, descriptions) for an AsyncSandbox (or an
+    AsyncLocalSandbox); use them with `ainvoke`, e.g. from the async nodes
+    in agents.py.
+    """
+
+    @tool
+    async def run_code(code: str):
+        """Run Python code in the sandbox. Use this to execute pytest or verify data."""
+        return _run_output(await sandbox.run_code(code))
+
+    @tool(args_schema=WriteFilesInput)
+    async def write_files(files: List[Dict[str, Any]]):
+        """
+        Writes multiple files to the sandbox filesystem. 
+        Automatically creates directories if they don't exist.
+        """
+        try:
+            start = time.perf_counter()
+            return _write_report(await sandbox.run_code(_write_batch_script(files)), start)
+        except Exception as e:
+            return f"Error writing files: {str(e)}"
+
+    @tool
+    async def read_plan(stage_name: str):
+        """Reads the .md plan file for a specific development stage."""
+        return _read_plan_file(stage_name)
+
+    return {
+        "read_plan": read_plan,
+        "exec_python": run_code,
+        "write_files": write_files
+    }
@@ -1,65 +1,178 @@
+import io
 import re
 import os
-import shutil
-import time
-import base64
+import json
+import inspect
+import zipfile
+import hashlib
+import tempfile
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def upload_package_to_sandbox(sandbox, package_root, orchestrator_root):
-    zip_path = "sync_package" 
-    temp_dir = "temp_sync_staging"
-
-    # 1. Robust Cleanup (Windows-safe)
-    if os.path.exists(temp_dir):
-        try:
-            shutil.rmtree(temp_dir)
-        except PermissionError:
-            old_dir = f"{temp_dir}_{int(time.time())}"
-            os.rename(temp_dir, old_dir)
-    
-    os.makedirs(temp_dir, exist_ok=True)
+import manifest
+
+SYNC_FOLDERS = ("src", "configs", "tests")
+SYNC_INDEX_FILE = ".sync_index.json"
+SYNC_ARCHIVE = "sync_package.zip"
+# Concurrent stages share the local index file
+_INDEX_LOCK = threading.Lock()
+
+def _sync_roots(package_root, orchestrator_root):
+    """Maps the sandbox folder name to its local source directory."""
+    return {
+        "src": os.path.join(package_root, "src"),
+        "configs": os.path.join(orchestrator_root, "configs"),
+        "tests": os.path.join(package_root, "tests"),
+    }
+
+def _run_and_capture(sandbox, code):
+    """Runs code in the sandbox and returns its stdout as a single string."""
+    execution = sandbox.run_code(code)
+    if getattr(execution, "error", None):
+        raise RuntimeError(f"Sandbox error: {execution.error}")
+    return "".join(execution.logs.stdout)
+
+def _manifest_script():
+    return (
+        inspect.getsource(manifest)
+        + f"\nprint('SYNC_MANIFEST_START' + json.dumps(build_manifest("
+        + f"{{f: f for f in {SYNC_FOLDERS!r}}}, {SYNC_INDEX_FILE!r})) + 'SYNC_MANIFEST_END')\n"
+    )
+
+def _parse_manifest(stdout):
+    match = re.search(r"SYNC_MANIFEST_START(.*?)SYNC_MANIFEST_END", stdout, re.DOTALL)
+    if not match:
+        raise RuntimeError("Could not read the remote manifest from the sandbox.")
+    return json.loads(match.group(1))
+
+def fetch_remote_manifest(sandbox):
+    """
+    Builds the content-hash manifest inside the sandbox, using the same
+    `manifest` module as the local side, and returns it as a dict.
+    """
+    return _parse_manifest(_run_and_capture(sandbox, _manifest_script()))
+
+def _delta_archive(roots, changed):
+    """Zips only the files that differ and returns the archive bytes."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for key in changed:
+            prefix, rel = key.split("/", 1)
+            zf.write(os.path.join(roots[prefix], rel), key)
+    return buffer.getvalue()
+
+def _apply_script(deleted):
+    """Remote apply: unpack and delete in a single round trip."""
+    return f"""
+import os
+import zipfile
+if os.path.exists({SYNC_ARCHIVE!r}):
+    with zipfile.ZipFile({SYNC_ARCHIVE!r}) as zf:
+        zf.extractall('.')
+    os.remove({SYNC_ARCHIVE!r})
+for path in {deleted!r}:
+    if os.path.exists(path):
+        os.remove(path)
+"""
+
+def upload_package_to_sandbox(sandbox, package_root, orchestrator_root, delta=True):
+    """
+    Pushes local src, configs and tests into the sandbox.
 
+    With `delta=True` both sides are indexed by content hash and only new or
+    changed files are sent, together with a delete list for files that no
+    longer exist locally. With `delta=False` everything is sent (no deletes).
+    A local sandbox (local_sandbox.py) links the folders in instead.
+    """
+    roots = _sync_roots(package_root, orchestrator_root)
+
+    # 1. Index both sides (the local index is cached next to the orchestrator)
+    local_index = os.path.join(orchestrator_root, SYNC_INDEX_FILE)
+    with _INDEX_LOCK:
+        local = manifest.build_manifest(roots, local_index)
+
+    sync_in = getattr(sandbox, "sync_in", None)
+    if sync_in is not None:
+        # Same machine: no archive, no round trip
+        changed, deleted = sync_in(roots)
+        print(f"✅ Local sandbox synchronised: {len(changed)} changed, {len(deleted)} deleted (src, configs, tests).")
+        return {"changed": changed, "deleted": deleted, "manifest": local}
+
+    remote = fetch_remote_manifest(sandbox) if delta else {}
+    changed, deleted = manifest.diff_manifests(local, remote)
+
+    if not changed and not deleted:
+        print("✅ Sandbox already up to date (src, configs, tests).")
+        return {"changed": [], "deleted": [], "manifest": local}
+
+    # 2-3. Archive only the files that differ and UPLOAD
+    if changed:
+        sandbox.files.write(SYNC_ARCHIVE, _delta_archive(roots, changed))
+
+    # 4. Remote apply: unpack and delete in a single round trip
+    _run_and_capture(sandbox, _apply_script(deleted))
+
+    print(f"✅ Sandbox synchronised: {len(changed)} changed, {len(deleted)} deleted (src, configs, tests).")
+    return {"changed": changed, "deleted": deleted, "manifest": local}
+
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+def _read_remote_stream(sandbox, path):
+    """
+    Yields the raw bytes of a sandbox file in chunks. Falls back to a single
+    binary read on SDK versions without streaming support.
+    """
     try:
-        # 2. Prepare the payload (Now including tests)
-        src_local = os.path.join(package_root, "src")
-        configs_local = os.path.join(orchestrator_root, "configs")
-        tests_local = os.path.join(package_root, "tests") # Path to local tests
-        
-        if os.path.exists(src_local):
-            shutil.copytree(src_local, os.path.join(temp_dir, "src"), dirs_exist_ok=True)
-        if os.path.exists(configs_local):
-            shutil.copytree(configs_local, os.path.join(temp_dir, "configs"), dirs_exist_ok=True)
-        if os.path.exists(tests_local):
-            shutil.copytree(tests_local, os.path.join(temp_dir, "tests"), dirs_exist_ok=True)
-
-        # 3. Create the archive
-        shutil.make_archive(zip_path, 'zip', root_dir=temp_dir)
-        zip_file_full = f"{zip_path}.zip"
-
-        # 4. UPLOAD
-        with open(zip_file_full, "rb") as f:
-            file_content = f.read()
-            sandbox.files.write(zip_file_full, file_content)
-        
-        # 5. Remote Unzip
-        sandbox.commands.run(f"unzip -o {zip_file_full} -d .")
-        sandbox.commands.run(f"rm {zip_file_full}")
-        
-        print("✅ Sandbox synchronised successfully (src, configs, tests).")
-
-    finally:
-        if os.path.exists(f"{zip_path}.zip"):
-            os.remove(f"{zip_path}.zip")
-
-def download_package_from_sandbox(sandbox, package_root, orchestrator_root):
-    """
-    Syncs archives using Base64 encoding to prevent 'Bad magic number' corruption.
-    """
-    # 1. Archive AND Base64 encode inside the sandbox
-    zip_command = """
+        stream = sandbox.files.read(path, format="stream")
+    except TypeError:
+        stream = None
+    if stream is None:
+        data = sandbox.files.read(path, format="bytes")
+        data = bytes(data.data if hasattr(data, "data") else data)
+        for i in range(0, len(data), EXPORT_CHUNK_SIZE):
+            yield data[i:i + EXPORT_CHUNK_SIZE]
+        return
+    for chunk in stream:
+        yield bytes(chunk)
+
+def _extract_verified(chunks, remote_zip, expected, dest):
+    """
+    Buffers an archive from `chunks`, verifies its size and sha256, and
+    extracts it straight into `dest`.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    # Spooled: stays in memory for normal packages, spills to disk for large ones
+    with tempfile.SpooledTemporaryFile(max_size=64 * EXPORT_CHUNK_SIZE) as buffer:
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            buffer.write(chunk)
+
+        if size != expected["size"] or digest.hexdigest() != expected["sha256"]:
+            raise IOError(
+                f"Checksum mismatch for {remote_zip} "
+                f"({size} bytes, expected {expected['size']})"
+            )
+
+        buffer.seek(0)
+        os.makedirs(dest, exist_ok=True)
+        with zipfile.ZipFile(buffer) as zf:
+            zf.extractall(dest)
+    return size
+
+def _download_archive(sandbox, remote_zip, expected, dest):
+    """Streams one archive out of the sandbox and extracts it after verification."""
+    return _extract_verified(_read_remote_stream(sandbox, remote_zip), remote_zip, expected, dest)
+
+# Archives each folder inside the sandbox and reports size + checksum per archive
+EXPORT_SCRIPT = """
 import shutil
 import os
-import base64
+import json
+import hashlib
+import zipfile
 
 # Clean up pycache first
 for root, dirs, files in os.walk('.'):
@@ -67,56 +180,181 @@ for root, dirs, files in os.walk('.'):
         if d == '__pycache__':
             shutil.rmtree(os.path.join(root, d))
 
-# Now zip and encode
+exports = {}
 for folder in ['src', 'tests', 'configs']:
-    if os.path.exists(folder):
-        zip_path = shutil.make_archive(f'{folder}_export', 'zip', folder)
-        with open(zip_path, 'rb') as f:
-            encoded_string = base64.b64encode(f.read()).decode('utf-8')
-        with open(f'{folder}_export.b64', 'w') as f:
-            f.write(encoded_string)
+    if not os.path.exists(folder):
+        continue
+    zip_path = f'{folder}_export.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for dirpath, _, filenames in os.walk(folder):
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                zf.write(full, os.path.relpath(full, folder))
+    with open(zip_path, 'rb') as f:
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    exports[folder] = {'path': zip_path, 'size': os.path.getsize(zip_path), 'sha256': digest.hexdigest()}
+print('EXPORTS_START' + json.dumps(exports) + 'EXPORTS_END')
 """
-    print("📦 Zipping and encoding in sandbox...")
-    sandbox.run_code(zip_command)
-
-    # 2. Map the .b64 files to local destinations
-    sync_map = [
-        ("src_export.b64", os.path.join(package_root, "src")),
-        ("tests_export.b64", os.path.join(package_root, "tests")), 
-        ("configs_export.b64", os.path.join(orchestrator_root, "configs"))
-    ]
-
-    for b64_name, dest in sync_map:
-        try:
-            # Read the safe text string
-            response = sandbox.files.read(b64_name)
-            
-            # Handle different API return types (object vs string)
-            b64_content = response.data if hasattr(response, 'data') else response
-            
-            if not b64_content:
-                continue
-
-            # Decode the Base64 back into binary ZIP data
-            zip_data = base64.b64decode(b64_content)
-            
-            local_zip = f"temp_{b64_name.replace('.b64', '.zip')}"
-            with open(local_zip, "wb") as f:
-                f.write(zip_data)
-
-            # Unpack
-            print(f"🚚 Unpacking {b64_name} into {dest}...")
-            os.makedirs(dest, exist_ok=True)
-            shutil.unpack_archive(local_zip, dest)
-            
-            os.remove(local_zip)
-            print(f"✅ {b64_name.split('_')[0]} synced successfully.")
-            
-        except Exception as e:
-            print(f"ℹ️ Skipping {b64_name}: {e}")
+
+def _parse_exports(stdout):
+    match = re.search(r"EXPORTS_START(.*?)EXPORTS_END", stdout, re.DOTALL)
+    return json.loads(match.group(1)) if match else {}
+
+def _export_map(package_root, orchestrator_root):
+    return {
+        "src": os.path.join(package_root, "src"),
+        "tests": os.path.join(package_root, "tests"),
+        "configs": os.path.join(orchestrator_root, "configs"),
+    }
+
+def download_package_from_sandbox(sandbox, package_root, orchestrator_root, max_workers=3):
+    """
+    Syncs src, tests and configs back from the sandbox as compressed binary
+    archives, streamed in chunks and verified with sha256 checksums.
+    The three folders are transferred concurrently. A local sandbox links
+    its files back instead.
+    """
+    sync_out = getattr(sandbox, "sync_out", None)
+    if sync_out is not None:
+        copied = sync_out(_export_map(package_root, orchestrator_root))
+        print(f"🏁 Sync complete ({len(copied)} files brought back from the local sandbox).")
+        return
+
+    # 1. Archive inside the sandbox and report size + checksum per archive
+    print("📦 Zipping in sandbox...")
+    exports = _parse_exports(_run_and_capture(sandbox, EXPORT_SCRIPT))
+
+    # 2. Map the archives to local destinations
+    sync_map = _export_map(package_root, orchestrator_root)
+
+    def _sync_one(folder):
+        expected = exports[folder]
+        dest = sync_map[folder]
+        print(f"🚚 Streaming {expected['path']} into {dest}...")
+        size = _download_archive(sandbox, expected["path"], expected, dest)
+        print(f"✅ {folder} synced successfully ({size} bytes).")
+
+    # 3. Transfer concurrently
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_sync_one, folder): folder for folder in sync_map if folder in exports}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"ℹ️ Skipping {futures[future]}: {e}")
+
+    # 4. Remove the remote archives
+    if exports:
+        paths = " ".join(e["path"] for e in exports.values())
+        sandbox.commands.run(f"rm -f {paths}")
 
     print("🏁 Sync complete.")
-    
+
+CHANGES_ARCHIVE = "sync_changes.zip"
+
+def download_changes_from_sandbox(sandbox, package_root, orchestrator_root, baseline):
+    """
+    Brings back only what this sandbox changed since `baseline` (the manifest
+    returned by upload_package_to_sandbox), so several sandboxes working on
+    the same package can be merged into one tree. A file that also changed
+    locally since the baseline is a conflict: the sandbox copy wins and the
+    path is reported.
+    """
+    roots = _sync_roots(package_root, orchestrator_root)
+    remote = fetch_remote_manifest(sandbox)
+    changed = sorted(k for k, digest in remote.items() if baseline.get(k) != digest)
+    deleted = sorted(k for k in baseline if k not in remote)
+
+    local = manifest.build_manifest(roots)
+    conflicts = [k for k in changed + deleted if local.get(k) != baseline.get(k) and local.get(k) != remote.get(k)]
+
+    if changed:
+        archive_script = f"""
+import json
+import hashlib
+import zipfile
+with zipfile.ZipFile({CHANGES_ARCHIVE!r}, 'w', zipfile.ZIP_DEFLATED) as zf:
+    for key in {changed!r}:
+        zf.write(key)
+with open({CHANGES_ARCHIVE!r}, 'rb') as f:
+    data = f.read()
+print('CHANGES_START' + json.dumps({{'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}}) + 'CHANGES_END')
+"""
+        stdout = _run_and_capture(sandbox, archive_script)
+        expected = json.loads(re.search(r"CHANGES_START(.*?)CHANGES_END", stdout, re.DOTALL).group(1))
+        data = b"".join(_read_remote_stream(sandbox, CHANGES_ARCHIVE))
+        sandbox.commands.run(f"rm -f {CHANGES_ARCHIVE}")
+        if len(data) != expected["size"] or hashlib.sha256(data).hexdigest() != expected["sha256"]:
+            raise IOError(f"Checksum mismatch for {CHANGES_ARCHIVE}")
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            for key in changed:
+                prefix, rel = key.split("/", 1)
+                dest = os.path.join(roots[prefix], rel)
+                os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+                with open(dest, "wb") as f:
+                    f.write(zf.read(key))
+
+    for key in deleted:
+        prefix, rel = key.split("/", 1)
+        path = os.path.join(roots[prefix], rel)
+        if os.path.exists(path):
+            os.remove(path)
+
+    print(f"🏁 Merged back: {len(changed)} changed, {len(deleted)} deleted, {len(conflicts)} conflicts.")
+    return {"changed": changed, "deleted": deleted, "conflicts": conflicts}
+
+MIRROR_FOLDERS = ("src", "tests", "configs", "tester_outputs")
+MIRROR_ARCHIVE = "workspace_mirror.zip"
+
+def mirror_workspace(source, targets, folders=MIRROR_FOLDERS):
+    """
+    Copies the working folders of one sandbox into other sandboxes: archived
+    once in the source, read back once as binary, then pushed and unpacked
+    into every target concurrently (replacing their copies of those folders).
+    """
+    archive_script = f"""
+import os
+import json
+import hashlib
+import zipfile
+with zipfile.ZipFile({MIRROR_ARCHIVE!r}, 'w', zipfile.ZIP_DEFLATED) as zf:
+    for folder in {list(folders)!r}:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = [d for d in dirnames if d != '__pycache__']
+            for name in filenames:
+                zf.write(os.path.join(dirpath, name))
+with open({MIRROR_ARCHIVE!r}, 'rb') as f:
+    data = f.read()
+print('MIRROR_START' + json.dumps({{'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}}) + 'MIRROR_END')
+"""
+    stdout = _run_and_capture(source, archive_script)
+    expected = json.loads(re.search(r"MIRROR_START(.*?)MIRROR_END", stdout, re.DOTALL).group(1))
+    data = b"".join(_read_remote_stream(source, MIRROR_ARCHIVE))
+    if hashlib.sha256(data).hexdigest() != expected["sha256"]:
+        raise IOError("Checksum mismatch while mirroring the sandbox workspace")
+    source.commands.run(f"rm -f {MIRROR_ARCHIVE}")
+
+    unpack_script = f"""
+import os
+import shutil
+import zipfile
+for folder in {list(folders)!r}:
+    shutil.rmtree(folder, ignore_errors=True)
+with zipfile.ZipFile({MIRROR_ARCHIVE!r}) as zf:
+    zf.extractall('.')
+os.remove({MIRROR_ARCHIVE!r})
+"""
+
+    def _push(target):
+        target.files.write(MIRROR_ARCHIVE, data)
+        _run_and_capture(target, unpack_script)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+        list(pool.map(_push, targets))
+
 def read_plan_from_disk(stage: str) -> str:
     """
     Robustly reads the .md plan file using absolute paths.
@@ -1,7 +1,9 @@
 from typing import Literal
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
+from langchain_core.runnables import RunnableLambda
 from state import AgentState
+from context_budget import is_test_report
+from tool_executor import ConcurrentToolNode, DEFAULT_TOOL_CONCURRENCY
 
 # --- 1. Router Functions ---
 
@@ -11,11 +13,15 @@ def architect_condition(state):
         return END
     return "tester"
 
-def should_continue(state) -> Literal["tools", "test_runner"]:
+def should_continue(state) -> Literal["tools", "test_runner", "reviewer"]:
     messages = state["messages"]
     last_message = messages[-1]
     loop_count = state.get("tool_loop_count", 0)
     
+    # A speculative Developer already tested its winning candidate
+    if is_test_report(last_message):
+        return "reviewer"
+
     if last_message.tool_calls and loop_count < 5:
         return "tools"
     
@@ -40,14 +46,18 @@ def human_router(state: AgentState):
 
 # --- 2. Main Workflow Construction ---
 
-def run_workflow(architect_node, tester_node, developer_node, test_runner_node, reviewer_node, human_node, tools):
+def run_workflow(architect_node, tester_node, developer_node, test_runner_node, reviewer_node, human_node, tools,
+                 checkpointer=None, tool_concurrency=DEFAULT_TOOL_CONCURRENCY, logger=None):
     workflow = StateGraph(AgentState)
 
     # Add Nodes
     workflow.add_node("architect", architect_node)
     workflow.add_node("tester", tester_node)
     workflow.add_node("developer", developer_node)
-    workflow.add_node("tools", ToolNode(list(tools.values())))
+    # Independent tool calls of one Developer turn run in parallel.
+    # Sync tools run under invoke, async tools (create_async_tools) under ainvoke.
+    tool_node = ConcurrentToolNode(list(tools.values()), tool_concurrency, logger)
+    workflow.add_node("tools", RunnableLambda(tool_node, afunc=tool_node.acall))
     workflow.add_node("test_runner", test_runner_node)
     workflow.add_node("reviewer", reviewer_node)
     workflow.add_node("human_instructor", human_node)
@@ -65,7 +75,8 @@ def run_workflow(architect_node, tester_node, developer_node, test_runner_node,
         should_continue,
         {
             "tools": "tools",
-            "test_runner": "test_runner"
+            "test_runner": "test_runner",
+            "reviewer": "reviewer"
         }
     )
     workflow.add_edge("tools", "developer")
@@ -88,4 +99,6 @@ def run_workflow(architect_node, tester_node, developer_node, test_runner_node,
         }
     )
 
-    return workflow.compile()
\ No newline at end of file
+    # With a checkpointer the state is saved after every node, so a crashed
+    # sprint can continue from the last completed node (see main.py --resume)
+    return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file